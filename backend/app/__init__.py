@@ -27,6 +27,11 @@ def create_app(config_name='development'):
     db.init_app(app)
     migrate.init_app(app, db, render_as_batch=True)
     jwt.init_app(app)
+    from app.utils.tokens import register_jwt_callbacks
+    register_jwt_callbacks(jwt)
+    from app.services import workload_monitor, burndown_service, kpi_service  # Register their session listeners
+    from app.utils.tenant import init_tenant_scope
+    init_tenant_scope(app)
     bcrypt.init_app(app)
     CORS(app, origins=app.config['CORS_ORIGINS'])
     
@@ -8,14 +8,19 @@ class TimestampMixin:
 
 # Import all models here for easy access
 # This ensures all models are registered with SQLAlchemy when db.create_all() is called
+from app.models.counter import Counter
 from app.models.company import Company
 from app.models.user import User
 from app.models.project import Project
 from app.models.task import Task
+from app.models.task_status_change import TaskStatusChange
 from app.models.assignment import Assignment
 from app.models.comment import Comment
 from app.models.notification import Notification
 from app.models.activity_log import ActivityLog
 from app.models.chat import ChatGroup, GroupMember, Message
+from app.models.bulk_job import BulkJob
+from app.models.analytics_snapshot import CompanySnapshot, ProjectSnapshot, UserSnapshot, BurndownSnapshot, CompanyKpi
 
-__all__ = ['Company', 'User', 'Project', 'Task', 'Assignment', 'Comment', 'Notification', 'ActivityLog', 'ChatGroup', 'GroupMember', 'Message']
\ No newline at end of file
+__all__ = ['Company', 'User', 'Project', 'Task', 'Assignment', 'Comment', 'Notification', 'ActivityLog', 'ChatGroup', 'GroupMember', 'Message', 'BulkJob',
+           'CompanySnapshot', 'ProjectSnapshot', 'UserSnapshot', 'BurndownSnapshot', 'CompanyKpi', 'Counter', 'TaskStatusChange']
\ No newline at end of file
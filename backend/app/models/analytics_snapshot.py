@@ -0,0 +1,232 @@
+import json
+from app import db
+from app.models import TimestampMixin
+
+class SnapshotMetricsMixin:
+    """Daily metrics shared by every snapshot level"""
+    snapshot_date = db.Column(db.Date, nullable=False)
+
+    # Task flow on the day
+    tasks_created = db.Column(db.Integer, nullable=False, default=0)
+    tasks_completed = db.Column(db.Integer, nullable=False, default=0)
+
+    # Backlog at the end of the day
+    tasks_open = db.Column(db.Integer, nullable=False, default=0)
+    tasks_overdue = db.Column(db.Integer, nullable=False, default=0)
+
+    # Hours
+    estimated_hours = db.Column(db.Integer, nullable=False, default=0)  # Estimate of open tasks
+    actual_hours = db.Column(db.Integer, nullable=False, default=0)     # Logged on tasks completed that day
+    assigned_hours = db.Column(db.Integer, nullable=False, default=0)   # Allocated to open tasks
+
+    def metrics_dict(self):
+        return {
+            'date': self.snapshot_date.isoformat() if self.snapshot_date else None,
+            'tasks_created': self.tasks_created,
+            'tasks_completed': self.tasks_completed,
+            'tasks_open': self.tasks_open,
+            'tasks_overdue': self.tasks_overdue,
+            'estimated_hours': self.estimated_hours,
+            'actual_hours': self.actual_hours,
+            'assigned_hours': self.assigned_hours
+        }
+
+class CompanySnapshot(db.Model, SnapshotMetricsMixin, TimestampMixin):
+    __tablename__ = 'company_daily_snapshots'
+
+    id = db.Column(db.Integer, primary_key=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
+
+    # Team
+    active_users = db.Column(db.Integer, nullable=False, default=0)
+    capacity_hours = db.Column(db.Integer, nullable=False, default=0)
+    utilization = db.Column(db.Float, nullable=False, default=0)  # assigned / capacity, percent
+
+    __table_args__ = (
+        db.UniqueConstraint('company_id', 'snapshot_date', name='unique_company_snapshot_day'),
+    )
+
+    def __repr__(self):
+        return f'<CompanySnapshot {self.company_id} {self.snapshot_date}>'
+
+    def to_dict(self):
+        data = self.metrics_dict()
+        data.update({
+            'company_id': self.company_id,
+            'active_users': self.active_users,
+            'capacity_hours': self.capacity_hours,
+            'utilization': self.utilization
+        })
+        return data
+
+class ProjectSnapshot(db.Model, SnapshotMetricsMixin, TimestampMixin):
+    __tablename__ = 'project_daily_snapshots'
+
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=True)
+
+    __table_args__ = (
+        db.UniqueConstraint('project_id', 'snapshot_date', name='unique_project_snapshot_day'),
+        db.Index('ix_project_snapshots_company_date', 'company_id', 'snapshot_date'),
+    )
+
+    def __repr__(self):
+        return f'<ProjectSnapshot {self.project_id} {self.snapshot_date}>'
+
+    def to_dict(self):
+        data = self.metrics_dict()
+        data.update({
+            'project_id': self.project_id,
+            'company_id': self.company_id
+        })
+        return data
+
+class UserSnapshot(db.Model, SnapshotMetricsMixin, TimestampMixin):
+    __tablename__ = 'user_daily_snapshots'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=True)
+
+    capacity_hours = db.Column(db.Integer, nullable=False, default=0)
+    utilization = db.Column(db.Float, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'snapshot_date', name='unique_user_snapshot_day'),
+        db.Index('ix_user_snapshots_company_date', 'company_id', 'snapshot_date'),
+    )
+
+    def __repr__(self):
+        return f'<UserSnapshot {self.user_id} {self.snapshot_date}>'
+
+    def to_dict(self):
+        data = self.metrics_dict()
+        data.update({
+            'user_id': self.user_id,
+            'company_id': self.company_id,
+            'capacity_hours': self.capacity_hours,
+            'utilization': self.utilization
+        })
+        return data
+
+class BurndownSnapshot(db.Model, TimestampMixin):
+    """
+    Remaining and completed work of a project at the end of a day
+    Rewritten for the current day whenever the project's tasks change; days
+    without writes carry the previous row forward.
+    """
+    __tablename__ = 'project_burndown_snapshots'
+
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=True)
+    snapshot_date = db.Column(db.Date, nullable=False)
+
+    # Burndown: work left
+    open_tasks = db.Column(db.Integer, nullable=False, default=0)
+    remaining_hours = db.Column(db.Integer, nullable=False, default=0)  # Estimate of open tasks
+
+    # Burnup: work done against scope
+    completed_tasks = db.Column(db.Integer, nullable=False, default=0)
+    completed_hours = db.Column(db.Integer, nullable=False, default=0)  # Estimate of completed tasks
+    total_tasks = db.Column(db.Integer, nullable=False, default=0)
+    total_hours = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('project_id', 'snapshot_date', name='unique_project_burndown_day'),
+    )
+
+    def __repr__(self):
+        return f'<BurndownSnapshot {self.project_id} {self.snapshot_date}>'
+
+    def to_dict(self):
+        return {
+            'project_id': self.project_id,
+            'date': self.snapshot_date.isoformat() if self.snapshot_date else None,
+            'open_tasks': self.open_tasks,
+            'remaining_hours': self.remaining_hours,
+            'completed_tasks': self.completed_tasks,
+            'completed_hours': self.completed_hours,
+            'total_tasks': self.total_tasks,
+            'total_hours': self.total_hours
+        }
+
+class CompanyKpi(db.Model, TimestampMixin):
+    """
+    Materialized portfolio KPIs of one company
+    Commits that touch the company bump `version`; the row is recomputed on
+    the next read once `refreshed_version` lags behind or the day the
+    overdue counts refer to has passed.
+    """
+    __tablename__ = 'company_kpis'
+
+    id = db.Column(db.Integer, primary_key=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id', ondelete='CASCADE'), nullable=False, unique=True)
+
+    # Freshness
+    version = db.Column(db.Integer, nullable=False, default=0)
+    refreshed_version = db.Column(db.Integer, nullable=True)
+    computed_for = db.Column(db.Date, nullable=True)  # Day the overdue counts refer to
+    refreshed_at = db.Column(db.DateTime, nullable=True)
+
+    # Histograms (JSON strings of value -> count)
+    project_status_counts = db.Column(db.Text, nullable=True)
+    project_priority_counts = db.Column(db.Text, nullable=True)
+    task_status_counts = db.Column(db.Text, nullable=True)
+    task_priority_counts = db.Column(db.Text, nullable=True)
+    user_role_counts = db.Column(db.Text, nullable=True)  # Active users
+
+    # Totals
+    total_projects = db.Column(db.Integer, nullable=False, default=0)
+    overdue_projects = db.Column(db.Integer, nullable=False, default=0)
+    total_tasks = db.Column(db.Integer, nullable=False, default=0)
+    overdue_tasks = db.Column(db.Integer, nullable=False, default=0)
+    active_users = db.Column(db.Integer, nullable=False, default=0)  # Active, not bots
+
+    # Hours
+    estimated_hours = db.Column(db.Integer, nullable=False, default=0)
+    actual_hours = db.Column(db.Integer, nullable=False, default=0)
+    capacity_hours = db.Column(db.Integer, nullable=False, default=0)
+    assigned_hours = db.Column(db.Integer, nullable=False, default=0)  # Allocated to active tasks
+
+    def __repr__(self):
+        return f'<CompanyKpi {self.company_id} v{self.version}>'
+
+    @staticmethod
+    def _counts(value):
+        return json.loads(value) if value else {}
+
+    @property
+    def utilization(self):
+        return round(self.assigned_hours / self.capacity_hours * 100, 2) if self.capacity_hours > 0 else 0
+
+    def to_dict(self):
+        return {
+            'company_id': self.company_id,
+            'computed_for': self.computed_for.isoformat() if self.computed_for else None,
+            'refreshed_at': self.refreshed_at.isoformat() if self.refreshed_at else None,
+            'projects': {
+                'total': self.total_projects,
+                'overdue': self.overdue_projects,
+                'by_status': self._counts(self.project_status_counts),
+                'by_priority': self._counts(self.project_priority_counts)
+            },
+            'tasks': {
+                'total': self.total_tasks,
+                'overdue': self.overdue_tasks,
+                'by_status': self._counts(self.task_status_counts),
+                'by_priority': self._counts(self.task_priority_counts)
+            },
+            'users': {
+                'active': self.active_users,
+                'by_role': self._counts(self.user_role_counts)
+            },
+            'hours': {
+                'estimated': self.estimated_hours,
+                'actual': self.actual_hours,
+                'capacity': self.capacity_hours,
+                'assigned': self.assigned_hours,
+                'utilization': self.utilization
+            }
+        }
@@ -1,3 +1,4 @@
+from sqlalchemy import event
 from app import db
 from app.models import TimestampMixin
 from enum import Enum
@@ -18,6 +19,7 @@ class Assignment(db.Model, TimestampMixin):
     # Foreign Keys
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     task_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), nullable=False)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=True)  # Copy of task.company_id
     assigned_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     
     # Assignment Details
@@ -34,6 +36,8 @@ class Assignment(db.Model, TimestampMixin):
     # Unique constraint: One user can be assigned to a task only once
     __table_args__ = (
         db.UniqueConstraint('user_id', 'task_id', name='unique_user_task_assignment'),
+        db.Index('ix_assignments_task', 'task_id'),
+        db.Index('ix_assignments_company_user', 'company_id', 'user_id'),
     )
     
     def __repr__(self):
@@ -86,44 +90,62 @@ class Assignment(db.Model, TimestampMixin):
     def get_user_workload(user_id, start_date=None, end_date=None):
         """
         Calculate total workload for a user within a date range
-        Returns total assigned hours
+        Counts active tasks whose dates overlap the range, including tasks
+        that span it; returns total assigned hours
         """
         from app.models.task import Task, TaskStatus
         
-        query = Assignment.query.join(Task).filter(
+        query = db.session.query(db.func.coalesce(db.func.sum(Assignment.assigned_hours), 0)).join(Task).filter(
             Assignment.user_id == user_id,
             Task.status.in_([TaskStatus.TODO, TaskStatus.IN_PROGRESS, TaskStatus.REVIEW])
         )
         
         if start_date:
-            query = query.filter(Task.start_date >= start_date)
+            query = query.filter(db.or_(Task.due_date.is_(None), Task.due_date >= start_date))
         if end_date:
-            query = query.filter(Task.due_date <= end_date)
+            query = query.filter(db.or_(Task.start_date.is_(None), Task.start_date <= end_date))
         
-        assignments = query.all()
-        total_hours = sum([a.assigned_hours for a in assignments])
-        
-        return total_hours
+        return int(query.scalar() or 0)
     
     @staticmethod
-    def get_available_users(required_hours, start_date=None, end_date=None):
+    def get_available_users(required_hours, start_date=None, end_date=None, company_id=None):
         """
         Find users who have capacity for the required hours
+        Workloads for every candidate come from one aggregate query;
+        pass company_id to stay within a tenant.
         """
         from app.models.user import User
+        from app.services.assignee_recommender import AssigneeRecommender
         
-        available_users = []
-        users = User.query.filter_by(is_active=True).all()
+        rows = AssigneeRecommender.candidate_workloads(company_id, start_date, end_date)
+        users = {user.id: user for user in User.query.filter(User.id.in_([row[0] for row in rows])).all()} if rows else {}
         
-        for user in users:
-            current_workload = Assignment.get_user_workload(user.id, start_date, end_date)
-            available_capacity = user.weekly_capacity - current_workload
+        available_users = []
+        for row in rows:
+            current_workload = int(row[7])
+            available_capacity = (row[6] or 0) - current_workload
             
             if available_capacity >= required_hours:
                 available_users.append({
-                    'user': user.to_dict(),
+                    'user': users[row[0]].to_dict(),
                     'available_hours': available_capacity,
                     'current_workload': current_workload
                 })
         
-        return available_users
\ No newline at end of file
+        return available_users
+
+
+def task_company(connection, target):
+    """Company of the task an assignment or comment belongs to"""
+    from app.models.task import Task
+    
+    task = target.__dict__.get('task')
+    if task is not None and task.id == target.task_id and task.company_id is not None:
+        return task.company_id
+    return connection.execute(db.select(Task.company_id).where(Task.id == target.task_id)).scalar()
+
+
+@event.listens_for(Assignment, 'before_insert')
+def set_assignment_company(mapper, connection, target):
+    if target.company_id is None:
+        target.company_id = task_company(connection, target)
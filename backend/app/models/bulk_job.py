@@ -0,0 +1,89 @@
+import json
+from app import db
+from app.models import TimestampMixin
+from enum import Enum
+
+class BulkJobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    PARTIAL = "partial"      # Some chunks failed
+    FAILED = "failed"
+
+class BulkJob(db.Model, TimestampMixin):
+    __tablename__ = 'bulk_jobs'
+
+    # Primary Key (uuid4 string, safe to hand out to clients)
+    id = db.Column(db.String(36), primary_key=True)
+
+    # Owner
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+
+    # Job Details
+    operation = db.Column(db.String(50), nullable=False)  # e.g. tasks.update_status
+    idempotency_key = db.Column(db.String(255), nullable=True)
+    status = db.Column(db.Enum(BulkJobStatus), nullable=False, default=BulkJobStatus.PENDING)
+    is_async = db.Column(db.Boolean, default=False)
+
+    # Progress
+    total_items = db.Column(db.Integer, default=0)
+    processed_items = db.Column(db.Integer, default=0)
+    failed_items = db.Column(db.Integer, default=0)
+    chunk_size = db.Column(db.Integer, nullable=True)
+
+    # Outcome (JSON strings)
+    results = db.Column(db.Text, nullable=True)   # [{"id": 1, "result": "updated"}, ...]
+    details = db.Column(db.Text, nullable=True)   # Operation specific extras
+    errors = db.Column(db.Text, nullable=True)    # Chunk error messages
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    # One job per idempotency key per user
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'idempotency_key', name='unique_user_idempotency_key'),
+    )
+
+    def __repr__(self):
+        return f'<BulkJob {self.id}: {self.operation} ({self.status.value})>'
+
+    @property
+    def progress_percentage(self):
+        """Share of items processed so far"""
+        if not self.total_items:
+            return 100 if self.status == BulkJobStatus.COMPLETED else 0
+        return round((self.processed_items or 0) / self.total_items * 100, 2)
+
+    def get_results(self):
+        return json.loads(self.results) if self.results else []
+
+    def get_details(self):
+        return json.loads(self.details) if self.details else {}
+
+    def to_dict(self, include_results=False):
+        """Convert job to dictionary"""
+        results = self.get_results()
+        summary = {}
+        for item in results:
+            summary[item['result']] = summary.get(item['result'], 0) + 1
+
+        data = {
+            'id': self.id,
+            'operation': self.operation,
+            'status': self.status.value,
+            'is_async': self.is_async,
+            'idempotency_key': self.idempotency_key,
+            'total_items': self.total_items,
+            'processed_items': self.processed_items,
+            'failed_items': self.failed_items,
+            'progress_percentage': self.progress_percentage,
+            'summary': summary,
+            'details': self.get_details(),
+            'errors': json.loads(self.errors) if self.errors else [],
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+        if include_results:
+            data['results'] = results
+
+        return data
@@ -50,6 +50,13 @@ class Message(db.Model):
     sender = db.relationship('User', foreign_keys=[sender_id], backref='sent_messages')
     recipient = db.relationship('User', foreign_keys=[recipient_id], backref='received_messages')
 
+    # Tenant queries reach messages through the company's user ids
+    __table_args__ = (
+        db.Index('ix_messages_sender_created', 'sender_id', 'created_at'),
+        db.Index('ix_messages_recipient_created', 'recipient_id', 'created_at'),
+        db.Index('ix_messages_group_created', 'group_id', 'created_at'),
+    )
+
     def to_dict(self):
         sender_name = "Unknown User"
         if self.sender:
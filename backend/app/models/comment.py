@@ -1,3 +1,4 @@
+from sqlalchemy import event
 from app import db
 from app.models import TimestampMixin
 
@@ -13,6 +14,7 @@ class Comment(db.Model, TimestampMixin):
     # Foreign Keys
     task_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=True)  # Copy of task.company_id
     
     # Optional: Reply to another comment
     parent_id = db.Column(db.Integer, db.ForeignKey('comments.id'), nullable=True)
@@ -23,6 +25,10 @@ class Comment(db.Model, TimestampMixin):
     # Relationships
     replies = db.relationship('Comment', backref=db.backref('parent_comment', remote_side=[id]), lazy='dynamic')
     
+    __table_args__ = (
+        db.Index('ix_comments_company_created', 'company_id', 'created_at'),
+    )
+    
     def __repr__(self):
         return f'<Comment {self.id} on Task {self.task_id}>'
     
@@ -51,4 +57,11 @@ class Comment(db.Model, TimestampMixin):
         if include_replies:
             data['replies'] = [reply.to_dict() for reply in self.replies.all()]
         
-        return data
\ No newline at end of file
+        return data
+
+
+@event.listens_for(Comment, 'before_insert')
+def set_comment_company(mapper, connection, target):
+    if target.company_id is None:
+        from app.models.assignment import task_company
+        target.company_id = task_company(connection, target)
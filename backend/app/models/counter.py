@@ -0,0 +1,58 @@
+from sqlalchemy.exc import IntegrityError
+from app import db
+
+class Counter(db.Model):
+    """
+    Named sequence, e.g. ('task_number', 'PROJ-0001') -> last issued number
+    Incremented with a single UPDATE ... RETURNING, so concurrent creates
+    never hand out the same number and numbering costs one statement.
+    """
+    __tablename__ = 'counters'
+
+    scope = db.Column(db.String(50), primary_key=True)   # e.g. project_code, task_number
+    key = db.Column(db.String(100), primary_key=True)    # e.g. global, or a project code
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<Counter {self.scope}:{self.key}={self.value}>'
+
+    @staticmethod
+    def _increment(scope, key, count):
+        """Bump an existing counter; returns the new value or None if the row is missing"""
+        condition = db.and_(Counter.scope == scope, Counter.key == key)
+        if db.session.get_bind().dialect.update_returning:
+            return db.session.execute(
+                db.update(Counter).where(condition).values(value=Counter.value + count).returning(Counter.value)
+            ).scalar()
+
+        # No RETURNING support: lock the row, then update it
+        current = db.session.execute(
+            db.select(Counter.value).where(condition).with_for_update()
+        ).scalar()
+        if current is None:
+            return None
+        db.session.execute(db.update(Counter).where(condition).values(value=current + count))
+        return current + count
+
+    @staticmethod
+    def allocate(scope, key, count=1, seed=None):
+        """
+        Reserve `count` consecutive numbers and return the first one
+        The counter row lives in the caller's transaction: it stays locked
+        until commit and a rollback returns the numbers. `seed()` gives the
+        highest number already used when the counter does not exist yet.
+        """
+        if count < 1:
+            raise ValueError('count must be at least 1')
+
+        value = Counter._increment(scope, key, count)
+        if value is None:
+            start = seed() if seed else 0
+            try:
+                with db.session.begin_nested():
+                    db.session.add(Counter(scope=scope, key=key, value=start + count))
+                value = start + count
+            except IntegrityError:
+                # Another transaction created it first
+                value = Counter._increment(scope, key, count)
+        return value - count + 1
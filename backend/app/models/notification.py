@@ -41,6 +41,11 @@ class Notification(db.Model, TimestampMixin):
     project = db.relationship('Project', backref='notifications', foreign_keys=[project_id])
     comment = db.relationship('Comment', backref='notifications', foreign_keys=[comment_id])
     
+    # Tenant queries reach notifications through the company's user ids
+    __table_args__ = (
+        db.Index('ix_notifications_user_read', 'user_id', 'is_read', 'created_at'),
+    )
+    
     def __repr__(self):
         return f'<Notification {self.id}: {self.type.value}>'
     
@@ -1,5 +1,6 @@
 from app import db
 from app.models import TimestampMixin
+from app.models.counter import Counter
 from enum import Enum
 from datetime import datetime
 
@@ -49,6 +50,12 @@ class Project(db.Model, TimestampMixin):
     # Relationships
     tasks = db.relationship('Task', backref='project', lazy='dynamic', cascade='all, delete-orphan')
     
+    # Tenant queries filter by company first
+    __table_args__ = (
+        db.Index('ix_projects_company_status', 'company_id', 'status'),
+        db.Index('ix_projects_company_end_date', 'company_id', 'end_date'),
+    )
+    
     def __repr__(self):
         return f'<Project {self.code}: {self.title}>'
     
@@ -77,8 +84,15 @@ class Project(db.Model, TimestampMixin):
             return delta.days
         return None
     
-    def to_dict(self, include_tasks=False):
-        """Convert project to dictionary"""
+    def to_dict(self, include_tasks=False, completion_percentage=None):
+        """
+        Convert project to dictionary
+        Pass completion_percentage when it is already known (e.g. from an
+        aggregate query) to skip the two COUNT queries.
+        """
+        if completion_percentage is None:
+            completion_percentage = self.completion_percentage
+        
         data = {
             'id': self.id,
             'title': self.title,
@@ -93,7 +107,7 @@ class Project(db.Model, TimestampMixin):
             'estimated_hours': self.estimated_hours,
             'created_by': self.created_by,
             'manager_id': self.manager_id,
-            'completion_percentage': self.completion_percentage,
+            'completion_percentage': completion_percentage,
             'is_overdue': self.is_overdue,
             'days_remaining': self.days_remaining,
             'created_at': self.created_at.isoformat() if hasattr(self.created_at, 'isoformat') else str(self.created_at) if self.created_at else None,
@@ -105,11 +119,28 @@ class Project(db.Model, TimestampMixin):
         
         return data
     
+    @staticmethod
+    def _highest_code_number():
+        """Highest PROJ-#### number in use; only read when the counter is first created"""
+        from app.utils.tenant import unscoped
+        numbers = [0]
+        # Codes are unique across companies
+        with unscoped():
+            codes = db.session.query(Project.code).filter(Project.code.like('PROJ-%')).all()
+        for (code,) in codes:
+            try:
+                numbers.append(int(code.split('-')[1]))
+            except (IndexError, ValueError):
+                continue
+        return max(numbers)
+    
+    @staticmethod
+    def allocate_project_codes(count=1):
+        """Reserve `count` consecutive project codes with one counter increment"""
+        first = Counter.allocate('project_code', 'global', count, seed=Project._highest_code_number)
+        return [f"PROJ-{number:04d}" for number in range(first, first + count)]
+    
     @staticmethod
     def generate_project_code():
         """Generate unique project code"""
-        last_project = Project.query.order_by(Project.id.desc()).first()
-        if last_project:
-            last_number = int(last_project.code.split('-')[1])
-            return f"PROJ-{last_number + 1:04d}"
-        return "PROJ-0001"
\ No newline at end of file
+        return Project.allocate_project_codes(1)[0]
\ No newline at end of file
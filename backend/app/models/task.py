@@ -1,5 +1,7 @@
+from sqlalchemy import event, inspect
 from app import db
 from app.models import TimestampMixin
+from app.models.counter import Counter
 from enum import Enum
 from datetime import datetime
 
@@ -16,6 +18,9 @@ class TaskPriority(str, Enum):
     HIGH = "high"
     CRITICAL = "critical"
 
+# Deepest hierarchy level Task.get_tree will walk
+MAX_TREE_DEPTH = 1000
+
 class Task(db.Model, TimestampMixin):
     __tablename__ = 'tasks'
     
@@ -46,13 +51,23 @@ class Task(db.Model, TimestampMixin):
     # Foreign Keys
     project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False)
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=True)  # Copy of project.company_id
     
     # Relationships
     assignments = db.relationship('Assignment', backref='task', lazy='dynamic', cascade='all, delete-orphan')
     comments = db.relationship('Comment', backref='task', lazy='dynamic', cascade='all, delete-orphan')
+    status_changes = db.relationship('TaskStatusChange', backref='task', lazy='dynamic', cascade='all, delete-orphan')
     subtasks = db.relationship('Task', backref=db.backref('parent_task', remote_side=[id]), lazy='dynamic')
     creator = db.relationship('User', foreign_keys=[created_by], backref='created_tasks')
     
+    # Tenant queries filter by company first; project pages by project
+    __table_args__ = (
+        db.Index('ix_tasks_company_status', 'company_id', 'status'),
+        db.Index('ix_tasks_company_due_date', 'company_id', 'due_date'),
+        db.Index('ix_tasks_project_status', 'project_id', 'status'),
+        db.Index('ix_tasks_project_due_date', 'project_id', 'due_date'),
+    )
+    
     def __repr__(self):
         return f'<Task {self.task_number}: {self.title}>'
     
@@ -114,15 +129,81 @@ class Task(db.Model, TimestampMixin):
         return data
     
     @staticmethod
-    def generate_task_number(project_code):
-        """Generate unique task number for a project"""
+    def get_tree(task_id, direction='descendants', max_depth=None):
+        """
+        Get (task, depth) rows for a task and its whole hierarchy in one query
+        direction='descendants' follows tasks that depend on it (subtasks),
+        'ancestors' follows depends_on upwards. A recursive CTE walks the
+        edges; depth is capped so cyclic data cannot recurse forever.
+        """
+        from sqlalchemy.orm import aliased
+        
+        limit = min(max_depth if max_depth is not None else MAX_TREE_DEPTH, MAX_TREE_DEPTH)
+        tree = db.select(
+            Task.id.label('task_id'),
+            Task.depends_on.label('parent_id'),
+            db.literal(0).label('depth')
+        ).where(Task.id == task_id).cte('task_tree', recursive=True)
+        
+        node = aliased(Task)
+        if direction == 'ancestors':
+            step = node.id == tree.c.parent_id
+        else:
+            step = node.depends_on == tree.c.task_id
+        tree = tree.union_all(
+            db.select(node.id, node.depends_on, tree.c.depth + 1)
+            .join(tree, step)
+            .where(tree.c.depth < limit)
+        )
+        
+        return db.session.query(Task, tree.c.depth).join(
+            tree, Task.id == tree.c.task_id
+        ).order_by(tree.c.depth, Task.id).all()
+    
+    @staticmethod
+    def _highest_task_number(project_code):
+        """Highest T### number used in a project; only read when its counter is first created"""
         from app.models.project import Project
         
-        last_task = Task.query.join(Project).filter(
+        numbers = [0]
+        for (task_number,) in db.session.query(Task.task_number).join(Project).filter(
             Project.code == project_code
-        ).order_by(Task.id.desc()).first()
-        
-        if last_task:
-            last_number = int(last_task.task_number.split('-')[-1][1:])
-            return f"{project_code}-T{last_number + 1:03d}"
-        return f"{project_code}-T001"
\ No newline at end of file
+        ):
+            try:
+                numbers.append(int(task_number.split('-')[-1][1:]))
+            except (IndexError, ValueError):
+                continue
+        return max(numbers)
+    
+    @staticmethod
+    def allocate_task_numbers(project_code, count=1):
+        """Reserve `count` consecutive task numbers in a project with one counter increment"""
+        first = Counter.allocate(
+            'task_number',
+            project_code,
+            count,
+            seed=lambda: Task._highest_task_number(project_code)
+        )
+        return [f"{project_code}-T{number:03d}" for number in range(first, first + count)]
+    
+    @staticmethod
+    def generate_task_number(project_code):
+        """Generate unique task number for a project"""
+        return Task.allocate_task_numbers(project_code, 1)[0]
+
+
+@event.listens_for(Task, 'before_insert')
+@event.listens_for(Task, 'before_update')
+def set_task_company(mapper, connection, target):
+    """Copy the project's company onto new tasks and tasks moved between projects"""
+    from app.models.project import Project
+    
+    if target.company_id is not None and not inspect(target).attrs.project_id.history.has_changes():
+        return
+    project = target.__dict__.get('project')
+    if project is not None and project.id == target.project_id:
+        target.company_id = project.company_id
+    else:
+        target.company_id = connection.execute(
+            db.select(Project.company_id).where(Project.id == target.project_id)
+        ).scalar()
@@ -0,0 +1,73 @@
+from datetime import datetime
+from app import db
+from app.models.task import TaskStatus
+
+class TaskStatusChange(db.Model):
+    """
+    Append-only log of task status transitions
+    One narrow row per change; the status a task held before its first
+    change is `from_status` of that change (or its current status if it
+    never changed), starting at Task.created_at.
+    """
+    __tablename__ = 'task_status_changes'
+
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False)
+    from_status = db.Column(db.Enum(TaskStatus), nullable=True)
+    to_status = db.Column(db.Enum(TaskStatus), nullable=False)
+    changed_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_task_status_changes_task', 'task_id', 'changed_at'),
+        db.Index('ix_task_status_changes_project', 'project_id', 'changed_at'),
+    )
+
+    def __repr__(self):
+        return f'<TaskStatusChange {self.task_id}: {self.from_status} -> {self.to_status}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'task_id': self.task_id,
+            'project_id': self.project_id,
+            'from_status': self.from_status.value if self.from_status else None,
+            'to_status': self.to_status.value,
+            'changed_by': self.changed_by,
+            'changed_at': self.changed_at.isoformat() if self.changed_at else None
+        }
+
+    @staticmethod
+    def log(task, from_status, changed_by=None):
+        """Record the task's move from `from_status` to its current status, if it moved"""
+        if from_status == task.status:
+            return None
+        change = TaskStatusChange(
+            task_id=task.id,
+            project_id=task.project_id,
+            from_status=from_status,
+            to_status=task.status,
+            changed_by=changed_by
+        )
+        db.session.add(change)
+        return change
+
+    @staticmethod
+    def log_bulk(changes, to_status, changed_by=None):
+        """
+        Record many transitions to `to_status` with one executemany insert
+        changes: iterable of (task_id, project_id, from_status)
+        """
+        now = datetime.utcnow()
+        rows = [{
+            'task_id': task_id,
+            'project_id': project_id,
+            'from_status': from_status,
+            'to_status': to_status,
+            'changed_by': changed_by,
+            'changed_at': now
+        } for task_id, project_id, from_status in changes if from_status != to_status]
+        if rows:
+            db.session.execute(TaskStatusChange.__table__.insert(), rows)
+        return len(rows)
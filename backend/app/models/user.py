@@ -33,6 +33,7 @@ class User(db.Model, TimestampMixin):
     is_active = db.Column(db.Boolean, default=True)
     is_verified = db.Column(db.Boolean, default=False)
     is_bot = db.Column(db.Boolean, default=False)
+    token_version = db.Column(db.Integer, nullable=False, default=0)  # Bumped to revoke issued tokens
     
     # Preferences
     email_notifications = db.Column(db.Boolean, default=True)
@@ -44,6 +45,11 @@ class User(db.Model, TimestampMixin):
     assignments = db.relationship('Assignment', backref='user', lazy='dynamic', cascade='all, delete-orphan', foreign_keys='Assignment.user_id')
     comments = db.relationship('Comment', backref='author', lazy='dynamic', cascade='all, delete-orphan')
     
+    # Tenant queries filter by company first
+    __table_args__ = (
+        db.Index('ix_users_company_active_role', 'company_id', 'is_active', 'role'),
+    )
+    
     def __repr__(self):
         return f'<User {self.email}>'
     
@@ -88,8 +94,10 @@ class User(db.Model, TimestampMixin):
     
     @staticmethod
     def find_by_email(email):
-        """Find user by email"""
-        return User.query.filter_by(email=email).first()
+        """Find user by email (emails are unique across companies)"""
+        from app.utils.tenant import unscoped
+        with unscoped():
+            return User.query.filter_by(email=email).first()
     
     @staticmethod
     def find_by_id(user_id):
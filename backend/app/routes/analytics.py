@@ -7,127 +7,76 @@ from app.models import User, Project, Task, Assignment, Comment
 from app.models.user import UserRole
 from app.models.project import ProjectStatus, ProjectPriority
 from app.models.task import TaskStatus, TaskPriority
+from app.models.analytics_snapshot import CompanySnapshot, ProjectSnapshot, UserSnapshot
+from app.services.snapshot_service import SnapshotService
+from app.services.forecast_service import ForecastService, DEFAULT_WINDOW, DEFAULT_SPAN
+from app.services.capacity_planner import CapacityPlanner
+from app.services.estimation_accuracy import EstimationAccuracy
+from app.services.earned_value import EarnedValue
+from app.services.kpi_service import KpiService
 from app.utils.responses import success_response, error_response
+from app.utils.decorators import role_required
+from app.utils.response_cache import analytics_cache
+from app.utils.tokens import get_current_principal
 
 analytics_bp = Blueprint('analytics', __name__)
 
 
+def get_company_id():
+    """Company of the authenticated user, or None"""
+    principal = get_current_principal()
+    return principal.company_id if principal else None
+
+
 @analytics_bp.route('/overview', methods=['GET'])
 @jwt_required()
+@analytics_cache.cached('overview')
 def get_overview():
     """
     Get overall system analytics
     Provides high-level statistics for dashboard
     """
     try:
-        current_user_id = get_jwt_identity()
-        if not current_user_id:
-            return error_response('Invalid token', None, 401)
-        
-        # Convert to int since JWT identity is stored as string but user ID is integer
-        try:
-            current_user = User.query.get(int(current_user_id))
-        except (ValueError, TypeError):
-            return error_response('Invalid user ID', None, 400)
-        
-        if not current_user:
-            return error_response('User not found', None, 404)
-        
-        # Check if user has a company (for scoped queries)
-        if not current_user.company_id:
+        company_id = get_company_id()
+        if not company_id:
             return error_response('User is not associated with a company', None, 403)
         
-        # Basic counts (scoped to company)
-        total_users = User.query.filter_by(
-            is_active=True, 
-            is_bot=False,
-            company_id=current_user.company_id
-        ).count()
-        total_projects = Project.query.filter_by(company_id=current_user.company_id).count()
-        total_tasks = Task.query.join(Project).filter(
-            Project.company_id == current_user.company_id
-        ).count()
-        
-        # Project statistics (scoped to company)
-        active_projects = Project.query.filter_by(
-            status=ProjectStatus.IN_PROGRESS,
-            company_id=current_user.company_id
-        ).count()
-        completed_projects = Project.query.filter_by(
-            status=ProjectStatus.COMPLETED,
-            company_id=current_user.company_id
-        ).count()
-        overdue_projects = Project.query.filter(
-            and_(
-                Project.company_id == current_user.company_id,
-                Project.end_date < datetime.utcnow().date(),
-                Project.status.notin_([ProjectStatus.COMPLETED, ProjectStatus.ARCHIVED])
-            )
-        ).count()
-        
-        # Task statistics (scoped to company)
-        completed_tasks = Task.query.join(Project).filter(
-            and_(
-                Project.company_id == current_user.company_id,
-                Task.status == TaskStatus.COMPLETED
-            )
-        ).count()
-        in_progress_tasks = Task.query.join(Project).filter(
-            and_(
-                Project.company_id == current_user.company_id,
-                Task.status == TaskStatus.IN_PROGRESS
-            )
-        ).count()
-        overdue_tasks = Task.query.join(Project).filter(
-            and_(
-                Task.due_date < datetime.utcnow().date(),
-                Task.status != TaskStatus.COMPLETED
-            )
-        ).count()
-        
-        # Hours statistics
-        total_estimated_hours = db.session.query(func.sum(Task.estimated_hours)).scalar() or 0
-        total_actual_hours = db.session.query(func.sum(Task.actual_hours)).scalar() or 0
-        
-        # Team utilization
-        total_capacity = db.session.query(func.sum(User.weekly_capacity)).filter_by(is_active=True).scalar() or 0
-        total_workload = db.session.query(func.sum(Assignment.assigned_hours)).join(Task).filter(
-            Task.status.in_([TaskStatus.TODO, TaskStatus.IN_PROGRESS, TaskStatus.REVIEW])
-        ).scalar() or 0
-        
-        utilization_rate = round((total_workload / total_capacity * 100), 2) if total_capacity > 0 else 0
+        kpi = KpiService.get(company_id)
+        if not kpi:
+            return error_response('Company not found', None, 404)
+        kpis = kpi.to_dict()
+        project_counts = kpis['projects']['by_status']
+        task_counts = kpis['tasks']['by_status']
+        role_counts = kpis['users']['by_role']
+        
+        total_projects = kpi.total_projects
+        completed_projects = project_counts.get(ProjectStatus.COMPLETED.value, 0)
+        total_tasks = kpi.total_tasks
+        completed_tasks = task_counts.get(TaskStatus.COMPLETED.value, 0)
+        total_estimated_hours = kpi.estimated_hours
+        total_actual_hours = kpi.actual_hours
+        total_capacity = kpi.capacity_hours
+        total_workload = kpi.assigned_hours
         
         overview = {
             'users': {
-                'total': total_users,
-                'admins': User.query.filter_by(
-                    role=UserRole.ADMIN, 
-                    is_active=True,
-                    company_id=current_user.company_id
-                ).count(),
-                'managers': User.query.filter_by(
-                    role=UserRole.TEAM_LEADER, 
-                    is_active=True,
-                    company_id=current_user.company_id
-                ).count(),
-                'employees': User.query.filter_by(
-                    role=UserRole.EMPLOYEE, 
-                    is_active=True,
-                    company_id=current_user.company_id
-                ).count()
+                'total': kpi.active_users,
+                'admins': role_counts.get(UserRole.ADMIN.value, 0),
+                'managers': role_counts.get(UserRole.TEAM_LEADER.value, 0),
+                'employees': role_counts.get(UserRole.EMPLOYEE.value, 0)
             },
             'projects': {
                 'total': total_projects,
-                'active': active_projects,
+                'active': project_counts.get(ProjectStatus.IN_PROGRESS.value, 0),
                 'completed': completed_projects,
-                'overdue': overdue_projects,
+                'overdue': kpi.overdue_projects,
                 'completion_rate': round((completed_projects / total_projects * 100), 2) if total_projects > 0 else 0
             },
             'tasks': {
                 'total': total_tasks,
                 'completed': completed_tasks,
-                'in_progress': in_progress_tasks,
-                'overdue': overdue_tasks,
+                'in_progress': task_counts.get(TaskStatus.IN_PROGRESS.value, 0),
+                'overdue': kpi.overdue_tasks,
                 'completion_rate': round((completed_tasks / total_tasks * 100), 2) if total_tasks > 0 else 0
             },
             'hours': {
@@ -140,7 +89,7 @@ def get_overview():
                 'total_capacity': total_capacity,
                 'current_workload': total_workload,
                 'available_capacity': total_capacity - total_workload,
-                'utilization_rate': utilization_rate
+                'utilization_rate': kpi.utilization
             }
         }
         
@@ -150,22 +99,47 @@ def get_overview():
         return error_response(f'Failed to get overview: {str(e)}', None, 500)
 
 
+@analytics_bp.route('/kpis', methods=['GET'])
+@jwt_required()
+@analytics_cache.cached('kpis')
+def get_kpis():
+    """
+    Get the company's materialized portfolio KPIs
+    Status and priority histograms, overdue counts, hours and utilization
+    """
+    try:
+        company_id = get_company_id()
+        if not company_id:
+            return error_response('User is not associated with a company', None, 403)
+        
+        kpi = KpiService.get(company_id)
+        if not kpi:
+            return error_response('Company not found', None, 404)
+        
+        return success_response('Company KPIs retrieved successfully', kpi.to_dict(), 200)
+    
+    except Exception as e:
+        return error_response(f'Failed to get KPIs: {str(e)}', None, 500)
+
+
 @analytics_bp.route('/projects-by-status', methods=['GET'])
 @jwt_required()
+@analytics_cache.cached('projects-by-status')
 def get_projects_by_status():
     """Get project count grouped by status"""
     try:
-        status_counts = db.session.query(
-            Project.status,
-            func.count(Project.id)
-        ).group_by(Project.status).all()
+        company_id = get_company_id()
+        if not company_id:
+            return error_response('User is not associated with a company', None, 403)
+        
+        status_counts = KpiService.get(company_id).to_dict()['projects']['by_status']
         
         data = [
             {
-                'status': status.value,
+                'status': status,
                 'count': count
             }
-            for status, count in status_counts
+            for status, count in status_counts.items() if count
         ]
         
         return success_response('Project status distribution retrieved', {'data': data}, 200)
@@ -176,20 +150,22 @@ def get_projects_by_status():
 
 @analytics_bp.route('/projects-by-priority', methods=['GET'])
 @jwt_required()
+@analytics_cache.cached('projects-by-priority')
 def get_projects_by_priority():
     """Get project count grouped by priority"""
     try:
-        priority_counts = db.session.query(
-            Project.priority,
-            func.count(Project.id)
-        ).group_by(Project.priority).all()
+        company_id = get_company_id()
+        if not company_id:
+            return error_response('User is not associated with a company', None, 403)
+        
+        priority_counts = KpiService.get(company_id).to_dict()['projects']['by_priority']
         
         data = [
             {
-                'priority': priority.value,
+                'priority': priority,
                 'count': count
             }
-            for priority, count in priority_counts
+            for priority, count in priority_counts.items() if count
         ]
         
         return success_response('Project priority distribution retrieved', {'data': data}, 200)
@@ -200,28 +176,37 @@ def get_projects_by_priority():
 
 @analytics_bp.route('/tasks-by-status', methods=['GET'])
 @jwt_required()
+@analytics_cache.cached('tasks-by-status')
 def get_tasks_by_status():
     """Get task count grouped by status"""
     try:
+        company_id = get_company_id()
+        if not company_id:
+            return error_response('User is not associated with a company', None, 403)
+        
         # Optional: filter by project
         project_id = request.args.get('project_id', type=int)
         
-        query = db.session.query(
-            Task.status,
-            func.count(Task.id)
-        )
-        
         if project_id:
-            query = query.filter_by(project_id=project_id)
-        
-        status_counts = query.group_by(Task.status).all()
+            status_counts = [
+                (status.value, count)
+                for status, count in db.session.query(
+                    Task.status,
+                    func.count(Task.id)
+                ).filter(
+                    Task.company_id == company_id,
+                    Task.project_id == project_id
+                ).group_by(Task.status)
+            ]
+        else:
+            status_counts = KpiService.get(company_id).to_dict()['tasks']['by_status'].items()
         
         data = [
             {
-                'status': status.value,
+                'status': status,
                 'count': count
             }
-            for status, count in status_counts
+            for status, count in status_counts if count
         ]
         
         return success_response('Task status distribution retrieved', {'data': data}, 200)
@@ -232,13 +217,18 @@ def get_tasks_by_status():
 
 @analytics_bp.route('/team-workload', methods=['GET'])
 @jwt_required()
+@analytics_cache.cached('team-workload')
 def get_team_workload():
     """
     Get workload distribution across team members
     Shows who is overloaded, available, etc.
     """
     try:
-        users = User.query.filter_by(is_active=True, role=UserRole.EMPLOYEE).all()
+        company_id = get_company_id()
+        if not company_id:
+            return error_response('User is not associated with a company', None, 403)
+        
+        users = User.query.filter_by(is_active=True, role=UserRole.EMPLOYEE, company_id=company_id).all()
         
         workload_data = []
         for user in users:
@@ -290,32 +280,29 @@ def get_team_workload():
 
 @analytics_bp.route('/productivity-trends', methods=['GET'])
 @jwt_required()
+@analytics_cache.cached('productivity-trends')
 def get_productivity_trends():
     """
     Get productivity trends over time
+    Daily counts come from the company snapshots; days not rolled up yet
+    are counted from tasks.
     Query params:
     - days: Number of days to analyze (default: 30)
     """
     try:
+        company_id = get_company_id()
+        if not company_id:
+            return error_response('User is not associated with a company', None, 403)
+        
         days = request.args.get('days', 30, type=int)
-        start_date = datetime.utcnow().date() - timedelta(days=days)
-        
-        # Tasks completed per day
-        completed_tasks = db.session.query(
-            func.date(Task.completed_date).label('date'),
-            func.count(Task.id).label('count')
-        ).filter(
-            Task.completed_date >= start_date,
-            Task.status == TaskStatus.COMPLETED
-        ).group_by(func.date(Task.completed_date)).all()
-        
-        # Format data
+        end_date = datetime.utcnow().date()
+        start_date = end_date - timedelta(days=days)
+        
+        # Tasks completed per day, from the daily company snapshots
+        completions = SnapshotService.completions(company_id, start_date, end_date)
         tasks_completed = [
-            {
-                'date': date.isoformat() if date else None,
-                'count': count
-            }
-            for date, count in completed_tasks
+            {'date': day.isoformat(), 'count': count}
+            for day, count in sorted(completions.items()) if count
         ]
         
         # Calculate average
@@ -325,7 +312,7 @@ def get_productivity_trends():
         result = {
             'period': {
                 'start_date': start_date.isoformat(),
-                'end_date': datetime.utcnow().date().isoformat(),
+                'end_date': end_date.isoformat(),
                 'days': days
             },
             'tasks_completed': tasks_completed,
@@ -350,11 +337,16 @@ def get_upcoming_deadlines():
     - days: Look ahead this many days (default: 7)
     """
     try:
+        company_id = get_company_id()
+        if not company_id:
+            return error_response('User is not associated with a company', None, 403)
+        
         days = request.args.get('days', 7, type=int)
         end_date = datetime.utcnow().date() + timedelta(days=days)
         
         upcoming_tasks = Task.query.filter(
             and_(
+                Task.company_id == company_id,
                 Task.due_date.isnot(None),
                 Task.due_date <= end_date,
                 Task.status.in_([TaskStatus.TODO, TaskStatus.IN_PROGRESS, TaskStatus.REVIEW])
@@ -393,50 +385,143 @@ def get_upcoming_deadlines():
 
 @analytics_bp.route('/project-completion-forecast', methods=['GET'])
 @jwt_required()
+@analytics_cache.cached('project-completion-forecast')
 def get_project_completion_forecast():
     """
-    Forecast project completion dates based on current progress
+    Forecast project completion dates from each project's recent burn rate
+    Velocity is an EWMA of tasks completed per day, fitted for all active
+    projects at once, with an 80% confidence band on the completion date.
+    Query params:
+    - window: Days of completion history to fit (default: 60, max 365)
+    - span: EWMA span in days (default: 14)
     """
     try:
-        active_projects = Project.query.filter(
-            Project.status.in_([ProjectStatus.PLANNING, ProjectStatus.IN_PROGRESS])
-        ).all()
+        company_id = get_company_id()
+        if not company_id:
+            return error_response('User is not associated with a company', None, 403)
         
-        forecasts = []
-        for project in active_projects:
-            completion_rate = project.completion_percentage
-            
-            if completion_rate > 0 and project.start_date:
-                # Calculate days elapsed
-                days_elapsed = (datetime.utcnow().date() - project.start_date).days
-                
-                if days_elapsed > 0:
-                    # Forecast total days needed
-                    total_days_forecast = (days_elapsed / completion_rate) * 100
-                    remaining_days = total_days_forecast - days_elapsed
-                    forecast_completion = datetime.utcnow().date() + timedelta(days=remaining_days)
-                    
-                    # Check if on track
-                    on_track = forecast_completion <= project.end_date if project.end_date else True
-                    
-                    forecasts.append({
-                        'project': project.to_dict(),
-                        'forecast': {
-                            'completion_date': forecast_completion.isoformat(),
-                            'days_remaining': int(remaining_days),
-                            'on_track': on_track,
-                            'delay_days': (forecast_completion - project.end_date).days if project.end_date and not on_track else 0
-                        }
-                    })
-        
-        return success_response('Project completion forecast retrieved', {'projects': forecasts}, 200)
+        window = request.args.get('window', DEFAULT_WINDOW, type=int)
+        span = request.args.get('span', DEFAULT_SPAN, type=int)
+        if window < 1 or window > 365 or span < 1:
+            return error_response('window must be between 1 and 365 and span at least 1', None, 400)
+        
+        forecasts = ForecastService.forecast_company(company_id, window=window, span=span)
+        
+        return success_response('Project completion forecast retrieved', {
+            'projects': forecasts,
+            'summary': {
+                'total': len(forecasts),
+                'on_track': len([f for f in forecasts if f['forecast']['on_track'] is True]),
+                'at_risk': len([f for f in forecasts if f['forecast']['on_track'] is False]),
+                'no_velocity': len([f for f in forecasts if f['forecast']['completion_date'] is None])
+            }
+        }, 200)
     
     except Exception as e:
         return error_response(f'Failed to get forecast: {str(e)}', None, 500)
 
 
+@analytics_bp.route('/capacity-heatmap', methods=['GET'])
+@jwt_required()
+@analytics_cache.cached('capacity-heatmap')
+def get_capacity_heatmap():
+    """
+    Weekly workload per user against weekly capacity
+    Assigned hours of active tasks are spread evenly over each task's dates.
+    Query params:
+    - start_date: First week (rounded down to Monday, default: this week)
+    - weeks: Number of weeks (default: 12, max 104)
+    """
+    try:
+        company_id = get_company_id()
+        if not company_id:
+            return error_response('User is not associated with a company', None, 403)
+        
+        start_date = None
+        if request.args.get('start_date'):
+            try:
+                start_date = datetime.strptime(request.args['start_date'], '%Y-%m-%d').date()
+            except ValueError:
+                return error_response('Invalid start_date format. Use YYYY-MM-DD', None, 400)
+        weeks = request.args.get('weeks', 12, type=int)
+        if weeks < 1 or weeks > 104:
+            return error_response('weeks must be between 1 and 104', None, 400)
+        
+        heatmap = CapacityPlanner.heatmap(company_id, start_date=start_date, weeks=weeks)
+        
+        return success_response('Capacity heatmap retrieved successfully', heatmap, 200)
+    
+    except Exception as e:
+        return error_response(f'Failed to get capacity heatmap: {str(e)}', None, 500)
+
+
+@analytics_bp.route('/estimation-accuracy', methods=['GET'])
+@jwt_required()
+@analytics_cache.cached('estimation-accuracy')
+def get_estimation_accuracy():
+    """
+    Actual/estimated hours distributions of completed tasks
+    Per user, project and priority: percentiles, bias and accuracy shares,
+    plus the most extreme outliers.
+    Query params:
+    - days: Only tasks completed in the last N days (default: all)
+    - project_id: Only this project
+    - min_samples: Smallest user/project group reported (default: 3)
+    """
+    try:
+        company_id = get_company_id()
+        if not company_id:
+            return error_response('User is not associated with a company', None, 403)
+        
+        days = request.args.get('days', type=int)
+        project_id = request.args.get('project_id', type=int)
+        min_samples = request.args.get('min_samples', 3, type=int)
+        if days is not None and days < 1:
+            return error_response('days must be positive', None, 400)
+        if min_samples < 1:
+            return error_response('min_samples must be positive', None, 400)
+        
+        result = EstimationAccuracy.analyze(company_id, days=days, project_id=project_id, min_samples=min_samples)
+        
+        return success_response('Estimation accuracy retrieved successfully', result, 200)
+    
+    except Exception as e:
+        return error_response(f'Failed to get estimation accuracy: {str(e)}', None, 500)
+
+
+@analytics_bp.route('/earned-value', methods=['GET'])
+@jwt_required()
+@analytics_cache.cached('earned-value')
+def get_earned_value():
+    """
+    Earned-value metrics (PV, EV, AC, CPI, SPI, EAC) per project and portfolio-wide
+    Projects with a budget are measured in budget currency, others in
+    estimated hours.
+    Query params:
+    - include_archived: Include archived projects (default: false)
+    - at_risk_only: Only list projects with CPI or SPI below 0.9 (default: false)
+    """
+    try:
+        company_id = get_company_id()
+        if not company_id:
+            return error_response('User is not associated with a company', None, 403)
+        
+        include_archived = request.args.get('include_archived', 'false').lower() == 'true'
+        at_risk_only = request.args.get('at_risk_only', 'false').lower() == 'true'
+        
+        result = EarnedValue.for_company(company_id, include_archived=include_archived)
+        if at_risk_only:
+            result['projects'] = [project for project in result['projects'] if project['at_risk']]
+        
+        return success_response('Earned value retrieved successfully', result, 200)
+    
+    except Exception as e:
+        return error_response(f'Failed to get earned value: {str(e)}', None, 500)
+
+
 @analytics_bp.route('/top-performers', methods=['GET'])
 @jwt_required()
+@analytics_cache.cached('top-performers')
 def get_top_performers():
     """
     Get top performing team members based on completed tasks
@@ -445,6 +530,10 @@ def get_top_performers():
     - period: Days to look back (default: 30)
     """
     try:
+        company_id = get_company_id()
+        if not company_id:
+            return error_response('User is not associated with a company', None, 403)
+        
         limit = request.args.get('limit', 5, type=int)
         period = request.args.get('period', 30, type=int)
         start_date = datetime.utcnow().date() - timedelta(days=period)
@@ -456,7 +545,8 @@ def get_top_performers():
             User.last_name,
             User.email,
             func.count(Task.id).label('completed_tasks')
-        ).join(Assignment).join(Task).filter(
+        ).join(Assignment, Assignment.user_id == User.id).join(Task).filter(
+            User.company_id == company_id,
             Task.status == TaskStatus.COMPLETED,
             Task.completed_date >= start_date
         ).group_by(User.id).order_by(func.count(Task.id).desc()).limit(limit).all()
@@ -487,12 +577,18 @@ def get_activity_feed():
     - limit: Number of activities (default: 20)
     """
     try:
+        company_id = get_company_id()
+        if not company_id:
+            return error_response('User is not associated with a company', None, 403)
+        
         limit = request.args.get('limit', 20, type=int)
         
         activities = []
         
         # Recent tasks created
-        recent_tasks = Task.query.order_by(Task.created_at.desc()).limit(limit).all()
+        recent_tasks = Task.query.filter(
+            Task.company_id == company_id
+        ).order_by(Task.created_at.desc()).limit(limit).all()
         for task in recent_tasks:
             activities.append({
                 'type': 'task_created',
@@ -502,7 +598,9 @@ def get_activity_feed():
             })
         
         # Recent comments
-        recent_comments = Comment.query.order_by(Comment.created_at.desc()).limit(limit).all()
+        recent_comments = Comment.query.filter(
+            Comment.company_id == company_id
+        ).order_by(Comment.created_at.desc()).limit(limit).all()
         for comment in recent_comments:
             activities.append({
                 'type': 'comment_added',
@@ -521,4 +619,123 @@ def get_activity_feed():
         )
     
     except Exception as e:
-        return error_response(f'Failed to get activity feed: {str(e)}', None, 500)
\ No newline at end of file
+        return error_response(f'Failed to get activity feed: {str(e)}', None, 500)
+
+
+@analytics_bp.route('/cache-stats', methods=['GET'])
+@role_required(UserRole.ADMIN)
+def get_cache_stats(current_user):
+    """Hit/miss metrics of the analytics response cache (Admin only)"""
+    try:
+        return success_response('Analytics cache stats retrieved', analytics_cache.stats(), 200)
+    
+    except Exception as e:
+        return error_response(f'Failed to get cache stats: {str(e)}', None, 500)
+
+
+@analytics_bp.route('/snapshots/rollup', methods=['POST'])
+@role_required(UserRole.ADMIN)
+def rollup_snapshots(current_user):
+    """
+    Build daily snapshots for the admin's company on demand (Admin only)
+    The nightly job runs the same rollup for every company (rollup_snapshots.py).
+    Body:
+    {
+        "date": "2024-01-31",  // Last day to snapshot (default: today)
+        "days": 30             // Days to backfill ending at date (default: 1, max 366)
+    }
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        end_date = datetime.utcnow().date()
+        if data.get('date'):
+            try:
+                end_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
+            except ValueError:
+                return error_response('Invalid date format. Use YYYY-MM-DD', None, 400)
+        
+        days = data.get('days', 1)
+        if not isinstance(days, int) or days < 1 or days > 366:
+            return error_response('days must be an integer between 1 and 366', None, 400)
+        
+        summary = SnapshotService.rollup(
+            end_date - timedelta(days=days - 1),
+            end_date,
+            company_ids=[current_user.company_id]
+        )
+        
+        return success_response('Snapshots rolled up successfully', summary, 200)
+    
+    except Exception as e:
+        db.session.rollback()
+        return error_response(f'Failed to roll up snapshots: {str(e)}', None, 500)
+
+
+@analytics_bp.route('/trends', methods=['GET'])
+@jwt_required()
+def get_trends():
+    """
+    Daily metric series read from the snapshot tables
+    Query params:
+    - scope: company, project or user (default: company)
+    - id: Project or user id (required for project/user scope)
+    - days: Number of days to return (default: 30, max 366)
+    """
+    try:
+        principal = get_current_principal()
+        if not principal or not principal.company_id:
+            return error_response('User is not associated with a company', None, 403)
+        company_id = principal.company_id
+        
+        scope = request.args.get('scope', 'company')
+        entity_id = request.args.get('id', type=int)
+        days = request.args.get('days', 30, type=int)
+        if days < 1 or days > 366:
+            return error_response('days must be between 1 and 366', None, 400)
+        
+        if scope == 'company':
+            model, filters, entity_id = CompanySnapshot, [CompanySnapshot.company_id == company_id], company_id
+        elif scope == 'project':
+            if not entity_id:
+                return error_response('id is required for project scope', None, 400)
+            if not Project.query.filter_by(id=entity_id, company_id=company_id).first():
+                return error_response('Project not found', None, 404)
+            model, filters = ProjectSnapshot, [ProjectSnapshot.project_id == entity_id]
+        elif scope == 'user':
+            entity_id = entity_id or principal.id
+            if principal.role == UserRole.EMPLOYEE and entity_id != principal.id:
+                return error_response('Insufficient permissions', None, 403)
+            if not User.query.filter_by(id=entity_id, company_id=company_id).first():
+                return error_response('User not found', None, 404)
+            model, filters = UserSnapshot, [UserSnapshot.user_id == entity_id]
+        else:
+            return error_response('scope must be one of: company, project, user', None, 400)
+        
+        end_date = datetime.utcnow().date()
+        start_date = end_date - timedelta(days=days - 1)
+        snapshots = SnapshotService.series(model, filters, start_date, end_date)
+        series = [snapshot.to_dict() for snapshot in snapshots]
+        
+        result = {
+            'scope': scope,
+            'id': entity_id,
+            'period': {
+                'start_date': start_date.isoformat(),
+                'end_date': end_date.isoformat(),
+                'days': days
+            },
+            'series': series,
+            'summary': {
+                'snapshot_days': len(series),
+                'missing_days': days - len(series),
+                'total_created': sum(row['tasks_created'] for row in series),
+                'total_completed': sum(row['tasks_completed'] for row in series),
+                'latest': series[-1] if series else None
+            }
+        }
+        
+        return success_response('Trends retrieved successfully', result, 200)
+    
+    except Exception as e:
+        return error_response(f'Failed to get trends: {str(e)}', None, 500)
\ No newline at end of file
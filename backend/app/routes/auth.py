@@ -1,11 +1,12 @@
 from flask import Blueprint, request
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.user import User, UserRole
 from app.models.company import Company
 from app.models.activity_log import ActivityLog, ActivityType
 from app.utils.responses import success_response, error_response
 from app.utils.validators import validate_required_fields, validate_email, validate_password
+from app.utils.tokens import create_user_token
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -254,7 +255,7 @@ def login():
                     )
             
             # Generate JWT token
-            access_token = create_access_token(identity=str(user.id))
+            access_token = create_user_token(user)
             
             # Log login activity
             try:
@@ -288,7 +289,7 @@ def login():
             return error_response('Account is pending approval or deactivated', None, 403)
         
         # Generate JWT token with string identity
-        access_token = create_access_token(identity=str(user.id))
+        access_token = create_user_token(user)
         
         # Log login activity
         try:
@@ -413,7 +414,12 @@ def refresh_token():
     """Refresh JWT token"""
     try:
         current_user_id = get_jwt_identity()
-        access_token = create_access_token(identity=str(current_user_id))
+        # Reload the user so the new token carries up-to-date claims
+        user = User.query.get(int(current_user_id)) if current_user_id else None
+        if not user or not user.is_active:
+            return error_response('User not found', None, 404)
+        
+        access_token = create_user_token(user)
         
         return success_response(
             'Token refreshed',
@@ -1,16 +1,107 @@
+from datetime import datetime
 from flask import Blueprint, request
 from flask_jwt_extended import jwt_required
 from app import db
 from app.models import Task, Project, Assignment, User
+from app.models.bulk_job import BulkJob, BulkJobStatus
 from app.models.user import UserRole
 from app.models.task import TaskStatus, TaskPriority
 from app.models.project import ProjectStatus
 from app.utils.decorators import role_required
 from app.utils.responses import success_response, error_response
+from app.utils.tokens import get_current_principal
+from app.utils.change_events import mark_changed
+from app.services.bulk_service import BulkTaskService, normalize_ids
+from app.services.bulk_jobs import BulkJobRunner
 
 bulk_bp = Blueprint('bulk', __name__)
 
 
+def run_bulk_job(current_user, operation, items, handler, respond):
+    """
+    Run a chunked bulk job for the current request
+    Honours the Idempotency-Key header and ?async=true; large jobs are
+    accepted with 202 and a job id. `respond(job)` builds the response
+    for jobs that finished synchronously.
+    """
+    idempotency_key = request.headers.get('Idempotency-Key')
+    if idempotency_key:
+        existing = BulkJobRunner.find_existing(current_user.id, idempotency_key)
+        if existing:
+            return replay_job(existing, operation)
+
+    run_async = True if request.args.get('async', '').lower() in ('1', 'true', 'yes') else None
+    job, created = BulkJobRunner.start(
+        current_user,
+        operation,
+        items,
+        handler,
+        idempotency_key=idempotency_key,
+        run_async=run_async
+    )
+    if not created:
+        return replay_job(job, operation)
+
+    if job.is_async:
+        return success_response('Bulk job accepted', {'job': job.to_dict()}, 202)
+
+    return respond(job)
+
+
+def replay_job(job, operation):
+    """Response for a repeated Idempotency-Key"""
+    if job.operation != operation:
+        return error_response('Idempotency-Key was already used for a different operation', None, 409)
+
+    finished = job.status not in [BulkJobStatus.PENDING, BulkJobStatus.RUNNING]
+    return success_response(
+        'Duplicate request, returning the original job',
+        {'job': job.to_dict(include_results=True)},
+        200 if finished else 202
+    )
+
+
+def job_results(job, key, invalid=()):
+    """Per-id results of a finished job, in request order"""
+    report = [{key: item['id'], 'result': item['result']} for item in job.get_results()]
+    report.extend({key: value, 'result': 'invalid'} for value in invalid)
+    return report
+
+
+def job_count(job, result):
+    return sum(1 for item in job.get_results() if item['result'] == result)
+
+
+@bulk_bp.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_bulk_job(job_id):
+    """
+    Get progress and results of a bulk job
+    Query params:
+    - include_results: true to include per-id results (default: true once finished)
+    """
+    try:
+        current_user = get_current_principal()
+        if not current_user:
+            return error_response('User not found', None, 404)
+        
+        job = BulkJob.query.filter_by(id=job_id, company_id=current_user.company_id).first()
+        if not job:
+            return error_response('Job not found', None, 404)
+        
+        # Owner or company admin
+        if job.user_id != current_user.id and current_user.role != UserRole.ADMIN:
+            return error_response('Job not found', None, 404)
+        
+        finished = job.status not in [BulkJobStatus.PENDING, BulkJobStatus.RUNNING]
+        include_results = request.args.get('include_results', str(finished)).lower() in ('1', 'true', 'yes')
+        
+        return success_response('Bulk job retrieved', {'job': job.to_dict(include_results=include_results)}, 200)
+    
+    except Exception as e:
+        return error_response(f'Failed to get bulk job: {str(e)}', None, 500)
+
+
 @bulk_bp.route('/tasks/update-status', methods=['PUT'])
 @role_required(UserRole.ADMIN, UserRole.TEAM_LEADER)
 def bulk_update_task_status(current_user):
@@ -38,27 +129,28 @@ def bulk_update_task_status(current_user):
         except KeyError:
             return error_response('Invalid status', None, 400)
         
-        # Get tasks
-        tasks = Task.query.filter(Task.id.in_(task_ids)).all()
-        
-        if not tasks:
-            return error_response('No tasks found', None, 404)
-        
-        # Check permissions for each task
-        updated_count = 0
-        for task in tasks:
-            project = Project.query.get(task.project_id)
-            if current_user.role == UserRole.ADMIN or project.manager_id == current_user.id:
-                task.status = new_status
-                updated_count += 1
+        task_ids, invalid = normalize_ids(task_ids)
         
-        db.session.commit()
+        # One permission query, then one UPDATE and one log insert per chunk
+        def handler(chunk, details):
+            return BulkTaskService.update_status(current_user, chunk, new_status)[1]
+
+        def respond(job):
+            updated_count = job_count(job, 'updated')
+            if job.total_items and job_count(job, 'not_found') == job.total_items:
+                return error_response('No tasks found', None, 404)
+            return success_response(
+                f'Successfully updated {updated_count} tasks',
+                {
+                    'updated': updated_count,
+                    'total': len(data['task_ids']),
+                    'results': job_results(job, 'task_id', invalid),
+                    'job_id': job.id
+                },
+                200
+            )
         
-        return success_response(
-            f'Successfully updated {updated_count} tasks',
-            {'updated': updated_count, 'total': len(task_ids)},
-            200
-        )
+        return run_bulk_job(current_user, 'tasks.update_status', task_ids, handler, respond)
     
     except Exception as e:
         db.session.rollback()
@@ -83,6 +175,8 @@ def bulk_update_task_priority(current_user):
             return error_response('task_ids and priority are required', None, 400)
         
         task_ids = data['task_ids']
+        if not isinstance(task_ids, list):
+            return error_response('task_ids must be a list', None, 400)
         
         # Validate priority
         try:
@@ -90,23 +184,24 @@ def bulk_update_task_priority(current_user):
         except KeyError:
             return error_response('Invalid priority', None, 400)
         
-        # Get and update tasks
-        tasks = Task.query.filter(Task.id.in_(task_ids)).all()
-        
-        updated_count = 0
-        for task in tasks:
-            project = Project.query.get(task.project_id)
-            if current_user.role == UserRole.ADMIN or project.manager_id == current_user.id:
-                task.priority = new_priority
-                updated_count += 1
-        
-        db.session.commit()
+        task_ids, invalid = normalize_ids(task_ids)
+
+        def handler(chunk, details):
+            return BulkTaskService.update_tasks(current_user, chunk, {Task.priority: new_priority})[1]
+
+        def respond(job):
+            updated_count = job_count(job, 'updated')
+            return success_response(
+                f'Successfully updated {updated_count} tasks',
+                {
+                    'updated': updated_count,
+                    'results': job_results(job, 'task_id', invalid),
+                    'job_id': job.id
+                },
+                200
+            )
         
-        return success_response(
-            f'Successfully updated {updated_count} tasks',
-            {'updated': updated_count},
-            200
-        )
+        return run_bulk_job(current_user, 'tasks.update_priority', task_ids, handler, respond)
     
     except Exception as e:
         db.session.rollback()
@@ -117,76 +212,94 @@ def bulk_update_task_priority(current_user):
 @role_required(UserRole.ADMIN, UserRole.TEAM_LEADER)
 def bulk_assign_tasks(current_user):
     """
-    Assign multiple tasks to a user
+    Assign multiple tasks to one or more users
     Body:
     {
         "task_ids": [1, 2, 3],
-        "user_id": 5,
-        "assigned_hours_per_task": 8
+        "user_id": 5,              // or "user_ids": [5, 6]
+        "assigned_hours_per_task": 8,
+        "notes": "Optional notes"
     }
     """
     try:
         data = request.get_json()
         
-        if not data or 'task_ids' not in data or 'user_id' not in data:
-            return error_response('task_ids and user_id are required', None, 400)
-        
-        task_ids = data['task_ids']
-        user_id = data['user_id']
-        hours_per_task = data.get('assigned_hours_per_task', 8)
+        if not data or 'task_ids' not in data or ('user_id' not in data and 'user_ids' not in data):
+            return error_response('task_ids and user_id (or user_ids) are required', None, 400)
         
-        # Validate user
-        user = User.query.get(user_id)
-        if not user:
-            return error_response('User not found', None, 404)
+        if not isinstance(data['task_ids'], list):
+            return error_response('task_ids must be a list', None, 400)
         
-        # Check user workload
-        current_workload = Assignment.get_user_workload(user_id)
-        total_new_hours = len(task_ids) * hours_per_task
+        single_user = 'user_ids' not in data
+        user_ids = [data['user_id']] if single_user else data['user_ids']
+        if not isinstance(user_ids, list) or not user_ids:
+            return error_response('user_ids must be a non-empty list', None, 400)
         
-        if current_workload + total_new_hours > user.weekly_capacity:
-            return error_response(
-                'User will be overloaded',
+        hours_per_task = data.get('assigned_hours_per_task', 8)
+        notes = data.get('notes')
+        task_ids, invalid_tasks = normalize_ids(data['task_ids'])
+        user_ids, invalid_users = normalize_ids(user_ids)
+        
+        # Keep the single-user contract: unknown or overloaded user rejects the request up front
+        if single_user:
+            user = User.query.filter_by(id=user_ids[0], company_id=current_user.company_id).first() if user_ids else None
+            if not user:
+                return error_response('User not found', None, 404)
+            
+            # Only tasks that are valid and not yet assigned to the user add hours
+            new_pairs = BulkTaskService.plan_assignments(current_user, task_ids, [user.id])[3]
+            current_workload = BulkTaskService.current_workloads([user.id]).get(user.id, 0)
+            total_new_hours = len(new_pairs[user.id]) * hours_per_task
+            if new_pairs[user.id] and current_workload + total_new_hours > user.weekly_capacity:
+                return error_response(
+                    'User will be overloaded',
+                    {
+                        'current_workload': current_workload,
+                        'new_hours': total_new_hours,
+                        'capacity': user.weekly_capacity
+                    },
+                    400
+                )
+        
+        # Per-user outcome across chunks; overloaded wins over assigned over unchanged
+        precedence = {'not_found': 4, 'inactive': 3, 'overloaded': 2, 'assigned': 1, 'unchanged': 0}
+
+        def handler(chunk, details):
+            result = BulkTaskService.assign(current_user, chunk, user_ids, hours_per_task, notes=notes)
+            users = details.setdefault('users', {})
+            for user_id, outcome in result['user_results'].items():
+                key = str(user_id)
+                if precedence[outcome] >= precedence.get(users.get(key), -1):
+                    users[key] = outcome
+            overloaded = details.setdefault('overloaded', {})
+            for user_id, info in result['overloaded'].items():
+                overloaded[str(user_id)] = info
+            details['skipped'] = details.get('skipped', 0) + result['skipped']
+            details['assigned'] = details.get('assigned', 0) + result['assigned']
+            return result['task_results']
+
+        def respond(job):
+            details = job.get_details()
+            assigned_count = details.get('assigned', 0)
+            users = details.get('users', {})
+            return success_response(
+                f'Successfully assigned {assigned_count} tasks',
                 {
-                    'current_workload': current_workload,
-                    'new_hours': total_new_hours,
-                    'capacity': user.weekly_capacity
+                    'assigned': assigned_count,
+                    'skipped': details.get('skipped', 0),
+                    'overloaded': [
+                        dict(user_id=int(user_id), **info) for user_id, info in details.get('overloaded', {}).items()
+                    ],
+                    'results': job_results(job, 'task_id', invalid_tasks),
+                    'users': [
+                        {'user_id': user_id, 'result': users.get(str(user_id), 'unchanged')} for user_id in user_ids
+                    ] + [{'user_id': value, 'result': 'invalid'} for value in invalid_users],
+                    'job_id': job.id
                 },
-                400
-            )
-        
-        # Assign tasks
-        assigned_count = 0
-        skipped = []
-        
-        for task_id in task_ids:
-            # Check if already assigned
-            existing = Assignment.query.filter_by(
-                task_id=task_id,
-                user_id=user_id
-            ).first()
-            
-            if existing:
-                skipped.append(task_id)
-                continue
-            
-            assignment = Assignment(
-                task_id=task_id,
-                user_id=user_id,
-                assigned_by=current_user.id,
-                assigned_hours=hours_per_task,
-                status='pending'
+                200
             )
-            db.session.add(assignment)
-            assigned_count += 1
         
-        db.session.commit()
-        
-        return success_response(
-            f'Successfully assigned {assigned_count} tasks',
-            {'assigned': assigned_count, 'skipped': len(skipped)},
-            200
-        )
+        return run_bulk_job(current_user, 'tasks.assign', task_ids, handler, respond)
     
     except Exception as e:
         db.session.rollback()
@@ -200,8 +313,11 @@ def bulk_delete_tasks(current_user):
     Delete multiple tasks (Admin only)
     Body:
     {
-        "task_ids": [1, 2, 3]
+        "task_ids": [1, 2, 3],
+        "cascade": false    // true also deletes every task that depends on them
     }
+    Comments, assignments, notifications and activity rows of the deleted
+    tasks are removed with them.
     """
     try:
         data = request.get_json()
@@ -209,26 +325,43 @@ def bulk_delete_tasks(current_user):
         if not data or 'task_ids' not in data:
             return error_response('task_ids is required', None, 400)
         
-        task_ids = data['task_ids']
+        task_ids, invalid = normalize_ids(data['task_ids'])
+        cascade = bool(data.get('cascade', False))
+        
+        # One recursive CTE resolves the dependents; rows are deleted children first
+        ordered_ids, plan_results, cascaded = BulkTaskService.plan_delete(current_user, task_ids, cascade)
         
-        # Check for dependent tasks
-        dependent_count = Task.query.filter(Task.depends_on.in_(task_ids)).count()
-        if dependent_count > 0:
+        if not ordered_ids and any(r == 'has_dependents' for r in plan_results.values()):
+            blocked = sum(1 for r in plan_results.values() if r == 'has_dependents')
             return error_response(
-                f'Cannot delete tasks with {dependent_count} dependent tasks',
-                None,
+                f'Cannot delete {blocked} tasks with dependent tasks. Use cascade to delete them too.',
+                {'results': BulkTaskService.format_results(task_ids, plan_results, invalid)},
                 400
             )
         
-        # Delete tasks
-        deleted_count = Task.query.filter(Task.id.in_(task_ids)).delete(synchronize_session=False)
-        db.session.commit()
+        def handler(chunk, details):
+            BulkTaskService.delete_tasks(chunk)
+            return {task_id: 'deleted' for task_id in chunk}
+        
+        def respond(job):
+            deleted = {item['id']: item['result'] for item in job.get_results()}
+            results = dict(plan_results)
+            for task_id in task_ids:
+                if task_id in deleted:
+                    results[task_id] = deleted[task_id]
+            deleted_count = sum(1 for r in deleted.values() if r == 'deleted')
+            return success_response(
+                f'Successfully deleted {deleted_count} tasks',
+                {
+                    'deleted': deleted_count,
+                    'cascaded': cascaded,
+                    'results': BulkTaskService.format_results(task_ids, results, invalid),
+                    'job_id': job.id
+                },
+                200
+            )
         
-        return success_response(
-            f'Successfully deleted {deleted_count} tasks',
-            {'deleted': deleted_count},
-            200
-        )
+        return run_bulk_job(current_user, 'tasks.delete', ordered_ids, handler, respond)
     
     except Exception as e:
         db.session.rollback()
@@ -252,7 +385,7 @@ def bulk_update_project_status(current_user):
         if not data or 'project_ids' not in data or 'status' not in data:
             return error_response('project_ids and status are required', None, 400)
         
-        project_ids = data['project_ids']
+        project_ids, invalid = normalize_ids(data['project_ids'])
         
         # Validate status
         try:
@@ -260,28 +393,73 @@ def bulk_update_project_status(current_user):
         except KeyError:
             return error_response('Invalid status', None, 400)
         
-        # Get and update projects
-        projects = Project.query.filter(Project.id.in_(project_ids)).all()
-        
-        updated_count = 0
-        for project in projects:
-            if current_user.role == UserRole.ADMIN or project.manager_id == current_user.id:
-                project.status = new_status
-                updated_count += 1
-        
-        db.session.commit()
+        values = {Project.status: new_status}
+        if new_status == ProjectStatus.COMPLETED:
+            values[Project.actual_end_date] = db.func.coalesce(Project.actual_end_date, datetime.utcnow().date())
+
+        def handler(chunk, details):
+            managers = dict(
+                db.session.query(Project.id, Project.manager_id).filter(
+                    Project.id.in_(chunk),
+                    Project.company_id == current_user.company_id
+                ).all()
+            )
+            results = {}
+            allowed = []
+            for project_id in chunk:
+                if project_id not in managers:
+                    results[project_id] = 'not_found'
+                elif current_user.role == UserRole.ADMIN or managers[project_id] == current_user.id:
+                    allowed.append(project_id)
+                    results[project_id] = 'updated'
+                else:
+                    results[project_id] = 'forbidden'
+            if allowed:
+                Project.query.filter(Project.id.in_(allowed)).update(values, synchronize_session=False)
+                # Set-based update skips ORM events; report it for cache and KPI invalidation
+                mark_changed(projects=allowed, companies=[current_user.company_id])
+            return results
+
+        def respond(job):
+            updated_count = job_count(job, 'updated')
+            return success_response(
+                f'Successfully updated {updated_count} projects',
+                {
+                    'updated': updated_count,
+                    'results': job_results(job, 'project_id', invalid),
+                    'job_id': job.id
+                },
+                200
+            )
         
-        return success_response(
-            f'Successfully updated {updated_count} projects',
-            {'updated': updated_count},
-            200
-        )
+        return run_bulk_job(current_user, 'projects.update_status', project_ids, handler, respond)
     
     except Exception as e:
         db.session.rollback()
         return error_response(f'Failed to update projects: {str(e)}', None, 500)
 
 
+def set_users_active(current_user, user_ids, is_active):
+    """Chunk handler toggling is_active for company users"""
+    found = [
+        user_id for (user_id,) in db.session.query(User.id).filter(
+            User.id.in_(user_ids),
+            User.company_id == current_user.company_id
+        ).all()
+    ]
+    if found:
+        # Bulk update skips ORM events, so bump token versions here too
+        User.query.filter(User.id.in_(found)).update(
+            {'is_active': is_active, 'token_version': User.token_version + 1},
+            synchronize_session=False
+        )
+        # Cached versions are dropped once this commits
+        mark_changed(companies=[current_user.company_id], users=found)
+    outcome = 'activated' if is_active else 'deactivated'
+    found = set(found)
+    return {user_id: outcome if user_id in found else 'not_found' for user_id in user_ids}
+
+
 @bulk_bp.route('/users/activate', methods=['PUT'])
 @role_required(UserRole.ADMIN)
 def bulk_activate_users(current_user):
@@ -298,21 +476,24 @@ def bulk_activate_users(current_user):
         if not data or 'user_ids' not in data:
             return error_response('user_ids is required', None, 400)
         
-        user_ids = data['user_ids']
-        
-        # Update users
-        updated_count = User.query.filter(User.id.in_(user_ids)).update(
-            {'is_active': True},
-            synchronize_session=False
-        )
-        
-        db.session.commit()
+        user_ids, invalid = normalize_ids(data['user_ids'])
+
+        def handler(chunk, details):
+            return set_users_active(current_user, chunk, True)
+
+        def respond(job):
+            activated_count = job_count(job, 'activated')
+            return success_response(
+                f'Successfully activated {activated_count} users',
+                {
+                    'activated': activated_count,
+                    'results': job_results(job, 'user_id', invalid),
+                    'job_id': job.id
+                },
+                200
+            )
         
-        return success_response(
-            f'Successfully activated {updated_count} users',
-            {'activated': updated_count},
-            200
-        )
+        return run_bulk_job(current_user, 'users.activate', user_ids, handler, respond)
     
     except Exception as e:
         db.session.rollback()
@@ -335,26 +516,29 @@ def bulk_deactivate_users(current_user):
         if not data or 'user_ids' not in data:
             return error_response('user_ids is required', None, 400)
         
-        user_ids = data['user_ids']
+        user_ids, invalid = normalize_ids(data['user_ids'])
         
         # Prevent deactivating yourself
         if current_user.id in user_ids:
             return error_response('You cannot deactivate your own account', None, 400)
+
+        def handler(chunk, details):
+            return set_users_active(current_user, chunk, False)
+
+        def respond(job):
+            deactivated_count = job_count(job, 'deactivated')
+            return success_response(
+                f'Successfully deactivated {deactivated_count} users',
+                {
+                    'deactivated': deactivated_count,
+                    'results': job_results(job, 'user_id', invalid),
+                    'job_id': job.id
+                },
+                200
+            )
         
-        # Update users
-        updated_count = User.query.filter(User.id.in_(user_ids)).update(
-            {'is_active': False},
-            synchronize_session=False
-        )
-        
-        db.session.commit()
-        
-        return success_response(
-            f'Successfully deactivated {updated_count} users',
-            {'deactivated': updated_count},
-            200
-        )
+        return run_bulk_job(current_user, 'users.deactivate', user_ids, handler, respond)
     
     except Exception as e:
         db.session.rollback()
-        return error_response(f'Failed to deactivate users: {str(e)}', None, 500)
\ No newline at end of file
+        return error_response(f'Failed to deactivate users: {str(e)}', None, 500)
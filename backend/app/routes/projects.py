@@ -1,27 +1,26 @@
 from flask import Blueprint, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from datetime import datetime
 from app import db
 from app.models import Project, User, Task
 from app.models.user import UserRole
 from app.models.project import ProjectStatus, ProjectPriority
 from app.utils.decorators import role_required
+from app.utils.tokens import get_current_principal
+from app.services.project_stats import ProjectStatsService, completion_from_counts
+from app.services.dependency_graph import DependencyGraph, DependencyCycleError
+from app.services.flow_metrics import FlowMetrics
+from app.services.burndown_service import BurndownService, UNITS
+from app.services.schedule_simulation import ScheduleSimulation, DEFAULT_ITERATIONS, MAX_ITERATIONS
 from app.utils.responses import success_response, error_response, pagination_response
 from app.utils.validators import validate_required_fields
 
 projects_bp = Blueprint('projects', __name__)
 
 def get_current_user_obj():
-    """Get current user object from JWT token"""
+    """Get current user (id, role, company_id) from JWT claims"""
     try:
-        uid = get_jwt_identity()
-        if not uid:
-            return None
-        # Convert to int since JWT identity is stored as string but user ID is integer
-        try:
-            return User.query.get(int(uid))
-        except (ValueError, TypeError):
-            return None
+        return get_current_principal()
     except Exception:
         return None
 
@@ -370,51 +369,8 @@ def get_project_stats(project_id):
         if not project:
             return error_response('Project not found', None, 404)
         
-        # ... stats calculation same as before ...
-        total_tasks = project.tasks.count()
-        completed_tasks = project.tasks.filter_by(status='completed').count()
-        in_progress_tasks = project.tasks.filter_by(status='in_progress').count()
-        todo_tasks = project.tasks.filter_by(status='todo').count()
-        blocked_tasks = project.tasks.filter_by(status='blocked').count()
-        
-        total_estimated_hours = db.session.query(
-            db.func.sum(Task.estimated_hours)
-        ).filter(Task.project_id == project_id).scalar() or 0
-        
-        total_actual_hours = db.session.query(
-            db.func.sum(Task.actual_hours)
-        ).filter(Task.project_id == project_id).scalar() or 0
-        
-        from app.models import Assignment
-        team_members = db.session.query(User).join(Assignment).join(Task).filter(
-            Task.project_id == project_id
-        ).distinct().all()
-        
-        stats = {
-            'project': project.to_dict(),
-            'tasks': {
-                'total': total_tasks,
-                'completed': completed_tasks,
-                'in_progress': in_progress_tasks,
-                'todo': todo_tasks,
-                'blocked': blocked_tasks,
-                'completion_percentage': project.completion_percentage
-            },
-            'hours': {
-                'estimated': total_estimated_hours,
-                'actual': total_actual_hours,
-                'remaining': max(0, total_estimated_hours - total_actual_hours),
-                'variance': total_actual_hours - total_estimated_hours
-            },
-            'team': {
-                'size': len(team_members),
-                'members': [member.to_dict() for member in team_members]
-            },
-            'timeline': {
-                'is_overdue': project.is_overdue,
-                'days_remaining': project.days_remaining
-            }
-        }
+        # One conditional-aggregate query cached per project, plus a fresh roster query
+        stats = ProjectStatsService.get_stats(project)
         
         return success_response('Project stats retrieved successfully', stats, 200)
     
@@ -422,6 +378,128 @@ def get_project_stats(project_id):
         return error_response(f'Failed to get project stats: {str(e)}', None, 500)
 
 
+@projects_bp.route('/<int:project_id>/critical-path', methods=['GET'])
+@jwt_required()
+def get_critical_path(project_id):
+    """
+    Dependency schedule of a project for Gantt views
+    Earliest/latest start and finish are hour offsets from the project start,
+    computed over remaining estimated hours along Task.depends_on.
+    Query params:
+    - critical_only: Only return zero-slack tasks (default: false)
+    """
+    try:
+        current_user = get_current_user_obj()
+        project = Project.query.filter_by(id=project_id, company_id=current_user.company_id).first()
+        
+        if not project:
+            return error_response('Project not found', None, 404)
+        
+        critical_only = request.args.get('critical_only', 'false').lower() == 'true'
+        
+        # One edge query per project, cached until one of its tasks changes
+        graph = DependencyGraph.for_project(project.id)
+        try:
+            result = graph.to_dict(critical_only=critical_only)
+        except DependencyCycleError as e:
+            return error_response('Task dependencies contain a cycle', {'cycle': e.cycle}, 409)
+        
+        return success_response('Critical path retrieved successfully', result, 200)
+    
+    except Exception as e:
+        return error_response(f'Failed to get critical path: {str(e)}', None, 500)
+
+
+@projects_bp.route('/<int:project_id>/flow-metrics', methods=['GET'])
+@jwt_required()
+def get_flow_metrics(project_id):
+    """
+    Lead/cycle time percentiles, time in status and cumulative flow of a project
+    Built from the task status change log.
+    Query params:
+    - days: Length of the cumulative flow series (default: 30, max 365)
+    """
+    try:
+        current_user = get_current_user_obj()
+        project = Project.query.filter_by(id=project_id, company_id=current_user.company_id).first()
+        
+        if not project:
+            return error_response('Project not found', None, 404)
+        
+        days = request.args.get('days', 30, type=int)
+        if days < 1 or days > 365:
+            return error_response('days must be between 1 and 365', None, 400)
+        
+        result = FlowMetrics.for_project(project.id, days=days)
+        result['project_id'] = project.id
+        
+        return success_response('Flow metrics retrieved successfully', result, 200)
+    
+    except Exception as e:
+        return error_response(f'Failed to get flow metrics: {str(e)}', None, 500)
+
+
+@projects_bp.route('/<int:project_id>/burndown', methods=['GET'])
+@jwt_required()
+def get_burndown(project_id):
+    """
+    Burndown and burnup series of a project, one point per day
+    Read from daily remaining-work snapshots kept up to date on task writes;
+    the ideal line runs from start_date to end_date.
+    Query params:
+    - unit: hours (estimated hours, default) or tasks
+    """
+    try:
+        current_user = get_current_user_obj()
+        project = Project.query.filter_by(id=project_id, company_id=current_user.company_id).first()
+        
+        if not project:
+            return error_response('Project not found', None, 404)
+        
+        unit = request.args.get('unit', 'hours').lower()
+        if unit not in UNITS:
+            return error_response('unit must be hours or tasks', None, 400)
+        
+        result = BurndownService.chart(project, unit=unit)
+        
+        return success_response('Burndown retrieved successfully', result, 200)
+    
+    except Exception as e:
+        return error_response(f'Failed to get burndown: {str(e)}', None, 500)
+
+
+@projects_bp.route('/<int:project_id>/schedule-risk', methods=['GET'])
+@jwt_required()
+def get_schedule_risk(project_id):
+    """
+    Monte Carlo completion forecast with P50/P80/P95 dates
+    Open task durations are sampled from the company's historical
+    actual/estimated ratios and propagated along Task.depends_on.
+    Query params:
+    - iterations: Number of simulated runs (default: 5000, max 100000)
+    """
+    try:
+        current_user = get_current_user_obj()
+        project = Project.query.filter_by(id=project_id, company_id=current_user.company_id).first()
+        
+        if not project:
+            return error_response('Project not found', None, 404)
+        
+        iterations = request.args.get('iterations', DEFAULT_ITERATIONS, type=int)
+        if iterations < 100 or iterations > MAX_ITERATIONS:
+            return error_response(f'iterations must be between 100 and {MAX_ITERATIONS}', None, 400)
+        
+        try:
+            result = ScheduleSimulation.forecast(project, iterations=iterations)
+        except DependencyCycleError as e:
+            return error_response('Task dependencies contain a cycle', {'cycle': e.cycle}, 409)
+        
+        return success_response('Schedule risk retrieved successfully', result, 200)
+    
+    except Exception as e:
+        return error_response(f'Failed to get schedule risk: {str(e)}', None, 500)
+
+
 @projects_bp.route('/dashboard', methods=['GET'])
 @jwt_required()
 def get_dashboard():
@@ -429,35 +507,50 @@ def get_dashboard():
     try:
         current_user = get_current_user_obj()
         
-        # Get projects based on role AND Company
-        if current_user.role == UserRole.ADMIN:
-            projects = Project.query.filter_by(company_id=current_user.company_id).all()
-        elif current_user.role == UserRole.TEAM_LEADER:
-            projects = Project.query.filter_by(manager_id=current_user.id, company_id=current_user.company_id).all()
-        else:
-            # For employees, only projects they have tasks in (AND same company, implicitly handled by Assignment/Task links basically, but explicit is safer)
+        # Scope projects based on role AND Company, without loading them
+        scope = Project.query.filter(Project.company_id == current_user.company_id)
+        if current_user.role == UserRole.TEAM_LEADER:
+            scope = scope.filter(Project.manager_id == current_user.id)
+        elif current_user.role != UserRole.ADMIN:
+            # For employees, only projects they have tasks in
             from app.models import Assignment
-            project_ids = db.session.query(Task.project_id).join(Assignment).filter(
+            assigned_projects = db.session.query(Task.project_id).join(Assignment).filter(
                 Assignment.user_id == current_user.id
-            ).distinct().all()
-            project_ids = [pid[0] for pid in project_ids]
-            projects = Project.query.filter(Project.id.in_(project_ids), Project.company_id == current_user.company_id).all()
-        
-        # Calculate statistics
-        total_projects = len(projects)
-        active_projects = len([p for p in projects if p.status == ProjectStatus.IN_PROGRESS])
-        completed_projects = len([p for p in projects if p.status == ProjectStatus.COMPLETED])
-        overdue_projects = len([p for p in projects if p.is_overdue])
+            )
+            scope = scope.filter(Project.id.in_(assigned_projects))
+        
+        # Calculate statistics in SQL
+        today = datetime.utcnow().date()
+        total_projects, active_projects, completed_projects, overdue_projects = scope.with_entities(
+            db.func.count(Project.id),
+            db.func.sum(db.case((Project.status == ProjectStatus.IN_PROGRESS, 1), else_=0)),
+            db.func.sum(db.case((Project.status == ProjectStatus.COMPLETED, 1), else_=0)),
+            db.func.sum(db.case((
+                db.and_(
+                    Project.end_date < today,
+                    Project.status.notin_([ProjectStatus.COMPLETED, ProjectStatus.ARCHIVED])
+                ), 1), else_=0))
+        ).one()
+        
+        # Top 5 recent, with task counters preloaded in one query
+        recent_projects = scope.order_by(Project.created_at.desc(), Project.id.desc()).limit(5).all()
+        histograms = ProjectStatsService.task_histograms([p.id for p in recent_projects])
         
         dashboard_data = {
             'summary': {
-                'total_projects': total_projects,
-                'active_projects': active_projects,
-                'completed_projects': completed_projects,
-                'overdue_projects': overdue_projects
+                'total_projects': total_projects or 0,
+                'active_projects': active_projects or 0,
+                'completed_projects': completed_projects or 0,
+                'overdue_projects': overdue_projects or 0
             },
-            'projects': [project.to_dict() for project in projects[:5]],  # Top 5 recent
-            'user': current_user.to_dict()
+            'projects': [
+                project.to_dict(completion_percentage=completion_from_counts(
+                    histograms[project.id]['total'],
+                    histograms[project.id]['by_status']['completed']
+                ))
+                for project in recent_projects
+            ],
+            'user': User.query.get(current_user.id).to_dict()
         }
         
         return success_response('Dashboard data retrieved successfully', dashboard_data, 200)
@@ -9,6 +9,7 @@ from app.models import Project, Task, User, Assignment
 from app.models.user import UserRole
 from app.utils.decorators import role_required
 from app.utils.responses import success_response, error_response
+from app.utils.tokens import get_current_principal
 
 reports_bp = Blueprint('reports', __name__)
 
@@ -128,6 +129,10 @@ def export_tasks():
     - format: csv or json (default: csv)
     """
     try:
+        principal = get_current_principal()
+        if not principal or not principal.company_id:
+            return error_response('User is not associated with a company', None, 403)
+        
         # Get query parameters
         project_id = request.args.get('project_id', type=int)
         status_filter = request.args.get('status')
@@ -291,6 +296,10 @@ def export_project_summary(project_id):
     Generate detailed project summary report
     """
     try:
+        principal = get_current_principal()
+        if not principal or not principal.company_id:
+            return error_response('User is not associated with a company', None, 403)
+        
         project = Project.query.get(project_id)
         
         if not project:
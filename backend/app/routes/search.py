@@ -3,6 +3,7 @@ from flask_jwt_extended import jwt_required
 from app import db
 from app.models import Project, Task, User, Comment
 from app.utils.responses import success_response, error_response
+from app.utils.tokens import get_current_principal
 
 search_bp = Blueprint('search', __name__)
 
@@ -18,6 +19,10 @@ def global_search():
     - limit: Results per type (default: 10)
     """
     try:
+        principal = get_current_principal()
+        if not principal or not principal.company_id:
+            return error_response('User is not associated with a company', None, 403)
+        
         query = request.args.get('q', '').strip()
         
         if not query or len(query) < 2:
@@ -92,6 +97,10 @@ def search_suggestions():
     - type: projects, tasks, or users
     """
     try:
+        principal = get_current_principal()
+        if not principal or not principal.company_id:
+            return error_response('User is not associated with a company', None, 403)
+        
         query = request.args.get('q', '').strip()
         search_type = request.args.get('type', 'projects')
         
@@ -1,4 +1,6 @@
-from flask import Blueprint, request
+import csv
+import io
+from flask import Blueprint, current_app, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 from app import db
@@ -6,11 +8,16 @@ from app.models import Task, Project, User, Assignment, Comment
 from app.models.user import UserRole
 from app.models.task import TaskStatus, TaskPriority
 from app.models.assignment import AssignmentStatus
+from app.models.task_status_change import TaskStatusChange
 from app.utils.decorators import role_required
 from app.utils.responses import success_response, error_response, pagination_response
 from app.utils.validators import validate_required_fields
 from app.utils.notifications import create_notification
 from app.models.notification import NotificationType, Notification
+from app.services.dependency_graph import DependencyGraph
+from app.services.task_import import TaskImporter, IMPORT_FIELDS
+from app.services.assignee_recommender import AssigneeRecommender
+from app.utils.tokens import get_current_principal
 
 tasks_bp = Blueprint('tasks', __name__)
 
@@ -130,6 +137,145 @@ def get_task(task_id):
         return error_response(f'Failed to get task: {str(e)}', None, 500)
 
 
+def build_task_tree(rows, direction='descendants', rollup=True):
+    """
+    Nest (task, depth) rows from Task.get_tree in memory
+    For descendants each node carries a rollup of its whole subtree.
+    """
+    nodes = {}
+    order = []
+    for task, depth in rows:
+        if task.id in nodes:
+            # Only reachable through cyclic depends_on data
+            continue
+        nodes[task.id] = {
+            'id': task.id,
+            'task_number': task.task_number,
+            'title': task.title,
+            'status': task.status.value,
+            'priority': task.priority.value,
+            'due_date': task.due_date.isoformat() if task.due_date else None,
+            'estimated_hours': task.estimated_hours,
+            'actual_hours': task.actual_hours,
+            'depends_on': task.depends_on,
+            'depth': depth,
+            'children': []
+        }
+        order.append(task.id)
+    
+    if not order:
+        return None, 0, 0
+    depth = max(node['depth'] for node in nodes.values())
+    
+    if direction == 'ancestors':
+        # The topmost ancestor becomes the root, the requested task the leaf
+        for lower, upper in zip(order, order[1:]):
+            nodes[upper]['children'].append(nodes[lower])
+        return nodes[order[-1]], len(order), depth
+    
+    for task_id in order[1:]:
+        nodes[nodes[task_id]['depends_on']]['children'].append(nodes[task_id])
+    
+    if rollup:
+        # Deepest nodes first, so children are summed before their parents
+        for task_id in reversed(order):
+            node = nodes[task_id]
+            totals = {
+                'tasks': 1,
+                'completed': 1 if node['status'] == TaskStatus.COMPLETED.value else 0,
+                'estimated_hours': node['estimated_hours'] or 0,
+                'actual_hours': node['actual_hours'] or 0
+            }
+            for child in node['children']:
+                for key in totals:
+                    totals[key] += child['rollup'][key]
+            totals['completion_percentage'] = round(totals['completed'] / totals['tasks'] * 100, 2)
+            node['rollup'] = totals
+    
+    return nodes[order[0]], len(order), depth
+
+
+@tasks_bp.route('/<int:task_id>/suggest-assignees', methods=['GET'])
+@role_required(UserRole.ADMIN, UserRole.TEAM_LEADER)
+def suggest_assignees(task_id, current_user):
+    """
+    Recommend users for a task
+    Ranks the company's active users by free capacity in the task's date
+    window, skill match and current number of active tasks.
+    Query params:
+    - limit: Number of suggestions (default: 5, max 50)
+    - skills: Comma separated required skills (default: matched against the task text)
+    """
+    try:
+        task = Task.query.filter(
+            Task.id == task_id,
+            Task.company_id == current_user.company_id
+        ).first()
+        if not task:
+            return error_response('Task not found', None, 404)
+        
+        limit = request.args.get('limit', 5, type=int)
+        if limit < 1 or limit > 50:
+            return error_response('limit must be between 1 and 50', None, 400)
+        skills = [skill.strip().lower() for skill in request.args.get('skills', '').split(',') if skill.strip()]
+        
+        result = AssigneeRecommender.suggest(task, current_user.company_id, limit=limit, required_skills=skills)
+        result['task_id'] = task.id
+        
+        return success_response('Assignee suggestions retrieved successfully', result, 200)
+    
+    except Exception as e:
+        return error_response(f'Failed to suggest assignees: {str(e)}', None, 500)
+
+
+@tasks_bp.route('/<int:task_id>/tree', methods=['GET'])
+@jwt_required()
+def get_task_tree(task_id):
+    """
+    Get a task's subtask tree (or its chain of parent tasks) in one query
+    Query params:
+    - direction: descendants (default) or ancestors
+    - max_depth: Levels to walk (default: unlimited)
+    - rollup: Sum hours and completion along the tree (default: true)
+    """
+    try:
+        principal = get_current_principal()
+        if not principal:
+            return error_response('Invalid token', None, 401)
+        
+        task = Task.query.filter(
+            Task.id == task_id,
+            Task.company_id == principal.company_id
+        ).first()
+        if not task:
+            return error_response('Task not found', None, 404)
+        
+        direction = request.args.get('direction', 'descendants')
+        if direction not in ('descendants', 'ancestors'):
+            return error_response('direction must be descendants or ancestors', None, 400)
+        max_depth = request.args.get('max_depth', type=int)
+        if max_depth is not None and max_depth < 0:
+            return error_response('max_depth cannot be negative', None, 400)
+        rollup = request.args.get('rollup', 'true').lower() == 'true'
+        
+        rows = Task.get_tree(task.id, direction=direction, max_depth=max_depth)
+        tree, total, depth = build_task_tree(rows, direction=direction, rollup=rollup)
+        
+        return success_response(
+            'Task tree retrieved successfully',
+            {
+                'tree': tree,
+                'direction': direction,
+                'total_nodes': total,
+                'depth': depth
+            },
+            200
+        )
+    
+    except Exception as e:
+        return error_response(f'Failed to get task tree: {str(e)}', None, 500)
+
+
 @tasks_bp.route('/', methods=['POST'])
 @role_required(UserRole.ADMIN, UserRole.TEAM_LEADER)
 def create_task(current_user):
@@ -243,6 +389,94 @@ def create_task(current_user):
         return error_response(f'Failed to create task: {str(e)}', None, 500)
 
 
+def finish_import(importer, atomic):
+    """Insert the validated rows, commit and build the per-row response"""
+    report = importer.run(atomic=atomic)
+    if not report['created']:
+        db.session.rollback()
+        return error_response('No tasks were created', report, 400)
+    
+    db.session.commit()
+    message = 'Tasks created successfully' if not report['failed'] else 'Tasks created with some errors'
+    return success_response(message, report, 201)
+
+
+@tasks_bp.route('/bulk', methods=['POST'])
+@role_required(UserRole.ADMIN, UserRole.TEAM_LEADER)
+def bulk_create_tasks(current_user):
+    """
+    Create many tasks in one request
+    Rows may depend on an existing task (depends_on) or on another row of
+    the same request through its ref (depends_on_ref).
+    Body:
+    {
+        "tasks": [
+            {"ref": "design", "project_id": 1, "title": "Design", "estimated_hours": 8},
+            {"project_id": 1, "title": "Build", "depends_on_ref": "design"}
+        ],
+        "atomic": false  // true: create nothing if any row is invalid
+    }
+    """
+    try:
+        data = request.get_json()
+        if isinstance(data, list):
+            data = {'tasks': data}
+        if not data or not isinstance(data.get('tasks'), list) or not data['tasks']:
+            return error_response('tasks must be a non-empty list', None, 400)
+        
+        max_rows = current_app.config.get('TASK_IMPORT_MAX_ROWS', 100000)
+        importer = TaskImporter(current_user)
+        if not importer.add_rows(data['tasks'], max_rows):
+            return error_response(f'At most {max_rows} tasks can be created per request', None, 400)
+        
+        return finish_import(importer, bool(data.get('atomic', False)))
+    
+    except Exception as e:
+        db.session.rollback()
+        return error_response(f'Failed to create tasks: {str(e)}', None, 500)
+
+
+@tasks_bp.route('/import', methods=['POST'])
+@role_required(UserRole.ADMIN, UserRole.TEAM_LEADER)
+def import_tasks_csv(current_user):
+    """
+    Import tasks from a CSV file, streamed row by row
+    Send the file as multipart field "file" or as a text/csv request body.
+    Header columns: ref, project_id or project_code, title, description,
+    status, priority, start_date, due_date, estimated_hours, depends_on,
+    depends_on_ref. Error rows are numbered from the first data row.
+    Query params:
+    - atomic: true to create nothing if any row is invalid (default: false)
+    """
+    try:
+        upload = request.files.get('file')
+        stream = upload.stream if upload else request.stream
+        reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+        
+        if not reader.fieldnames or 'title' not in reader.fieldnames:
+            return error_response('CSV header with at least a title column is required', None, 400)
+        unknown = [name for name in reader.fieldnames if name not in IMPORT_FIELDS]
+        if unknown:
+            return error_response(f'Unknown CSV columns: {", ".join(unknown)}', None, 400)
+        
+        max_rows = current_app.config.get('TASK_IMPORT_MAX_ROWS', 100000)
+        importer = TaskImporter(current_user)
+        if not importer.add_rows(reader, max_rows):
+            return error_response(f'At most {max_rows} rows can be imported per file', None, 400)
+        if not importer.total:
+            return error_response('CSV file has no rows', None, 400)
+        
+        atomic = request.args.get('atomic', 'false').lower() == 'true'
+        return finish_import(importer, atomic)
+    
+    except (UnicodeDecodeError, csv.Error) as e:
+        db.session.rollback()
+        return error_response(f'Invalid CSV file: {str(e)}', None, 400)
+    except Exception as e:
+        db.session.rollback()
+        return error_response(f'Failed to import tasks: {str(e)}', None, 500)
+
+
 @tasks_bp.route('/<int:task_id>', methods=['PUT'])
 @jwt_required()
 def update_task(task_id):
@@ -267,6 +501,7 @@ def update_task(task_id):
             return error_response('Task not found', None, 404)
         
         data = request.get_json()
+        previous_status = task.status
         
         # Permission Logic
         is_admin = current_user.role == UserRole.ADMIN
@@ -314,7 +549,17 @@ def update_task(task_id):
                 task.due_date = datetime.strptime(data['due_date'], '%Y-%m-%d').date() if data['due_date'] else None
             if 'estimated_hours' in data: task.estimated_hours = data['estimated_hours']
             if 'actual_hours' in data: task.actual_hours = data['actual_hours']
-            if 'depends_on' in data: task.depends_on = data['depends_on'] or None
+            if 'depends_on' in data:
+                depends_on = data['depends_on'] or None
+                if depends_on is not None and depends_on != task.depends_on:
+                    parent_task = Task.query.get(depends_on)
+                    if not parent_task:
+                        return error_response('Parent task not found', None, 404)
+                    if parent_task.project_id != task.project_id:
+                        return error_response('Parent task must be in the same project', None, 400)
+                    if DependencyGraph.would_create_cycle(task.id, depends_on):
+                        return error_response('Dependency would create a cycle', None, 400)
+                task.depends_on = depends_on
 
         # Employee can ONLY update status and actual_hours (progress reporting)
         elif is_assigned_employee:
@@ -336,6 +581,7 @@ def update_task(task_id):
                 # Let's stick to updating task.actual_hours for now as per request "submit progress".
                 task.actual_hours = data['actual_hours']
 
+        TaskStatusChange.log(task, previous_status, changed_by=current_user.id)
         db.session.commit()
         
         return success_response(
@@ -4,6 +4,7 @@ from app import db
 from app.models import User
 from app.models.user import UserRole
 from app.utils.decorators import role_required
+from app.utils.tokens import get_current_principal
 from app.utils.responses import success_response, error_response, pagination_response
 from app.utils.validators import validate_required_fields, validate_email
 from app.models.assignment import Assignment
@@ -12,9 +13,8 @@ from app.models.activity_log import ActivityLog, ActivityType
 users_bp = Blueprint('users', __name__)
 
 def get_current_user_obj():
-    uid = get_jwt_identity()
-    # Convert to int since JWT identity is stored as string but user ID is integer
-    return User.query.get(int(uid)) if uid else None
+    # Role and company come from the token claims, no query needed
+    return get_current_principal()
 
 @users_bp.route('/', methods=['GET'])
 @jwt_required()
@@ -97,7 +97,7 @@ def create_user():
             return error_response('Invalid email format', None, 400)
         
         # Check if user exists (Global check? Or Company check? Usually Emails are unique globally)
-        existing_user = User.query.filter_by(email=email).first()
+        existing_user = User.find_by_email(email)
         if existing_user:
             return error_response('Email already registered', None, 400)
         
@@ -0,0 +1,186 @@
+import json
+import re
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import and_, case, func, or_
+from app import db
+from app.models.assignment import Assignment
+from app.models.task import Task
+from app.models.user import User
+from app.services.bulk_service import ACTIVE_TASK_STATUSES
+
+# Relative weight of each signal in the final score
+CAPACITY_WEIGHT = 0.5
+SKILL_WEIGHT = 0.35
+LOAD_WEIGHT = 0.15
+
+# Matching this many skills counts as a full skill match when none are requested
+SKILL_SATURATION = 3
+
+
+def parse_skills(raw):
+    """User.skills is a JSON array string, but older rows hold comma separated text"""
+    if not raw:
+        return []
+    try:
+        skills = json.loads(raw)
+    except (ValueError, TypeError):
+        skills = raw.split(',')
+    if isinstance(skills, str):
+        skills = [skills]
+    if not isinstance(skills, list):
+        return []
+    return [str(skill).strip().lower() for skill in skills if str(skill).strip()]
+
+
+def task_window(task):
+    """(start, end) dates the task occupies; the current week when it has no dates"""
+    today = datetime.utcnow().date()
+    start = task.start_date or today
+    end = task.due_date or (start + timedelta(days=6))
+    if end < start:
+        end = start
+    return start, end
+
+
+class AssigneeRecommender:
+    """
+    Ranks a company's users for a task
+    One aggregate query loads every candidate's workload in the task's date
+    window and active task count; scoring is vectorized with NumPy over
+    free capacity, skill match and current load.
+    """
+
+    @staticmethod
+    def candidate_workloads(company_id, start_date=None, end_date=None, exclude_task_id=None):
+        """
+        Active users of the company (every company for None) with the hours of
+        their active assignments overlapping [start_date, end_date] (all of
+        them without a window)
+        Returns rows of (id, first_name, last_name, email, role, skills,
+        weekly_capacity, window_hours, active_tasks)
+        """
+        overlaps = Task.id.isnot(None)
+        if start_date:
+            overlaps = and_(overlaps, or_(Task.due_date.is_(None), Task.due_date >= start_date))
+        if end_date:
+            overlaps = and_(overlaps, or_(Task.start_date.is_(None), Task.start_date <= end_date))
+
+        query = db.session.query(
+            User.id,
+            User.first_name,
+            User.last_name,
+            User.email,
+            User.role,
+            User.skills,
+            User.weekly_capacity,
+            func.coalesce(func.sum(case((overlaps, Assignment.assigned_hours), else_=0)), 0),
+            func.count(Task.id)
+        ).outerjoin(
+            Assignment, Assignment.user_id == User.id
+        ).outerjoin(
+            Task, and_(Task.id == Assignment.task_id, Task.status.in_(ACTIVE_TASK_STATUSES))
+        ).filter(
+            User.is_active == True,
+            User.is_bot == False
+        )
+        if company_id is not None:
+            query = query.filter(User.company_id == company_id)
+        if exclude_task_id is not None:
+            already_assigned = db.session.query(Assignment.user_id).filter(Assignment.task_id == exclude_task_id)
+            query = query.filter(User.id.notin_(already_assigned))
+        return query.group_by(User.id).all()
+
+    @staticmethod
+    def score(rows, required_hours, window_weeks, required_skills=None, task_text=''):
+        """Vectorized score for candidate rows; returns a dict of NumPy arrays"""
+        capacity = np.array([(row[6] or 0) * window_weeks for row in rows], dtype=float)
+        workload = np.array([row[7] for row in rows], dtype=float)
+        active = np.array([row[8] for row in rows], dtype=float)
+
+        free = capacity - workload
+        with np.errstate(divide='ignore', invalid='ignore'):
+            capacity_score = np.where(capacity > 0, np.clip(free / capacity, 0.0, 1.0), 0.0)
+        fits = free >= required_hours
+
+        skills = [parse_skills(row[5]) for row in rows]
+        if required_skills:
+            required = set(required_skills)
+            matched = [sorted(required.intersection(user_skills)) for user_skills in skills]
+            skill_score = np.array([len(m) for m in matched], dtype=float) / len(required)
+        else:
+            text = task_text.lower()
+            matched = [
+                [skill for skill in user_skills if re.search(r'\b' + re.escape(skill) + r'\b', text)]
+                for user_skills in skills
+            ]
+            skill_score = np.minimum(np.array([len(m) for m in matched], dtype=float), SKILL_SATURATION) / SKILL_SATURATION
+
+        load_score = 1.0 / (1.0 + active)
+
+        score = CAPACITY_WEIGHT * capacity_score + SKILL_WEIGHT * skill_score + LOAD_WEIGHT * load_score
+        # Anyone who can take the hours ranks above anyone who cannot
+        score = np.where(fits, score + 1.0, score)
+        return {
+            'score': score,
+            'capacity': capacity,
+            'workload': workload,
+            'free': free,
+            'fits': fits,
+            'active': active,
+            'skill_score': skill_score,
+            'matched_skills': matched
+        }
+
+    @staticmethod
+    def suggest(task, company_id, limit=5, required_skills=None):
+        """Top `limit` users for the task, best first"""
+        start, end = task_window(task)
+        window_weeks = max(1.0, ((end - start).days + 1) / 7.0)
+        assigned = db.session.query(func.coalesce(func.sum(Assignment.assigned_hours), 0)).filter(
+            Assignment.task_id == task.id
+        ).scalar() or 0
+        required_hours = max(0, (task.estimated_hours or 0) - assigned)
+
+        rows = AssigneeRecommender.candidate_workloads(company_id, start, end, exclude_task_id=task.id)
+        result = {
+            'window': {
+                'start_date': start.isoformat(),
+                'end_date': end.isoformat(),
+                'weeks': round(window_weeks, 2)
+            },
+            'required_hours': required_hours,
+            'candidates_considered': len(rows),
+            'suggestions': []
+        }
+        if not rows:
+            return result
+
+        scores = AssigneeRecommender.score(
+            rows,
+            required_hours,
+            window_weeks,
+            required_skills=required_skills,
+            task_text=f"{task.title} {task.description or ''}"
+        )
+        limit = min(limit, len(rows))
+        top = np.argpartition(-scores['score'], limit - 1)[:limit]
+        top = top[np.argsort(-scores['score'][top], kind='stable')]
+
+        for i in top:
+            user_id, first_name, last_name, email, role = rows[i][:5]
+            result['suggestions'].append({
+                'user_id': user_id,
+                'name': f"{first_name} {last_name}",
+                'email': email,
+                'role': role,
+                'score': round(float(scores['score'][i]), 4),
+                'fits': bool(scores['fits'][i]),
+                'capacity_hours': round(float(scores['capacity'][i]), 2),
+                'window_workload': int(scores['workload'][i]),
+                'available_hours': round(float(scores['free'][i]), 2),
+                'active_tasks': int(scores['active'][i]),
+                'skill_match': round(float(scores['skill_score'][i]), 2),
+                'matched_skills': scores['matched_skills'][i]
+            })
+        return result
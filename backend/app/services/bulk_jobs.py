@@ -0,0 +1,151 @@
+import json
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.bulk_job import BulkJob, BulkJobStatus
+from app.services.bulk_service import chunked
+from app.utils.tenant import tenant_scope
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Shared worker pool for asynchronous bulk jobs"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=current_app.config.get('BULK_JOB_WORKERS', 2),
+                thread_name_prefix='bulk-job'
+            )
+        return _executor
+
+
+class BulkJobRunner:
+    """
+    Chunked bulk-operation framework
+    Work is split into chunks that are committed one at a time, so locks are
+    short-lived and a failing chunk only loses its own items. Large jobs run
+    on a background worker and report progress through BulkJob.
+    """
+
+    @staticmethod
+    def find_existing(user_id, idempotency_key):
+        """Job previously started by this user with the same Idempotency-Key"""
+        if not idempotency_key:
+            return None
+        return BulkJob.query.filter_by(user_id=user_id, idempotency_key=idempotency_key).first()
+
+    @staticmethod
+    def start(current_user, operation, items, handler, idempotency_key=None, run_async=None):
+        """
+        Create a job and process `items` with `handler(chunk, details)`
+        The handler returns {item: result} for its chunk and may record
+        operation specific extras in the shared `details` dict.
+        Returns (job, created); created is False when another request
+        with the same Idempotency-Key won the race.
+        """
+        config = current_app.config
+        chunk_size = config.get('BULK_CHUNK_SIZE', 500)
+        if run_async is None:
+            run_async = len(items) > config.get('BULK_ASYNC_THRESHOLD', 5000)
+
+        job = BulkJob(
+            id=str(uuid.uuid4()),
+            company_id=current_user.company_id,
+            user_id=current_user.id,
+            operation=operation,
+            idempotency_key=idempotency_key,
+            status=BulkJobStatus.PENDING,
+            is_async=run_async,
+            total_items=len(items),
+            processed_items=0,
+            failed_items=0,
+            chunk_size=chunk_size
+        )
+        db.session.add(job)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return BulkJobRunner.find_existing(current_user.id, idempotency_key), False
+
+        if run_async:
+            _get_executor().submit(
+                BulkJobRunner._run_in_context,
+                current_app._get_current_object(),
+                job.id,
+                list(items),
+                handler
+            )
+        else:
+            BulkJobRunner._run(job, items, handler)
+
+        return job, True
+
+    @staticmethod
+    def _run_in_context(app, job_id, items, handler):
+        """Background entry point: run the job inside its own app context"""
+        with app.app_context():
+            job = BulkJob.query.get(job_id)
+            if not job:
+                return
+            try:
+                # No request JWT here; keep the job's queries inside its company
+                with tenant_scope(job.company_id):
+                    BulkJobRunner._run(job, items, handler)
+            except Exception as e:
+                db.session.rollback()
+                job.status = BulkJobStatus.FAILED
+                job.errors = json.dumps([{'chunk': None, 'error': str(e)}])
+                job.finished_at = datetime.utcnow()
+                db.session.commit()
+
+    @staticmethod
+    def _record(job, report, details, errors):
+        """Store the outcome so far on the job; committed by the caller"""
+        job.results = json.dumps(report)
+        job.details = json.dumps(details) if details else None
+        job.errors = json.dumps(errors) if errors else None
+
+    @staticmethod
+    def _run(job, items, handler):
+        """Process every chunk, committing progress and its results together with the chunk's work"""
+        job.status = BulkJobStatus.RUNNING
+        db.session.commit()
+
+        report = []
+        details = {}
+        errors = []
+        for index, chunk in enumerate(chunked(items, job.chunk_size)):
+            reported = len(report)
+            try:
+                chunk_results = handler(chunk, details)
+                job.processed_items += len(chunk)
+                report.extend({'id': item, 'result': chunk_results.get(item, 'skipped')} for item in chunk)
+                BulkJobRunner._record(job, report, details, errors)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                del report[reported:]
+                errors.append({'chunk': index, 'error': str(e)})
+                job.processed_items += len(chunk)
+                job.failed_items += len(chunk)
+                report.extend({'id': item, 'result': 'failed'} for item in chunk)
+                BulkJobRunner._record(job, report, details, errors)
+                db.session.commit()
+
+        if not job.failed_items:
+            job.status = BulkJobStatus.COMPLETED
+        elif job.failed_items < job.total_items:
+            job.status = BulkJobStatus.PARTIAL
+        else:
+            job.status = BulkJobStatus.FAILED
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        return job
@@ -0,0 +1,383 @@
+from collections import deque
+from datetime import datetime
+from sqlalchemy.orm import aliased
+from app import db
+from app.models.activity_log import ActivityLog
+from app.models.assignment import Assignment, AssignmentStatus
+from app.models.comment import Comment
+from app.models.notification import Notification, NotificationType
+from app.models.project import Project
+from app.models.task import Task, TaskStatus
+from app.models.task_status_change import TaskStatusChange
+from app.models.user import User, UserRole
+from app.utils.notifications import create_notifications_bulk
+from app.utils.change_events import mark_changed
+
+# Keep IN (...) lists well below SQLite's bound-parameter limit
+CHUNK_SIZE = 500
+
+ACTIVE_TASK_STATUSES = [TaskStatus.TODO, TaskStatus.IN_PROGRESS, TaskStatus.REVIEW]
+
+
+def chunked(items, size=CHUNK_SIZE):
+    """Yield successive slices of `items`"""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def normalize_ids(ids):
+    """Deduplicate ids while keeping order; returns (valid_ids, invalid_values)"""
+    seen = set()
+    valid, invalid = [], []
+    for value in ids:
+        try:
+            value = int(value)
+        except (ValueError, TypeError):
+            invalid.append(value)
+            continue
+        if value not in seen:
+            seen.add(value)
+            valid.append(value)
+    return valid, invalid
+
+
+class BulkTaskService:
+    """Set-based bulk operations on tasks"""
+
+    @staticmethod
+    def manageable_projects(current_user):
+        """Query of project ids the user may modify (company projects, or managed ones for team leaders)"""
+        query = db.session.query(Project.id).filter(Project.company_id == current_user.company_id)
+        if current_user.role != UserRole.ADMIN:
+            query = query.filter(Project.manager_id == current_user.id)
+        return query
+
+    @staticmethod
+    def classify_tasks(current_user, task_ids):
+        """
+        Split task ids into (allowed_rows, results) with one permission query
+        and one lookup per chunk. allowed_rows maps task_id -> project_id;
+        results maps the rejected ids to 'not_found' or 'forbidden'.
+        """
+        allowed_projects = {pid for (pid,) in BulkTaskService.manageable_projects(current_user).all()}
+
+        allowed_rows = {}
+        results = {}
+        for chunk in chunked(task_ids):
+            found = dict(
+                db.session.query(Task.id, Task.project_id).filter(
+                    Task.id.in_(chunk),
+                    Task.company_id == current_user.company_id
+                ).all()
+            )
+            for task_id in chunk:
+                if task_id not in found:
+                    results[task_id] = 'not_found'
+                elif found[task_id] not in allowed_projects:
+                    results[task_id] = 'forbidden'
+                else:
+                    allowed_rows[task_id] = found[task_id]
+        return allowed_rows, results
+
+    @staticmethod
+    def update_tasks(current_user, task_ids, values):
+        """
+        Apply `values` to every task the user may modify with one
+        UPDATE ... WHERE id IN (...) AND project_id IN (...) per chunk
+        Returns (updated_count, per-id results)
+        """
+        allowed_rows, results = BulkTaskService.classify_tasks(current_user, task_ids)
+        allowed_ids = [task_id for task_id in task_ids if task_id in allowed_rows]
+        project_scope = BulkTaskService.manageable_projects(current_user).subquery()
+
+        updated_count = 0
+        for chunk in chunked(allowed_ids):
+            updated_count += Task.query.filter(
+                Task.id.in_(chunk),
+                Task.project_id.in_(db.select(project_scope.c.id))
+            ).update(values, synchronize_session=False)
+            for task_id in chunk:
+                results[task_id] = 'updated'
+        mark_changed(projects=set(allowed_rows.values()), tasks=allowed_ids)
+
+        return updated_count, results
+
+    @staticmethod
+    def update_status(current_user, task_ids, new_status):
+        """
+        update_tasks() for a status change that also logs every transition
+        The previous statuses are read with one IN query per chunk and the
+        log rows are written with one executemany insert.
+        """
+        previous = []
+        for chunk in chunked(task_ids):
+            previous.extend(db.session.query(Task.id, Task.project_id, Task.status).filter(
+                Task.id.in_(chunk),
+                Task.status != new_status
+            ).all())
+        updated_count, results = BulkTaskService.update_tasks(
+            current_user, task_ids, BulkTaskService.status_values(new_status)
+        )
+        TaskStatusChange.log_bulk(
+            [row for row in previous if results.get(row[0]) == 'updated'],
+            new_status,
+            changed_by=current_user.id
+        )
+        return updated_count, results
+
+    @staticmethod
+    def status_values(new_status):
+        """Column values for a status change, keeping completed_date in step with update_task"""
+        values = {Task.status: new_status}
+        if new_status == TaskStatus.COMPLETED:
+            values[Task.completed_date] = db.func.coalesce(Task.completed_date, datetime.utcnow().date())
+        return values
+
+    @staticmethod
+    def format_results(task_ids, results, invalid=()):
+        """Per-id result list in request order"""
+        report = [{'task_id': task_id, 'result': results.get(task_id, 'skipped')} for task_id in task_ids]
+        report.extend({'task_id': value, 'result': 'invalid'} for value in invalid)
+        return report
+
+    @staticmethod
+    def current_workloads(user_ids):
+        """Active assigned hours per user in one aggregate query"""
+        rows = db.session.query(
+            Assignment.user_id,
+            db.func.coalesce(db.func.sum(Assignment.assigned_hours), 0)
+        ).join(Task).filter(
+            Assignment.user_id.in_(user_ids),
+            Task.status.in_(ACTIVE_TASK_STATUSES)
+        ).group_by(Assignment.user_id).all()
+        return {user_id: int(hours) for user_id, hours in rows}
+
+    @staticmethod
+    def plan_assignments(current_user, task_ids, user_ids):
+        """
+        Resolve the (user, task) pairs an assignment would create
+        Returns (task_rows, task_results, existing, new_pairs): the
+        classify_tasks() split, the pairs that already exist and, per user,
+        the valid task ids not yet assigned to them
+        """
+        # Tasks: exist, same company, manageable by the caller
+        task_rows, task_results = BulkTaskService.classify_tasks(current_user, task_ids)
+        valid_task_ids = [task_id for task_id in task_ids if task_id in task_rows]
+
+        # Existing (user, task) pairs
+        existing = set()
+        if user_ids:
+            for chunk in chunked(valid_task_ids):
+                existing.update(
+                    db.session.query(Assignment.user_id, Assignment.task_id).filter(
+                        Assignment.task_id.in_(chunk),
+                        Assignment.user_id.in_(user_ids)
+                    ).all()
+                )
+
+        new_pairs = {
+            user_id: [task_id for task_id in valid_task_ids if (user_id, task_id) not in existing]
+            for user_id in user_ids
+        }
+        return task_rows, task_results, existing, new_pairs
+
+    @staticmethod
+    def assign(current_user, task_ids, user_ids, hours_per_task, notes=None):
+        """
+        Assign every valid task to every valid user (many users x many tasks)
+        Existing assignments and task validity are resolved with one IN
+        query per chunk; new rows are inserted with executemany and the
+        assignees are notified in one batch.
+        """
+        # Users: same company and active, one query
+        users = {
+            user.id: user for user in User.query.filter(
+                User.id.in_(user_ids),
+                User.company_id == current_user.company_id
+            ).all()
+        }
+        user_results = {}
+        for user_id in user_ids:
+            if user_id not in users:
+                user_results[user_id] = 'not_found'
+            elif not users[user_id].is_active:
+                user_results[user_id] = 'inactive'
+        candidate_users = [uid for uid in user_ids if uid not in user_results]
+
+        task_rows, task_results, existing, new_pairs = BulkTaskService.plan_assignments(
+            current_user, task_ids, candidate_users
+        )
+        valid_task_ids = [task_id for task_id in task_ids if task_id in task_rows]
+
+        # Capacity check against the hours each user would actually receive
+        workloads = BulkTaskService.current_workloads(candidate_users) if candidate_users else {}
+        overloaded = {}
+        for user_id in candidate_users:
+            current = workloads.get(user_id, 0)
+            new_hours = len(new_pairs[user_id]) * hours_per_task
+            capacity = users[user_id].weekly_capacity or 0
+            if new_pairs[user_id] and current + new_hours > capacity:
+                user_results[user_id] = 'overloaded'
+                overloaded[user_id] = {
+                    'current_workload': current,
+                    'new_hours': new_hours,
+                    'capacity': capacity
+                }
+
+        now = datetime.utcnow()
+        rows = []
+        for user_id in candidate_users:
+            if user_id in overloaded:
+                continue
+            for task_id in new_pairs[user_id]:
+                rows.append({
+                    'user_id': user_id,
+                    'task_id': task_id,
+                    'company_id': current_user.company_id,
+                    'assigned_by': current_user.id,
+                    'assigned_hours': hours_per_task,
+                    'actual_hours': 0,
+                    'status': AssignmentStatus.PENDING,
+                    'notes': notes,
+                    'created_at': now,
+                    'updated_at': now
+                })
+            user_results.setdefault(user_id, 'assigned' if new_pairs[user_id] else 'unchanged')
+
+        for chunk in chunked(rows):
+            db.session.execute(Assignment.__table__.insert(), chunk)
+        mark_changed(
+            projects={task_rows[row['task_id']] for row in rows},
+            tasks={row['task_id'] for row in rows},
+            users={row['user_id'] for row in rows}
+        )
+
+        assigned_tasks = {row['task_id'] for row in rows}
+        for task_id in valid_task_ids:
+            task_results[task_id] = 'assigned' if task_id in assigned_tasks else 'already_assigned'
+
+        # One notification per assignee, inserted as one batch
+        notifications = []
+        for user_id in candidate_users:
+            if user_id in overloaded or not new_pairs[user_id]:
+                continue
+            count = len(new_pairs[user_id])
+            first_task = new_pairs[user_id][0]
+            notifications.append({
+                'user_id': user_id,
+                'notif_type': NotificationType.TASK_ASSIGNED,
+                'message': f"You have been assigned to {count} task{'s' if count != 1 else ''}",
+                'data': {'task_id': first_task, 'project_id': task_rows[first_task]} if count == 1 else None
+            })
+        create_notifications_bulk(notifications)
+
+        return {
+            'assigned': len(rows),
+            'skipped': len(existing),
+            'overloaded': overloaded,
+            'task_results': task_results,
+            'user_results': user_results
+        }
+
+    @staticmethod
+    def dependency_closure(task_ids):
+        """
+        All tasks that transitively depend on `task_ids` (including them)
+        One recursive CTE per chunk of roots; returns {task_id: (depends_on, company_id)}
+        """
+        closure = {}
+        for chunk in chunked(task_ids):
+            tree = db.select(
+                Task.id.label('task_id'),
+                Task.depends_on.label('parent_id')
+            ).where(Task.id.in_(chunk)).cte('dependency_closure', recursive=True)
+            dependent = aliased(Task)
+            tree = tree.union(
+                db.select(dependent.id, dependent.depends_on).join(
+                    tree, dependent.depends_on == tree.c.task_id
+                )
+            )
+            rows = db.session.execute(
+                db.select(tree.c.task_id, tree.c.parent_id, Task.company_id)
+                .join(Task, Task.id == tree.c.task_id)
+            ).all()
+            for task_id, parent_id, company_id in rows:
+                closure[task_id] = (parent_id, company_id)
+        return closure
+
+    @staticmethod
+    def plan_delete(current_user, task_ids, cascade=False):
+        """
+        Work out which tasks a bulk delete removes and in what order
+        Without cascade a requested task is kept ('has_dependents') when
+        anything outside the request depends on it; with cascade its whole
+        dependent subtree is deleted too. Returns (ordered_ids, results, cascaded_ids)
+        with dependents ordered before the tasks they depend on.
+        """
+        allowed_rows, results = BulkTaskService.classify_tasks(current_user, task_ids)
+        requested = set(allowed_rows)
+        closure = BulkTaskService.dependency_closure([task_id for task_id in task_ids if task_id in requested])
+
+        # Dependents in another tenant can never be deleted from here
+        foreign = {task_id for task_id, (_, company_id) in closure.items() if company_id != current_user.company_id}
+        blockers = foreign if cascade else {task_id for task_id in closure if task_id not in requested}
+
+        # Walk up from every blocker: the requested tasks it depends on must stay
+        blocked = set()
+        queue = deque(blockers)
+        while queue:
+            parent_id = closure[queue.popleft()][0]
+            if parent_id in closure and parent_id not in blocked and parent_id not in blockers:
+                blocked.add(parent_id)
+                queue.append(parent_id)
+
+        for task_id in requested & blocked:
+            results[task_id] = 'has_dependents'
+
+        doomed = {task_id for task_id in closure if task_id not in blocked and task_id not in blockers}
+        if not cascade:
+            doomed &= requested
+        cascaded = doomed - requested
+
+        # Children before parents, so chunked deletes never orphan a FK
+        children = {}
+        for task_id in doomed:
+            parent_id = closure[task_id][0]
+            if parent_id in doomed:
+                children[parent_id] = children.get(parent_id, 0) + 1
+        ready = deque(sorted(task_id for task_id in doomed if not children.get(task_id)))
+        ordered = []
+        while ready:
+            task_id = ready.popleft()
+            ordered.append(task_id)
+            parent_id = closure[task_id][0]
+            if parent_id in doomed:
+                children[parent_id] -= 1
+                if children[parent_id] == 0:
+                    ready.append(parent_id)
+        # Whatever is left sits on a dependency cycle; delete it last, together
+        ordered.extend(sorted(doomed - set(ordered)))
+
+        return ordered, results, sorted(cascaded)
+
+    @staticmethod
+    def delete_tasks(task_ids):
+        """
+        Set-based delete of tasks and the rows that reference them
+        Order: notifications, comments, assignments, activity logs, status changes, tasks
+        """
+        mark_changed(
+            projects=[pid for (pid,) in db.session.query(Task.project_id).filter(Task.id.in_(task_ids)).distinct()],
+            tasks=task_ids
+        )
+        comment_ids = db.select(Comment.id).where(Comment.task_id.in_(task_ids))
+        Notification.query.filter(
+            db.or_(Notification.task_id.in_(task_ids), Notification.comment_id.in_(comment_ids))
+        ).delete(synchronize_session=False)
+        # Replies first so the self-referencing parent_id never dangles
+        Comment.query.filter(Comment.task_id.in_(task_ids), Comment.parent_id.isnot(None)).delete(synchronize_session=False)
+        Comment.query.filter(Comment.task_id.in_(task_ids)).delete(synchronize_session=False)
+        Assignment.query.filter(Assignment.task_id.in_(task_ids)).delete(synchronize_session=False)
+        ActivityLog.query.filter(ActivityLog.task_id.in_(task_ids)).delete(synchronize_session=False)
+        TaskStatusChange.query.filter(TaskStatusChange.task_id.in_(task_ids)).delete(synchronize_session=False)
+        return Task.query.filter(Task.id.in_(task_ids)).delete(synchronize_session=False)
@@ -0,0 +1,185 @@
+"""
+Incremental burndown snapshots
+Before each commit that touched a project's tasks, that project's row for
+today is recomputed with one grouped query over its tasks and written in
+the same transaction. A chart then reads one compact row per day instead
+of rescanning every task for every day.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import case, func
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.analytics_snapshot import BurndownSnapshot
+from app.models.project import Project
+from app.models.task import Task, TaskStatus
+from app.services.bulk_service import chunked
+from app.utils.change_events import before_commit
+
+BURNDOWN_FIELDS = ('open_tasks', 'remaining_hours', 'completed_tasks', 'completed_hours', 'total_tasks', 'total_hours')
+
+# unit -> (remaining, completed, scope) columns
+UNITS = {
+    'hours': ('remaining_hours', 'completed_hours', 'total_hours'),
+    'tasks': ('open_tasks', 'completed_tasks', 'total_tasks')
+}
+
+
+def ideal_line(dates, start_date, end_date, scope):
+    """Straight line from `scope` on start_date to zero on end_date"""
+    span = (end_date - start_date).days
+    if span <= 0:
+        return [0 if day >= end_date else scope for day in dates]
+    return [round(max(0.0, scope * (1 - (day - start_date).days / span)), 2) for day in dates]
+
+
+class BurndownService:
+    """Daily remaining-work rows per project and the burndown/burnup series built from them"""
+
+    @staticmethod
+    def current_rows(project_ids):
+        """project_id -> (company_id, {field: value}) from the projects' tasks right now"""
+        is_open = Task.status != TaskStatus.COMPLETED
+        estimate = func.coalesce(Task.estimated_hours, 0)
+        rows = {}
+        for chunk in chunked(list(project_ids)):
+            for project_id, company_id in db.session.query(Project.id, Project.company_id).filter(
+                Project.id.in_(chunk)
+            ):
+                rows[project_id] = (company_id, dict.fromkeys(BURNDOWN_FIELDS, 0))
+            task_rows = db.session.query(
+                Task.project_id,
+                func.sum(case((is_open, 1), else_=0)),
+                func.sum(case((is_open, estimate), else_=0)),
+                func.sum(case((is_open, 0), else_=1)),
+                func.sum(case((is_open, 0), else_=estimate)),
+                func.count(Task.id),
+                func.sum(estimate)
+            ).filter(Task.project_id.in_(chunk)).group_by(Task.project_id).all()
+            for project_id, *values in task_rows:
+                if project_id in rows:
+                    rows[project_id][1].update(zip(BURNDOWN_FIELDS, (int(value or 0) for value in values)))
+        return rows
+
+    @staticmethod
+    def _update(existing, rows, now):
+        values = [dict(rows[project_id][1], id=row_id, updated_at=now) for project_id, row_id in existing.items()]
+        for chunk in chunked(values):
+            db.session.execute(db.update(BurndownSnapshot), chunk)
+
+    @staticmethod
+    def record(project_ids, day=None):
+        """Upsert the day's (default: today's) row of each project; returns rows written"""
+        day = day or datetime.utcnow().date()
+        rows = BurndownService.current_rows(project_ids)
+        if not rows:
+            return 0
+
+        existing = {}
+        for chunk in chunked(list(rows)):
+            existing.update(db.session.query(BurndownSnapshot.project_id, BurndownSnapshot.id).filter(
+                BurndownSnapshot.project_id.in_(chunk),
+                BurndownSnapshot.snapshot_date == day
+            ).all())
+
+        now = datetime.utcnow()
+        BurndownService._update(existing, rows, now)
+        missing = [
+            dict(values, project_id=project_id, company_id=company_id, snapshot_date=day, created_at=now, updated_at=now)
+            for project_id, (company_id, values) in rows.items() if project_id not in existing
+        ]
+        if missing:
+            try:
+                with db.session.begin_nested():
+                    for chunk in chunked(missing):
+                        db.session.execute(BurndownSnapshot.__table__.insert(), chunk)
+            except IntegrityError:
+                # Another transaction wrote today's row first
+                created = dict(db.session.query(BurndownSnapshot.project_id, BurndownSnapshot.id).filter(
+                    BurndownSnapshot.project_id.in_([row['project_id'] for row in missing]),
+                    BurndownSnapshot.snapshot_date == day
+                ).all())
+                BurndownService._update(created, rows, now)
+        return len(rows)
+
+    @staticmethod
+    def record_companies(company_ids=None, day=None):
+        """Seed or refresh the day's rows of every project of the given companies (all by default)"""
+        query = db.session.query(Project.id)
+        if company_ids is not None:
+            query = query.filter(Project.company_id.in_(company_ids))
+        return BurndownService.record([project_id for (project_id,) in query], day=day)
+
+    @staticmethod
+    def chart(project, unit='hours', today=None):
+        """
+        Daily burndown and burnup series from the project's start to its end
+        (or today). Days without a row repeat the previous day; the ideal
+        line runs from the remaining work at the start to zero at end_date.
+        """
+        remaining_field, completed_field, scope_field = UNITS[unit]
+        today = today or datetime.utcnow().date()
+        start_date = project.start_date or project.created_at.date()
+        end_date = project.end_date or today
+        end_date = max(end_date, start_date)
+        last_actual = min(end_date, today)
+
+        # The last row before the range seeds the carry-forward
+        before = BurndownSnapshot.query.filter(
+            BurndownSnapshot.project_id == project.id,
+            BurndownSnapshot.snapshot_date < start_date
+        ).order_by(BurndownSnapshot.snapshot_date.desc()).first()
+        snapshots = {
+            row.snapshot_date: row for row in BurndownSnapshot.query.filter(
+                BurndownSnapshot.project_id == project.id,
+                BurndownSnapshot.snapshot_date >= start_date,
+                BurndownSnapshot.snapshot_date <= last_actual
+            )
+        }
+
+        dates = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+        remaining, completed, scope = [], [], []
+        current = before
+        for day in dates:
+            current = snapshots.get(day, current)
+            if day > last_actual or current is None:
+                remaining.append(None)
+                completed.append(None)
+                scope.append(None)
+                continue
+            remaining.append(getattr(current, remaining_field))
+            completed.append(getattr(current, completed_field))
+            scope.append(getattr(current, scope_field))
+
+        known = [value for value in remaining if value is not None]
+        start_remaining = known[0] if known else 0
+        ideal = ideal_line(dates, start_date, project.end_date, start_remaining) if project.end_date else None
+
+        latest = len([day for day in dates if day <= last_actual]) - 1
+        summary = {
+            'remaining': remaining[latest] if latest >= 0 else None,
+            'completed': completed[latest] if latest >= 0 else None,
+            'scope': scope[latest] if latest >= 0 else None,
+            'ideal_remaining': ideal[latest] if ideal and latest >= 0 else None
+        }
+        summary['on_track'] = (
+            summary['remaining'] <= summary['ideal_remaining']
+            if summary['remaining'] is not None and summary['ideal_remaining'] is not None else None
+        )
+        return {
+            'project_id': project.id,
+            'unit': unit,
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'dates': [day.isoformat() for day in dates],
+            'remaining': remaining,
+            'completed': completed,
+            'scope': scope,
+            'ideal': ideal,
+            'summary': summary
+        }
+
+
+@before_commit
+def _record_burndown(session, changes):
+    if changes.projects:
+        BurndownService.record(changes.projects)
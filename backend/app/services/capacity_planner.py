@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta
+import numpy as np
+from app import db
+from app.models.assignment import Assignment
+from app.models.task import Task
+from app.models.user import User
+from app.services.bulk_service import ACTIVE_TASK_STATUSES
+
+# Span assumed for a task without dates
+DEFAULT_SPAN_DAYS = 7
+
+
+def week_start(day):
+    """Monday of the week containing `day`"""
+    return day - timedelta(days=day.weekday())
+
+
+def spread_hours(hours, start_offsets, end_offsets, weeks):
+    """
+    Spread each assignment's hours evenly over its days (inclusive offsets
+    from the first grid day) and return the (assignments x weeks) hours
+    falling in each week
+    """
+    span = (end_offsets - start_offsets + 1).astype(float)
+    daily = hours / span
+    week_first = np.arange(weeks) * 7
+    overlap = (
+        np.minimum(end_offsets[:, None], week_first[None, :] + 6)
+        - np.maximum(start_offsets[:, None], week_first[None, :])
+        + 1
+    )
+    return daily[:, None] * np.clip(overlap, 0, None)
+
+
+class CapacityPlanner:
+    """
+    Users x weeks workload matrix for capacity planning
+    All active assignments of a company are loaded in one query and their
+    assigned hours are spread across each task's date range with NumPy,
+    then compared with every user's weekly capacity.
+    """
+
+    @staticmethod
+    def heatmap(company_id, start_date=None, weeks=12):
+        today = datetime.utcnow().date()
+        grid_start = week_start(start_date or today)
+        today_offset = (today - grid_start).days
+
+        users = db.session.query(
+            User.id, User.first_name, User.last_name, User.weekly_capacity
+        ).filter(
+            User.company_id == company_id,
+            User.is_active == True,
+            User.is_bot == False
+        ).order_by(User.id).all()
+        index = {row[0]: i for i, row in enumerate(users)}
+
+        rows = db.session.query(
+            Assignment.user_id,
+            Assignment.assigned_hours,
+            Task.start_date,
+            Task.due_date
+        ).join(Task, Assignment.task_id == Task.id).join(User, Assignment.user_id == User.id).filter(
+            User.company_id == company_id,
+            User.is_active == True,
+            User.is_bot == False,
+            Task.status.in_(ACTIVE_TASK_STATUSES)
+        ).all()
+
+        matrix = np.zeros((len(users), weeks), dtype=float)
+        if rows:
+            user_index = np.fromiter((index[row[0]] for row in rows), dtype=np.int64, count=len(rows))
+            hours = np.fromiter((row[1] or 0 for row in rows), dtype=float, count=len(rows))
+            starts = np.fromiter(
+                ((row[2] - grid_start).days if row[2] else today_offset for row in rows),
+                dtype=np.int64, count=len(rows)
+            )
+            has_due = np.fromiter((row[3] is not None for row in rows), dtype=bool, count=len(rows))
+            ends = np.fromiter(
+                ((row[3] - grid_start).days if row[3] else 0 for row in rows),
+                dtype=np.int64, count=len(rows)
+            )
+            ends = np.where(has_due, ends, starts + DEFAULT_SPAN_DAYS - 1)
+            # A due date before the start date is treated as a one-day task
+            ends = np.maximum(ends, starts)
+            # Work still open past its due date lands on today
+            overdue = ends < today_offset
+            starts = np.where(overdue, today_offset, starts)
+            ends = np.where(overdue, today_offset, ends)
+            weekly = spread_hours(hours, starts, ends, weeks)
+            for week in range(weeks):
+                matrix[:, week] = np.bincount(user_index, weights=weekly[:, week], minlength=len(users))
+
+        capacity = np.array([row[3] or 0 for row in users], dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            utilization = np.where(capacity[:, None] > 0, matrix / capacity[:, None] * 100, 0.0)
+        overloaded = matrix > capacity[:, None]
+
+        week_dates = [grid_start + timedelta(weeks=week) for week in range(weeks)]
+        hours_rounded = np.round(matrix, 1).tolist()
+        utilization_rounded = np.round(utilization, 1).tolist()
+        overloaded_weeks = overloaded.sum(axis=1).tolist()
+        return {
+            'weeks': [day.isoformat() for day in week_dates],
+            'users': [
+                {
+                    'user_id': row[0],
+                    'name': f"{row[1]} {row[2]}",
+                    'weekly_capacity': row[3] or 0,
+                    'hours': hours_rounded[i],
+                    'utilization': utilization_rounded[i],
+                    'overloaded_weeks': overloaded_weeks[i]
+                }
+                for i, row in enumerate(users)
+            ],
+            'summary': {
+                'total_hours': np.round(matrix.sum(axis=0), 1).tolist(),
+                'total_capacity': float(capacity.sum()),
+                'utilization': np.round(
+                    matrix.sum(axis=0) / capacity.sum() * 100 if capacity.sum() else np.zeros(weeks), 1
+                ).tolist(),
+                'overloaded_users': overloaded.sum(axis=0).tolist()
+            }
+        }
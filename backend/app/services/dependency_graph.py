@@ -0,0 +1,194 @@
+from collections import deque
+from app import db
+from app.models.task import Task, TaskStatus
+from app.utils.cache import TTLCache
+from app.utils.change_events import on_commit
+
+# project_id -> DependencyGraph; dropped whenever the project's tasks change
+dependency_graph_cache = TTLCache(maxsize=256, ttl=600)
+
+
+@on_commit
+def _invalidate_dependency_graphs(changes):
+    for project_id in changes.projects:
+        dependency_graph_cache.invalidate(project_id)
+
+
+class DependencyCycleError(ValueError):
+    """Raised when Task.depends_on edges form a cycle"""
+
+    def __init__(self, cycle):
+        self.cycle = cycle
+        super().__init__(f"Dependency cycle between tasks {cycle}")
+
+
+class DependencyGraph:
+    """
+    Compact dependency graph of one project
+    Tasks are numbered 0..n-1; `parent[i]` is the index of the task that i
+    depends on (-1 for none or a task outside the project) and `children`
+    holds the reverse edges. Durations are remaining estimated hours, so
+    completed tasks take no time.
+    """
+
+    def __init__(self, project_id, rows):
+        self.project_id = project_id
+        self.ids = [row.id for row in rows]
+        self.index = {task_id: i for i, task_id in enumerate(self.ids)}
+        self.rows = rows
+        self.parent = [self.index.get(row.depends_on, -1) for row in rows]
+        self.external = [row.id for row in rows if row.depends_on and row.depends_on not in self.index]
+        self.children = [[] for _ in rows]
+        for i, p in enumerate(self.parent):
+            if p >= 0:
+                self.children[p].append(i)
+        self.duration = [
+            0 if row.status == TaskStatus.COMPLETED else (row.estimated_hours or 0)
+            for row in rows
+        ]
+        self._schedule = None
+
+    @staticmethod
+    def load(project_id):
+        """All of the project's edges and durations in one query"""
+        rows = db.session.query(
+            Task.id,
+            Task.depends_on,
+            Task.estimated_hours,
+            Task.status,
+            Task.task_number,
+            Task.title
+        ).filter(Task.project_id == project_id).order_by(Task.id).all()
+        return DependencyGraph(project_id, rows)
+
+    @staticmethod
+    def for_project(project_id):
+        """Cached graph (with its schedule) for a project"""
+        return dependency_graph_cache.get_or_compute(project_id, lambda: DependencyGraph.load(project_id))
+
+    def topological_order(self):
+        """Kahn's algorithm; raises DependencyCycleError if some tasks can never start"""
+        indegree = [1 if p >= 0 else 0 for p in self.parent]
+        queue = deque(i for i, degree in enumerate(indegree) if degree == 0)
+        order = []
+        while queue:
+            i = queue.popleft()
+            order.append(i)
+            for child in self.children[i]:
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    queue.append(child)
+        if len(order) < len(self.ids):
+            raise DependencyCycleError(self._find_cycle(set(range(len(self.ids))) - set(order)))
+        return order
+
+    def _find_cycle(self, remaining):
+        """Task ids of one cycle among nodes Kahn's algorithm could not reach"""
+        start = next(iter(remaining))
+        seen = []
+        node = start
+        while node not in seen:
+            seen.append(node)
+            node = self.parent[node]
+        return [self.ids[i] for i in seen[seen.index(node):]]
+
+    def schedule(self):
+        """
+        Critical path method over remaining hours
+        earliest start/finish come from a forward pass in topological order,
+        latest start/finish from a backward pass; zero-slack tasks are critical.
+        """
+        if self._schedule is not None:
+            return self._schedule
+
+        order = self.topological_order()
+        count = len(self.ids)
+        earliest_start = [0] * count
+        earliest_finish = [0] * count
+        for i in order:
+            p = self.parent[i]
+            earliest_start[i] = earliest_finish[p] if p >= 0 else 0
+            earliest_finish[i] = earliest_start[i] + self.duration[i]
+
+        project_duration = max(earliest_finish, default=0)
+        latest_finish = [project_duration] * count
+        latest_start = [0] * count
+        for i in reversed(order):
+            if self.children[i]:
+                latest_finish[i] = min(latest_start[child] for child in self.children[i])
+            latest_start[i] = latest_finish[i] - self.duration[i]
+
+        slack = [latest_start[i] - earliest_start[i] for i in range(count)]
+
+        # Walk back from the task that finishes last
+        critical_path = []
+        if count:
+            node = max(range(count), key=lambda i: (earliest_finish[i], -i))
+            while node >= 0:
+                critical_path.append(self.ids[node])
+                node = self.parent[node]
+            critical_path.reverse()
+
+        self._schedule = {
+            'order': [self.ids[i] for i in order],
+            'earliest_start': earliest_start,
+            'earliest_finish': earliest_finish,
+            'latest_start': latest_start,
+            'latest_finish': latest_finish,
+            'slack': slack,
+            'duration': project_duration,
+            'critical_path': critical_path
+        }
+        return self._schedule
+
+    def to_dict(self, critical_only=False):
+        schedule = self.schedule()
+        tasks = []
+        for i in (self.index[task_id] for task_id in schedule['order']):
+            if critical_only and schedule['slack'][i] != 0:
+                continue
+            row = self.rows[i]
+            tasks.append({
+                'id': row.id,
+                'task_number': row.task_number,
+                'title': row.title,
+                'status': row.status.value,
+                'depends_on': row.depends_on,
+                'duration_hours': self.duration[i],
+                'earliest_start': schedule['earliest_start'][i],
+                'earliest_finish': schedule['earliest_finish'][i],
+                'latest_start': schedule['latest_start'][i],
+                'latest_finish': schedule['latest_finish'][i],
+                'slack': schedule['slack'][i],
+                'is_critical': schedule['slack'][i] == 0
+            })
+        return {
+            'project_id': self.project_id,
+            'duration_hours': schedule['duration'],
+            'critical_path': schedule['critical_path'],
+            'task_count': len(self.ids),
+            'external_dependencies': self.external,
+            'tasks': tasks
+        }
+
+    @staticmethod
+    def would_create_cycle(task_id, depends_on):
+        """
+        True if making `task_id` depend on `depends_on` closes a cycle,
+        i.e. task_id is `depends_on` itself or one of its ancestors.
+        One recursive CTE up the depends_on chain.
+        """
+        if depends_on is None:
+            return False
+        if depends_on == task_id:
+            return True
+        chain = db.select(Task.id, Task.depends_on).where(Task.id == depends_on).cte(
+            'dependency_chain', recursive=True
+        )
+        parent = db.aliased(Task)
+        chain = chain.union(
+            db.select(parent.id, parent.depends_on).join(chain, parent.id == chain.c.depends_on)
+        )
+        return db.session.execute(
+            db.select(chain.c.id).where(chain.c.id == task_id).limit(1)
+        ).first() is not None
@@ -0,0 +1,175 @@
+from datetime import datetime
+import numpy as np
+from sqlalchemy import case, func
+from app import db
+from app.models.assignment import Assignment
+from app.models.project import Project, ProjectStatus
+from app.models.task import Task, TaskStatus
+
+# CPI or SPI below this flags a project as at risk
+RISK_THRESHOLD = 0.9
+
+
+def _ratio(numerator, denominator):
+    """Element-wise ratio; NaN where the denominator is zero"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / np.where(denominator > 0, denominator, 1), np.nan)
+
+
+def _value(number, digits=2):
+    return None if number is None or not np.isfinite(number) else round(float(number), digits)
+
+
+def indices(bac, pv, ev, ac):
+    """Earned-value indices and forecasts for arrays (or scalars) of BAC, PV, EV and AC"""
+    cpi = _ratio(ev, ac)
+    spi = _ratio(ev, pv)
+    # Without a cost performance yet, assume the plan holds
+    eac = np.where(np.isfinite(cpi) & (cpi > 0), _ratio(bac, np.where(np.isfinite(cpi), cpi, 0)), bac)
+    return {
+        'cpi': cpi,
+        'spi': spi,
+        'cv': ev - ac,
+        'sv': ev - pv,
+        'eac': eac,
+        'etc': np.maximum(eac - ac, 0),
+        'vac': bac - eac
+    }
+
+
+class EarnedValue:
+    """
+    Earned-value management over Project.budget
+    Work is measured in estimated hours of tasks:
+    - BAC: the budget (or the total estimate when there is no budget)
+    - PV: BAC x share of estimated work due by today; undated tasks are
+      planned linearly over the project's start/end dates
+    - EV: BAC x share of estimated work completed
+    - AC: logged hours (assignment hours, else task hours) x BAC / estimate
+    All projects of a company come from one aggregate query; the indices
+    are computed for every project at once.
+    """
+
+    @staticmethod
+    def load(company_id, include_archived=False):
+        logged = db.session.query(
+            Assignment.task_id.label('task_id'),
+            func.sum(Assignment.actual_hours).label('hours')
+        ).group_by(Assignment.task_id).subquery()
+
+        today = datetime.utcnow().date()
+        estimate = func.coalesce(Task.estimated_hours, 0)
+        task_hours = func.coalesce(logged.c.hours, 0)
+        actual = case((task_hours > 0, task_hours), else_=func.coalesce(Task.actual_hours, 0))
+
+        query = db.session.query(
+            Project.id,
+            Project.title,
+            Project.code,
+            Project.status,
+            Project.budget,
+            Project.estimated_hours,
+            Project.start_date,
+            Project.end_date,
+            func.coalesce(func.sum(estimate), 0),
+            func.coalesce(func.sum(case((Task.status == TaskStatus.COMPLETED, estimate), else_=0)), 0),
+            func.coalesce(func.sum(case((Task.due_date <= today, estimate), else_=0)), 0),
+            func.coalesce(func.sum(case((Task.due_date.is_(None), estimate), else_=0)), 0),
+            func.coalesce(func.sum(actual), 0)
+        ).outerjoin(
+            Task, Task.project_id == Project.id
+        ).outerjoin(
+            logged, logged.c.task_id == Task.id
+        ).filter(Project.company_id == company_id)
+        if not include_archived:
+            query = query.filter(Project.status != ProjectStatus.ARCHIVED)
+        return query.group_by(Project.id).order_by(Project.id).all()
+
+    @staticmethod
+    def compute(rows, today=None):
+        today = today or datetime.utcnow().date()
+        count = len(rows)
+
+        def column(index, default=0.0):
+            return np.fromiter(
+                (float(row[index]) if row[index] is not None else default for row in rows), dtype=float, count=count
+            )
+
+        budget = column(4)
+        project_estimate = column(5)
+        total = column(8)
+        completed = column(9)
+        due = column(10)
+        undated = column(11)
+        actual_hours = column(12)
+
+        # Share of the timeline elapsed, for tasks without a due date
+        start = np.fromiter((row[6].toordinal() if row[6] else np.nan for row in rows), dtype=float, count=count)
+        end = np.fromiter((row[7].toordinal() if row[7] else np.nan for row in rows), dtype=float, count=count)
+        now = today.toordinal()
+        elapsed = np.clip(_ratio(now - start, end - start), 0.0, 1.0)
+        # No usable timeline: planned once the end date has passed
+        elapsed = np.where(np.isfinite(elapsed), elapsed, np.where(end <= now, 1.0, 0.0))
+
+        # Hours are the unit of work; the budget converts them to cost
+        work = np.where(total > 0, total, project_estimate)
+        has_budget = budget > 0
+        bac = np.where(has_budget, budget, work)
+        rate = _ratio(bac, work)
+        rate = np.where(np.isfinite(rate), rate, 0.0)
+
+        planned_share = _ratio(due + undated * elapsed, total)
+        planned_share = np.where(np.isfinite(planned_share), planned_share, elapsed)
+        earned_share = _ratio(completed, total)
+        earned_share = np.where(np.isfinite(earned_share), earned_share, 0.0)
+
+        pv = bac * planned_share
+        ev = bac * earned_share
+        ac = actual_hours * rate
+        metrics = indices(bac, pv, ev, ac)
+        at_risk = (metrics['cpi'] < RISK_THRESHOLD) | (metrics['spi'] < RISK_THRESHOLD)
+
+        projects = []
+        for i, row in enumerate(rows):
+            projects.append({
+                'project_id': row[0],
+                'title': row[1],
+                'code': row[2],
+                'status': row[3].value,
+                'basis': 'budget' if has_budget[i] else 'hours',
+                'bac': _value(bac[i]),
+                'pv': _value(pv[i]),
+                'ev': _value(ev[i]),
+                'ac': _value(ac[i]),
+                'percent_complete': _value(earned_share[i] * 100, 1),
+                'percent_planned': _value(planned_share[i] * 100, 1),
+                **{name: _value(values[i], 3 if name in ('cpi', 'spi') else 2) for name, values in metrics.items()},
+                'at_risk': bool(at_risk[i])
+            })
+
+        def portfolio(mask, scale):
+            totals = [float((values * scale)[mask].sum()) for values in (bac, pv, ev, ac)]
+            summary = indices(*(np.array(total) for total in totals))
+            result = dict(zip(('bac', 'pv', 'ev', 'ac'), (round(total, 2) for total in totals)))
+            result.update({
+                name: _value(value, 3 if name in ('cpi', 'spi') else 2) for name, value in summary.items()
+            })
+            result['projects'] = int(mask.sum())
+            return result
+
+        # Cost totals only make sense across budgeted projects; hours cover every project
+        hours_scale = _ratio(np.ones(count), rate)
+        hours_scale = np.where(np.isfinite(hours_scale), hours_scale, 0.0)
+        return {
+            'as_of': today.isoformat(),
+            'projects': projects,
+            'portfolio': {
+                'budget': portfolio(has_budget, np.ones(count)),
+                'hours': portfolio(np.ones(count, dtype=bool), hours_scale),
+                'at_risk': int(at_risk.sum())
+            }
+        }
+
+    @staticmethod
+    def for_company(company_id, include_archived=False):
+        return EarnedValue.compute(EarnedValue.load(company_id, include_archived=include_archived))
@@ -0,0 +1,149 @@
+from datetime import datetime, timedelta
+import numpy as np
+from app import db
+from app.models.assignment import Assignment
+from app.models.project import Project
+from app.models.task import Task, TaskPriority, TaskStatus
+from app.models.user import User
+
+# Ratios within this band count as accurate (actual / estimated)
+ACCURATE_LOW = 0.8
+ACCURATE_HIGH = 1.25
+# Robust z-score of log(ratio) above which a task is an outlier
+OUTLIER_Z = 3.5
+MAX_OUTLIERS = 20
+
+
+def ratio_stats(ratios):
+    """Distribution of actual/estimated ratios; bias is the geometric mean drift"""
+    if not len(ratios):
+        return None
+    p10, p25, p50, p75, p90 = np.percentile(ratios, (10, 25, 50, 75, 90))
+    bias = float(np.exp(np.log(ratios).mean()) - 1)
+    return {
+        'count': int(len(ratios)),
+        'median_ratio': round(float(p50), 3),
+        'mean_ratio': round(float(ratios.mean()), 3),
+        'p10': round(float(p10), 3),
+        'p25': round(float(p25), 3),
+        'p75': round(float(p75), 3),
+        'p90': round(float(p90), 3),
+        'bias_pct': round(bias * 100, 1),
+        'accurate_pct': round(float(((ratios >= ACCURATE_LOW) & (ratios <= ACCURATE_HIGH)).mean()) * 100, 1),
+        'underestimated_pct': round(float((ratios > ACCURATE_HIGH).mean()) * 100, 1),
+        'overestimated_pct': round(float((ratios < ACCURATE_LOW).mean()) * 100, 1)
+    }
+
+
+def grouped_stats(keys, ratios, min_samples=1):
+    """ratio_stats per distinct key, using one sort instead of a mask per group"""
+    if not len(keys):
+        return {}
+    order = np.argsort(keys, kind='stable')
+    keys, ratios = keys[order], ratios[order]
+    unique, starts = np.unique(keys, return_index=True)
+    bounds = list(starts[1:]) + [len(keys)]
+    result = {}
+    for key, start, end in zip(unique.tolist(), starts, bounds):
+        if end - start >= min_samples:
+            result[key] = ratio_stats(ratios[start:end])
+    return result
+
+
+class EstimationAccuracy:
+    """
+    Estimate-vs-actual analytics for completed tasks
+    Fetches (task, project, priority, estimate, actual, assignee) columns of
+    the company's completed tasks in one query and computes per-user,
+    per-project and per-priority ratio distributions with NumPy. A task
+    with several assignees counts once towards each of them.
+    """
+
+    @staticmethod
+    def load(company_id, days=None, project_id=None):
+        query = db.session.query(
+            Task.id,
+            Task.project_id,
+            Task.priority,
+            Task.estimated_hours,
+            Task.actual_hours,
+            Assignment.user_id
+        ).outerjoin(
+            Assignment, Assignment.task_id == Task.id
+        ).filter(
+            Task.company_id == company_id,
+            Task.status == TaskStatus.COMPLETED,
+            Task.estimated_hours > 0,
+            Task.actual_hours > 0
+        )
+        if days:
+            query = query.filter(Task.completed_date >= datetime.utcnow().date() - timedelta(days=days))
+        if project_id:
+            query = query.filter(Task.project_id == project_id)
+        return query.all()
+
+    @staticmethod
+    def analyze(company_id, days=None, project_id=None, min_samples=3):
+        rows = EstimationAccuracy.load(company_id, days=days, project_id=project_id)
+        count = len(rows)
+        task_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=count)
+        projects = np.fromiter((row[1] for row in rows), dtype=np.int64, count=count)
+        priorities = np.array([row[2].value for row in rows], dtype=object)
+        estimated = np.fromiter((row[3] for row in rows), dtype=float, count=count)
+        actual = np.fromiter((row[4] for row in rows), dtype=float, count=count)
+        users = np.fromiter((row[5] if row[5] is not None else -1 for row in rows), dtype=np.int64, count=count)
+        ratios = actual / estimated if count else np.zeros(0)
+
+        # Task-level figures count each task once, whatever its assignees
+        _, first = np.unique(task_ids, return_index=True)
+        task_ratios = ratios[first]
+
+        outliers = []
+        if len(task_ratios):
+            logs = np.log(task_ratios)
+            median = np.median(logs)
+            mad = np.median(np.abs(logs - median))
+            z = 0.6745 * (logs - median) / mad if mad > 0 else np.zeros_like(logs)
+            flagged = first[np.abs(z) > OUTLIER_Z]
+            flagged = flagged[np.argsort(-np.abs(np.log(ratios[flagged])))][:MAX_OUTLIERS]
+            outliers = [{
+                'task_id': int(task_ids[i]),
+                'project_id': int(projects[i]),
+                'estimated_hours': int(estimated[i]),
+                'actual_hours': int(actual[i]),
+                'ratio': round(float(ratios[i]), 3)
+            } for i in flagged]
+
+        priority_order = {priority.value: i for i, priority in enumerate(TaskPriority)}
+        by_priority = grouped_stats(
+            np.array([priority_order[p] for p in priorities[first]], dtype=np.int64), task_ratios
+        )
+        by_project = grouped_stats(projects[first], task_ratios, min_samples)
+        assigned = users >= 0
+        by_user = grouped_stats(users[assigned], ratios[assigned], min_samples)
+
+        names = dict(db.session.query(Project.id, Project.title).filter(Project.id.in_(list(by_project)))) if by_project else {}
+        people = {
+            row[0]: f"{row[1]} {row[2]}"
+            for row in db.session.query(User.id, User.first_name, User.last_name).filter(User.id.in_(list(by_user)))
+        } if by_user else {}
+        priority_names = list(TaskPriority)
+
+        return {
+            'filters': {'days': days, 'project_id': project_id, 'min_samples': min_samples},
+            'overall': ratio_stats(task_ratios),
+            'total_estimated_hours': int(estimated[first].sum()) if len(first) else 0,
+            'total_actual_hours': int(actual[first].sum()) if len(first) else 0,
+            'by_priority': [
+                dict(stats, priority=priority_names[key].value) for key, stats in by_priority.items()
+            ],
+            'by_project': sorted(
+                (dict(stats, project_id=key, title=names.get(key)) for key, stats in by_project.items()),
+                key=lambda item: -abs(item['bias_pct'])
+            ),
+            'by_user': sorted(
+                (dict(stats, user_id=key, name=people.get(key)) for key, stats in by_user.items()),
+                key=lambda item: -abs(item['bias_pct'])
+            ),
+            'outliers': outliers
+        }
@@ -0,0 +1,176 @@
+from datetime import datetime, time, timedelta
+import numpy as np
+from app import db
+from app.models.task import Task, TaskStatus
+from app.models.task_status_change import TaskStatusChange
+
+STATUSES = list(TaskStatus)
+STATUS_INDEX = {status: i for i, status in enumerate(STATUSES)}
+
+PERCENTILES = (50, 85, 95)
+
+_EPOCH = datetime(1970, 1, 1)
+_DAY = 86400.0
+
+
+def _seconds(moment):
+    """Naive UTC datetime (or date) -> seconds since the epoch"""
+    if not isinstance(moment, datetime):
+        moment = datetime.combine(moment, time.min)
+    return (moment - _EPOCH).total_seconds()
+
+
+def percentile_summary(values):
+    """Count, mean and percentiles of a 1-D array, in days"""
+    if not len(values):
+        return {'count': 0, 'mean': None, **{f'p{p}': None for p in PERCENTILES}}
+    points = np.percentile(values, PERCENTILES)
+    summary = {'count': int(len(values)), 'mean': round(float(values.mean()), 2)}
+    summary.update({f'p{p}': round(float(v), 2) for p, v in zip(PERCENTILES, points)})
+    return summary
+
+
+class FlowMetrics:
+    """
+    Lead time, cycle time, time in status and cumulative flow for a project
+    Tasks and their status changes are read with one query each and turned
+    into status segments (task, status, start, end); every metric is then
+    an array operation over those segments.
+    - Lead time: created -> last move to completed
+    - Cycle time: first move to in progress -> last move to completed
+    Completed tasks without any logged change fall back to completed_date.
+    """
+
+    @staticmethod
+    def load(project_id):
+        tasks = db.session.query(
+            Task.id, Task.status, Task.created_at, Task.completed_date
+        ).filter(Task.project_id == project_id).order_by(Task.id).all()
+        changes = db.session.query(
+            TaskStatusChange.task_id,
+            TaskStatusChange.from_status,
+            TaskStatusChange.to_status,
+            TaskStatusChange.changed_at
+        ).filter(
+            TaskStatusChange.project_id == project_id
+        ).order_by(TaskStatusChange.task_id, TaskStatusChange.changed_at, TaskStatusChange.id).all()
+        return tasks, changes
+
+    @staticmethod
+    def segments(tasks, changes):
+        """
+        Arrays (task_index, status, start, end) in seconds; the current
+        status of each task is an open segment with an infinite end
+        """
+        index = {row[0]: i for i, row in enumerate(tasks)}
+        changes = [row for row in changes if row[0] in index]
+        created = np.fromiter((_seconds(row[2]) for row in tasks), dtype=float, count=len(tasks))
+        current = np.fromiter((STATUS_INDEX[row[1]] for row in tasks), dtype=np.int64, count=len(tasks))
+
+        change_task = np.fromiter((index[row[0]] for row in changes), dtype=np.int64, count=len(changes))
+        change_from = np.fromiter(
+            (STATUS_INDEX[row[1]] if row[1] is not None else -1 for row in changes),
+            dtype=np.int64, count=len(changes)
+        )
+        change_to = np.fromiter((STATUS_INDEX[row[2]] for row in changes), dtype=np.int64, count=len(changes))
+        change_at = np.fromiter((_seconds(row[3]) for row in changes), dtype=float, count=len(changes))
+
+        # Each change closes the segment opened by the previous change of the
+        # same task, or by the task's creation for its first change
+        first = np.ones(len(changes), dtype=bool)
+        first[1:] = change_task[1:] != change_task[:-1]
+        previous_at = np.empty_like(change_at)
+        previous_at[first] = created[change_task[first]]
+        previous_at[~first] = change_at[np.flatnonzero(~first) - 1]
+        previous_to = np.empty_like(change_to)
+        previous_to[~first] = change_to[np.flatnonzero(~first) - 1]
+        closed_status = np.where(first, change_from, previous_to)
+        closed_status = np.where(closed_status < 0, change_to, closed_status)
+
+        # The open segment starts at each task's last change, or its creation
+        last_change = np.full(len(tasks), np.nan)
+        np.fmax.at(last_change, change_task, change_at)
+        open_start = np.where(np.isnan(last_change), created, last_change)
+
+        task_index = np.concatenate([change_task, np.arange(len(tasks))])
+        status = np.concatenate([closed_status, current])
+        start = np.concatenate([previous_at, open_start])
+        end = np.concatenate([change_at, np.full(len(tasks), np.inf)])
+        end = np.maximum(end, start)
+        return task_index, status, start, end, created, change_task, change_to, change_at
+
+    @staticmethod
+    def compute(tasks, changes, days=30, now=None):
+        now_dt = now or datetime.utcnow()
+        now = _seconds(now_dt)
+        task_index, status, start, end, created, change_task, change_to, change_at = \
+            FlowMetrics.segments(tasks, changes)
+        count = len(tasks)
+        done = STATUS_INDEX[TaskStatus.COMPLETED]
+        in_progress = STATUS_INDEX[TaskStatus.IN_PROGRESS]
+        is_completed = np.fromiter((row[1] == TaskStatus.COMPLETED for row in tasks), dtype=bool, count=count)
+
+        # Completion: last move into completed, else the completed_date
+        completed_at = np.full(count, np.nan)
+        into_done = change_to == done
+        np.fmax.at(completed_at, change_task[into_done], change_at[into_done])
+        fallback = np.fromiter(
+            (_seconds(row[3]) if row[3] else np.nan for row in tasks), dtype=float, count=count
+        )
+        completed_at = np.where(np.isnan(completed_at), fallback, completed_at)
+        finished = is_completed & ~np.isnan(completed_at)
+
+        # Start of work: first move into in progress
+        started_at = np.full(count, np.nan)
+        into_progress = change_to == in_progress
+        np.fmin.at(started_at, change_task[into_progress], change_at[into_progress])
+
+        lead = (completed_at[finished] - created[finished]) / _DAY
+        cycle_mask = finished & ~np.isnan(started_at)
+        cycle = (completed_at[cycle_mask] - started_at[cycle_mask]) / _DAY
+
+        # Time in status: total per (task, status), summarized over the tasks that visited it
+        durations = (np.minimum(end, now) - np.minimum(start, now)) / _DAY
+        per_task = np.bincount(
+            task_index * len(STATUSES) + status, weights=durations, minlength=count * len(STATUSES)
+        ).reshape(count, len(STATUSES))
+        visited = np.zeros((count, len(STATUSES)), dtype=bool)
+        visited[task_index, status] = True
+        time_in_status = {
+            s.value: dict(
+                percentile_summary(per_task[visited[:, i], i]),
+                total_days=round(float(per_task[:, i].sum()), 2)
+            )
+            for i, s in enumerate(STATUSES)
+        }
+
+        # Cumulative flow: tasks in each status at the end of each day
+        today = now_dt.date()
+        day_list = [today - timedelta(days=offset) for offset in range(days - 1, -1, -1)]
+        day_ends = np.array([_seconds(day + timedelta(days=1)) for day in day_list]) - 1e-6
+        day_ends = np.minimum(day_ends, now)
+        flow = {}
+        for i, s in enumerate(STATUSES):
+            mask = status == i
+            starts = np.sort(start[mask])
+            ends = np.sort(end[mask])
+            in_status = np.searchsorted(starts, day_ends, side='right') - np.searchsorted(ends, day_ends, side='right')
+            flow[s.value] = in_status.tolist()
+
+        return {
+            'tasks': count,
+            'completed': int(finished.sum()),
+            'status_changes': len(change_at),
+            'lead_time_days': percentile_summary(lead),
+            'cycle_time_days': percentile_summary(cycle),
+            'time_in_status_days': time_in_status,
+            'cumulative_flow': {
+                'dates': [day.isoformat() for day in day_list],
+                'statuses': flow
+            }
+        }
+
+    @staticmethod
+    def for_project(project_id, days=30):
+        tasks, changes = FlowMetrics.load(project_id)
+        return FlowMetrics.compute(tasks, changes, days=days)
@@ -0,0 +1,190 @@
+"""
+Per-company portfolio KPIs
+Commits that touch a company's projects, tasks, assignments or users only
+bump the version of its CompanyKpi row. The first read after that (or on
+a new day, since overdue counts depend on the date) recomputes the row
+with four grouped queries, so every dashboard endpoint shares one
+computation per change instead of rescanning the tenant per request.
+"""
+import json
+from datetime import datetime
+from sqlalchemy import case, func
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.analytics_snapshot import CompanyKpi
+from app.models.assignment import Assignment
+from app.models.project import Project, ProjectStatus, ProjectPriority
+from app.models.task import Task, TaskStatus, TaskPriority
+from app.models.user import User, UserRole
+from app.services.bulk_service import ACTIVE_TASK_STATUSES, chunked
+from app.utils.change_events import before_commit
+
+HISTOGRAMS = {
+    'project_status_counts': ProjectStatus,
+    'project_priority_counts': ProjectPriority,
+    'task_status_counts': TaskStatus,
+    'task_priority_counts': TaskPriority,
+    'user_role_counts': UserRole
+}
+TOTALS = (
+    'total_projects', 'overdue_projects', 'total_tasks', 'overdue_tasks', 'active_users',
+    'estimated_hours', 'actual_hours', 'capacity_hours', 'assigned_hours'
+)
+
+
+def empty_kpis():
+    values = {name: {member.value: 0 for member in enum} for name, enum in HISTOGRAMS.items()}
+    values.update(dict.fromkeys(TOTALS, 0))
+    return values
+
+
+class KpiService:
+    """Computes, stores and serves CompanyKpi rows"""
+
+    @staticmethod
+    def compute(company_ids, today=None):
+        """company_id -> KPI values, from one grouped query per table"""
+        today = today or datetime.utcnow().date()
+        results = {company_id: empty_kpis() for company_id in company_ids}
+
+        for chunk in chunked(list(results)):
+            project_overdue = case((
+                (Project.end_date < today) & Project.status.notin_([ProjectStatus.COMPLETED, ProjectStatus.ARCHIVED]), 1
+            ), else_=0)
+            for company_id, status, priority, count, overdue in db.session.query(
+                Project.company_id,
+                Project.status,
+                Project.priority,
+                func.count(Project.id),
+                func.sum(project_overdue)
+            ).filter(Project.company_id.in_(chunk)).group_by(Project.company_id, Project.status, Project.priority):
+                values = results[company_id]
+                values['project_status_counts'][status.value] += count
+                values['project_priority_counts'][priority.value] += count
+                values['total_projects'] += count
+                values['overdue_projects'] += int(overdue or 0)
+
+            task_overdue = case(((Task.due_date < today) & (Task.status != TaskStatus.COMPLETED), 1), else_=0)
+            for company_id, status, priority, count, overdue, estimated, actual in db.session.query(
+                Task.company_id,
+                Task.status,
+                Task.priority,
+                func.count(Task.id),
+                func.sum(task_overdue),
+                func.sum(Task.estimated_hours),
+                func.sum(Task.actual_hours)
+            ).filter(Task.company_id.in_(chunk)).group_by(Task.company_id, Task.status, Task.priority):
+                values = results[company_id]
+                values['task_status_counts'][status.value] += count
+                values['task_priority_counts'][priority.value] += count
+                values['total_tasks'] += count
+                values['overdue_tasks'] += int(overdue or 0)
+                values['estimated_hours'] += int(estimated or 0)
+                values['actual_hours'] += int(actual or 0)
+
+            for company_id, role, count, people, capacity in db.session.query(
+                User.company_id,
+                User.role,
+                func.count(User.id),
+                func.sum(case((User.is_bot == True, 0), else_=1)),
+                func.sum(User.weekly_capacity)
+            ).filter(User.company_id.in_(chunk), User.is_active == True).group_by(User.company_id, User.role):
+                values = results[company_id]
+                # User.role is a plain string column
+                role = role.value if isinstance(role, UserRole) else role
+                values['user_role_counts'][role] = values['user_role_counts'].get(role, 0) + count
+                values['active_users'] += int(people or 0)
+                values['capacity_hours'] += int(capacity or 0)
+
+            for company_id, assigned in db.session.query(
+                Assignment.company_id,
+                func.sum(Assignment.assigned_hours)
+            ).join(Task, Assignment.task_id == Task.id).filter(
+                Assignment.company_id.in_(chunk),
+                Task.status.in_(ACTIVE_TASK_STATUSES)
+            ).group_by(Assignment.company_id):
+                results[company_id]['assigned_hours'] += int(assigned or 0)
+
+        return results
+
+    @staticmethod
+    def _row_values(values, today, now):
+        row = {name: json.dumps(values[name]) for name in HISTOGRAMS}
+        row.update({name: values[name] for name in TOTALS})
+        row.update(computed_for=today, refreshed_at=now, updated_at=now)
+        return row
+
+    @staticmethod
+    def refresh(company_ids, today=None):
+        """Recompute and store the rows of the given companies; returns rows written"""
+        today = today or datetime.utcnow().date()
+        company_ids = [company_id for company_id in set(company_ids) if company_id is not None]
+        if not company_ids:
+            return 0
+
+        # Versions are read first: a commit landing mid-refresh leaves the row stale
+        existing = {}
+        for chunk in chunked(company_ids):
+            for company_id, row_id, version in db.session.query(
+                CompanyKpi.company_id, CompanyKpi.id, CompanyKpi.version
+            ).filter(CompanyKpi.company_id.in_(chunk)):
+                existing[company_id] = (row_id, version)
+
+        computed = KpiService.compute(company_ids, today=today)
+        now = datetime.utcnow()
+        updates = [
+            dict(KpiService._row_values(computed[company_id], today, now), id=row_id, refreshed_version=version)
+            for company_id, (row_id, version) in existing.items()
+        ]
+        for chunk in chunked(updates):
+            db.session.execute(db.update(CompanyKpi), chunk)
+
+        missing = [
+            dict(KpiService._row_values(values, today, now), company_id=company_id, version=0,
+                 refreshed_version=0, created_at=now)
+            for company_id, values in computed.items() if company_id not in existing
+        ]
+        if missing:
+            try:
+                with db.session.begin_nested():
+                    for chunk in chunked(missing):
+                        db.session.execute(CompanyKpi.__table__.insert(), chunk)
+            except IntegrityError:
+                # Another request created the row first; it is refreshed on a later read
+                pass
+        return len(computed)
+
+    @staticmethod
+    def is_stale(kpi, today=None):
+        today = today or datetime.utcnow().date()
+        return kpi.refreshed_version != kpi.version or kpi.computed_for != today
+
+    @staticmethod
+    def get(company_id):
+        """The company's CompanyKpi, recomputed and committed first when stale"""
+        kpi = CompanyKpi.query.filter_by(company_id=company_id).first()
+        if kpi is None or KpiService.is_stale(kpi):
+            try:
+                KpiService.refresh([company_id])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            kpi = CompanyKpi.query.filter_by(company_id=company_id).first()
+        return kpi
+
+    @staticmethod
+    def mark_stale(session, company_ids):
+        """Bump the version of the companies' rows so the next read recomputes them"""
+        for chunk in chunked(list(company_ids)):
+            session.execute(
+                CompanyKpi.__table__.update().where(CompanyKpi.company_id.in_(chunk)).values(
+                    version=CompanyKpi.version + 1
+                )
+            )
+
+
+@before_commit
+def _mark_kpis_stale(session, changes):
+    if changes.companies:
+        KpiService.mark_stale(session, changes.companies)
@@ -0,0 +1,127 @@
+from sqlalchemy import case, func
+from app import db
+from app.models.assignment import Assignment
+from app.models.task import Task, TaskStatus
+from app.models.user import User
+from app.utils.cache import TTLCache
+from app.utils.change_events import on_commit
+
+# project_id -> task and hour stats; dropped whenever the project's tasks or assignments change
+project_stats_cache = TTLCache(maxsize=2048, ttl=600)
+
+
+@on_commit
+def _invalidate_project_stats(changes):
+    for project_id in changes.projects:
+        project_stats_cache.invalidate(project_id)
+
+
+def completion_from_counts(total, completed):
+    """Same rounding as Project.completion_percentage"""
+    if not total:
+        return 0
+    return round((completed / total) * 100, 2)
+
+
+class ProjectStatsService:
+    """Aggregated per-project task statistics"""
+
+    @staticmethod
+    def task_histograms(project_ids):
+        """
+        Status histogram and hour sums for many projects in one
+        conditional-aggregate query, grouped by project
+        """
+        if not project_ids:
+            return {}
+
+        columns = [func.count(Task.id)]
+        for status in TaskStatus:
+            columns.append(func.sum(case((Task.status == status, 1), else_=0)))
+        columns.append(func.coalesce(func.sum(Task.estimated_hours), 0))
+        columns.append(func.coalesce(func.sum(Task.actual_hours), 0))
+
+        rows = db.session.query(Task.project_id, *columns).filter(
+            Task.project_id.in_(project_ids)
+        ).group_by(Task.project_id).all()
+
+        histograms = {
+            project_id: {
+                'total': 0,
+                'by_status': {status.value: 0 for status in TaskStatus},
+                'estimated_hours': 0,
+                'actual_hours': 0
+            }
+            for project_id in project_ids
+        }
+        for row in rows:
+            project_id, total = row[0], row[1]
+            status_counts = row[2:2 + len(TaskStatus)]
+            histograms[project_id] = {
+                'total': total,
+                'by_status': {status.value: int(count or 0) for status, count in zip(TaskStatus, status_counts)},
+                'estimated_hours': int(row[-2] or 0),
+                'actual_hours': int(row[-1] or 0)
+            }
+        return histograms
+
+    @staticmethod
+    def team_members(project_id):
+        """Distinct users assigned to any task of the project, one query"""
+        return db.session.query(User).join(Assignment, Assignment.user_id == User.id).join(Task).filter(
+            Task.project_id == project_id
+        ).distinct().all()
+
+    @staticmethod
+    def compute(project_id):
+        histogram = ProjectStatsService.task_histograms([project_id])[project_id]
+        by_status = histogram['by_status']
+        estimated = histogram['estimated_hours']
+        actual = histogram['actual_hours']
+
+        return {
+            'tasks': {
+                'total': histogram['total'],
+                'completed': by_status['completed'],
+                'in_progress': by_status['in_progress'],
+                'todo': by_status['todo'],
+                'review': by_status['review'],
+                'blocked': by_status['blocked'],
+                'completion_percentage': completion_from_counts(histogram['total'], by_status['completed'])
+            },
+            'hours': {
+                'estimated': estimated,
+                'actual': actual,
+                'remaining': max(0, estimated - actual),
+                'variance': actual - estimated
+            }
+        }
+
+    @staticmethod
+    def get_stats(project):
+        """
+        Stats for a project; task and hour figures are served from cache until
+        its tasks or assignments change. The roster is always read fresh, since
+        member edits (name, capacity, active flag) do not touch the project.
+        """
+        cached = project_stats_cache.get_or_compute(
+            project.id,
+            lambda: ProjectStatsService.compute(project.id)
+        )
+        members = ProjectStatsService.team_members(project.id)
+
+        stats = {
+            'project': project.to_dict(completion_percentage=cached['tasks']['completion_percentage']),
+            'tasks': dict(cached['tasks']),
+            'hours': dict(cached['hours']),
+            'team': {
+                'size': len(members),
+                'members': [member.to_dict() for member in members]
+            },
+            # Time dependent, never cached
+            'timeline': {
+                'is_overdue': project.is_overdue,
+                'days_remaining': project.days_remaining
+            }
+        }
+        return stats
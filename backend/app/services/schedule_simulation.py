@@ -0,0 +1,226 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+import numpy as np
+from flask import current_app
+from app import db
+from app.models.assignment import Assignment
+from app.models.task import Task, TaskStatus
+from app.models.user import User
+from app.services.bulk_service import ACTIVE_TASK_STATUSES
+from app.services.dependency_graph import DependencyGraph
+from app.utils.cache import TTLCache
+from app.utils.change_events import on_commit
+
+PERCENTILES = (50, 80, 95)
+DEFAULT_ITERATIONS = 5000
+MAX_ITERATIONS = 100000
+
+# Fewer completed tasks than this and the fallback spread is used
+MIN_HISTORY = 5
+# Log-normal sigma of the actual/estimated ratio without enough history
+FALLBACK_SIGMA = 0.35
+# Estimate for open tasks without one, when no task in the project has one
+DEFAULT_TASK_HOURS = 8
+# Calendar-day throughput of one person working a 40h week
+PERSON_HOURS_PER_DAY = 40 / 7
+# Below this many iterations the simulation runs in the request thread
+INLINE_ITERATIONS = 20000
+# Cells of each (runs x tasks) matrix simulated at once
+BLOCK_CELLS = 1000000
+
+# project_id -> {iterations: result}; dropped whenever the project's tasks change
+simulation_cache = TTLCache(maxsize=256, ttl=900)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+@on_commit
+def _invalidate_simulations(changes):
+    for project_id in changes.projects:
+        simulation_cache.invalidate(project_id)
+
+
+def _get_pool():
+    """Shared process pool; spawned workers share no state with the web process"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=current_app.config.get('SIMULATION_WORKERS', 2),
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def simulate_chunk(estimates, parent, order, ratios, sigma, team_hours_per_day, iterations, seed):
+    """
+    Simulated finish, in calendar days, of `iterations` runs of one project
+    Each run draws an actual/estimated ratio per task (bootstrapped from
+    `ratios`, or log-normal with `sigma` when there is no history) and
+    propagates finish times along the depends_on forest in topological
+    order, one column of all runs at a time. A run ends at the later of its
+    longest chain, worked by one person, and its total work spread over the
+    team. Pure NumPy so it can run in a worker process.
+    """
+    rng = np.random.default_rng(seed)
+    tasks = len(estimates)
+    if tasks == 0:
+        return np.zeros(iterations)
+
+    # Runs are simulated in blocks to bound the (runs x tasks) matrices
+    block = max(1, BLOCK_CELLS // tasks)
+    results = []
+    for first in range(0, iterations, block):
+        runs = min(block, iterations - first)
+        if len(ratios):
+            sampled = ratios[rng.integers(0, len(ratios), size=(runs, tasks))]
+        else:
+            sampled = rng.lognormal(mean=-sigma ** 2 / 2, sigma=sigma, size=(runs, tasks))
+        durations = sampled * estimates[None, :]
+
+        finish = np.zeros((runs, tasks))
+        for i in order:
+            p = parent[i]
+            finish[:, i] = durations[:, i] + (finish[:, p] if p >= 0 else 0.0)
+
+        chain_days = finish.max(axis=1) / PERSON_HOURS_PER_DAY
+        work_days = durations.sum(axis=1) / team_hours_per_day
+        results.append(np.maximum(chain_days, work_days))
+    return np.concatenate(results)
+
+
+class ScheduleSimulation:
+    """
+    Monte Carlo completion forecast for one project
+    Historical actual/estimated ratios of the company's completed tasks
+    drive the durations of the project's open tasks; iterations are split
+    across a process pool and summarized as P50/P80/P95 completion dates.
+    """
+
+    @staticmethod
+    def history(company_id):
+        """actual/estimated ratios of the company's completed, estimated tasks (one query)"""
+        rows = db.session.query(Task.estimated_hours, Task.actual_hours).filter(
+            Task.company_id == company_id,
+            Task.status == TaskStatus.COMPLETED,
+            Task.estimated_hours > 0,
+            Task.actual_hours > 0
+        ).all()
+        if not rows:
+            return np.zeros(0)
+        values = np.array(rows, dtype=float)
+        return values[:, 1] / values[:, 0]
+
+    @staticmethod
+    def team_hours_per_day(project_id):
+        """Calendar-day capacity of the users working on the project's open tasks"""
+        capacity = db.session.query(db.func.sum(User.weekly_capacity)).filter(
+            User.id.in_(
+                db.select(Assignment.user_id).join(Task, Task.id == Assignment.task_id).where(
+                    Task.project_id == project_id,
+                    Task.status.in_(ACTIVE_TASK_STATUSES)
+                )
+            ),
+            User.is_active == True
+        ).scalar() or 0
+        return max(capacity / 7, PERSON_HOURS_PER_DAY)
+
+    @staticmethod
+    def inputs(project):
+        """Arrays for simulate_chunk; raises DependencyCycleError on a cyclic graph"""
+        graph = DependencyGraph.for_project(project.id)
+        order = np.array(graph.topological_order(), dtype=np.int64)
+        is_open = np.array([row.status != TaskStatus.COMPLETED for row in graph.rows], dtype=bool)
+        estimates = np.array([row.estimated_hours or 0 for row in graph.rows], dtype=float)
+        missing = is_open & (estimates <= 0)
+        known = estimates[is_open & (estimates > 0)]
+        fill = float(np.median(known)) if len(known) else DEFAULT_TASK_HOURS
+        estimates = np.where(missing, fill, estimates)
+        estimates = np.where(is_open, estimates, 0.0)
+        return {
+            'estimates': estimates,
+            'parent': np.array(graph.parent, dtype=np.int64),
+            'order': order,
+            'open_tasks': int(is_open.sum()),
+            'unestimated_tasks': int(missing.sum())
+        }
+
+    @staticmethod
+    def run(inputs, ratios, team_hours_per_day, iterations, seed=None):
+        """Run the iterations, split over the process pool when there are many"""
+        args = (inputs['estimates'], inputs['parent'], inputs['order'], ratios, FALLBACK_SIGMA, team_hours_per_day)
+        if iterations <= INLINE_ITERATIONS:
+            return simulate_chunk(*args, iterations, seed)
+
+        workers = current_app.config.get('SIMULATION_WORKERS', 2)
+        sizes = [iterations // workers + (1 if i < iterations % workers else 0) for i in range(workers)]
+        seeds = np.random.SeedSequence(seed).spawn(workers)
+        try:
+            futures = [_get_pool().submit(simulate_chunk, *args, size, child) for size, child in zip(sizes, seeds)]
+            return np.concatenate([future.result() for future in futures])
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool next time and finish here
+            _reset_pool()
+            return simulate_chunk(*args, iterations, seed)
+
+    @staticmethod
+    def forecast(project, iterations=DEFAULT_ITERATIONS):
+        """Cached until one of the project's tasks changes"""
+        results = simulation_cache.get(project.id) or {}
+        if iterations not in results:
+            results = dict(results)
+            results[iterations] = ScheduleSimulation._forecast(project, iterations)
+            simulation_cache.set(project.id, results)
+        return results[iterations]
+
+    @staticmethod
+    def _forecast(project, iterations):
+        inputs = ScheduleSimulation.inputs(project)
+        ratios = ScheduleSimulation.history(project.company_id)
+        history_size = len(ratios)
+        if history_size < MIN_HISTORY:
+            ratios = np.zeros(0)
+        team = ScheduleSimulation.team_hours_per_day(project.id)
+        days = ScheduleSimulation.run(inputs, ratios, team, iterations)
+
+        today = datetime.utcnow().date()
+        points = np.percentile(days, PERCENTILES)
+        percentiles = {
+            f'p{p}': {
+                'days': int(np.ceil(value)),
+                'date': (today + timedelta(days=int(np.ceil(value)))).isoformat()
+            }
+            for p, value in zip(PERCENTILES, points)
+        }
+        end_date = project.end_date
+        return {
+            'project_id': project.id,
+            'iterations': iterations,
+            'open_tasks': inputs['open_tasks'],
+            'unestimated_tasks': inputs['unestimated_tasks'],
+            'remaining_hours': round(float(inputs['estimates'].sum()), 2),
+            'team_hours_per_day': round(team, 2),
+            'history': {
+                'completed_tasks': history_size,
+                'used': history_size >= MIN_HISTORY,
+                'median_ratio': round(float(np.median(ratios)), 3) if len(ratios) else None
+            },
+            'mean_days': round(float(days.mean()), 2),
+            'percentiles': percentiles,
+            'end_date': end_date.isoformat() if end_date else None,
+            'on_time_probability': (
+                round(float((days <= (end_date - today).days).mean()) * 100, 1) if end_date else None
+            )
+        }
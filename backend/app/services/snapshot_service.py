@@ -0,0 +1,233 @@
+from datetime import datetime, time, timedelta
+from sqlalchemy import and_, case, func, or_
+from app import db
+from app.models.analytics_snapshot import CompanySnapshot, ProjectSnapshot, UserSnapshot
+from app.models.assignment import Assignment
+from app.models.company import Company
+from app.models.project import Project
+from app.models.task import Task, TaskStatus
+from app.models.user import User
+from app.services.bulk_service import chunked
+from app.utils.change_events import mark_changed
+
+METRICS = ('tasks_created', 'tasks_completed', 'tasks_open', 'tasks_overdue',
+           'estimated_hours', 'actual_hours', 'assigned_hours')
+
+
+def _day_bounds(day):
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+def _task_conditions(day):
+    """SQL conditions describing a task's state at the end of `day`"""
+    start, end = _day_bounds(day)
+    created = and_(Task.created_at >= start, Task.created_at < end)
+    completed = Task.completed_date == day
+    is_open = and_(
+        Task.created_at < end,
+        or_(
+            Task.completed_date > day,
+            and_(Task.completed_date.is_(None), Task.status != TaskStatus.COMPLETED)
+        )
+    )
+    overdue = and_(is_open, Task.due_date < day)
+    return created, completed, is_open, overdue
+
+
+def _count(condition):
+    return func.sum(case((condition, 1), else_=0))
+
+
+def _sum(condition, column):
+    return func.sum(case((condition, func.coalesce(column, 0)), else_=0))
+
+
+def utilization_rate(assigned, capacity):
+    """Same rounding as the team-workload endpoint"""
+    return round(assigned / capacity * 100, 2) if capacity else 0
+
+
+class SnapshotService:
+    """
+    Daily time-series rollups
+    One row per company, project and user per day, so trend charts read a
+    handful of compact rows instead of scanning tasks and assignments.
+    Re-running a day replaces its rows.
+    """
+
+    @staticmethod
+    def project_rows(day, company_id):
+        created, completed, is_open, overdue = _task_conditions(day)
+        _, end = _day_bounds(day)
+
+        task_rows = db.session.query(
+            Task.project_id,
+            _count(created),
+            _count(completed),
+            _count(is_open),
+            _count(overdue),
+            _sum(is_open, Task.estimated_hours),
+            _sum(completed, Task.actual_hours)
+        ).filter(
+            Task.company_id == company_id,
+            Task.created_at < end
+        ).group_by(Task.project_id).all()
+
+        assigned_rows = db.session.query(
+            Task.project_id,
+            func.sum(Assignment.assigned_hours)
+        ).join(Assignment, Assignment.task_id == Task.id).filter(
+            Task.company_id == company_id,
+            is_open
+        ).group_by(Task.project_id).all()
+        assigned = {project_id: int(hours or 0) for project_id, hours in assigned_rows}
+
+        project_ids = [
+            project_id for (project_id,) in db.session.query(Project.id).filter(
+                Project.company_id == company_id,
+                Project.created_at < end
+            )
+        ]
+        rows = {project_id: dict.fromkeys(METRICS, 0) for project_id in project_ids}
+        for project_id, *values in task_rows:
+            row = rows.setdefault(project_id, dict.fromkeys(METRICS, 0))
+            row.update(zip(METRICS[:6], (int(value or 0) for value in values)))
+        for project_id, row in rows.items():
+            row['assigned_hours'] = assigned.get(project_id, 0)
+        return rows
+
+    @staticmethod
+    def user_rows(day, company_id):
+        created, completed, is_open, overdue = _task_conditions(day)
+        _, end = _day_bounds(day)
+
+        assignment_rows = db.session.query(
+            Assignment.user_id,
+            _count(created),
+            _count(completed),
+            _count(is_open),
+            _count(overdue),
+            _sum(is_open, Task.estimated_hours),
+            _sum(completed, Assignment.actual_hours),
+            _sum(is_open, Assignment.assigned_hours)
+        ).join(Task, Assignment.task_id == Task.id).join(User, Assignment.user_id == User.id).filter(
+            User.company_id == company_id,
+            Task.created_at < end
+        ).group_by(Assignment.user_id).all()
+
+        users = db.session.query(User.id, User.weekly_capacity).filter(
+            User.company_id == company_id,
+            User.is_active == True,
+            User.is_bot == False
+        ).all()
+
+        rows = {}
+        for user_id, capacity in users:
+            rows[user_id] = dict.fromkeys(METRICS, 0)
+            rows[user_id]['capacity_hours'] = capacity or 0
+        for user_id, *values in assignment_rows:
+            if user_id not in rows:
+                continue
+            rows[user_id].update(zip(METRICS, (int(value or 0) for value in values)))
+        for row in rows.values():
+            row['utilization'] = utilization_rate(row['assigned_hours'], row['capacity_hours'])
+        return rows
+
+    @staticmethod
+    def rollup_company(day, company_id):
+        """Compute and store every snapshot level of one company for one day"""
+        projects = SnapshotService.project_rows(day, company_id)
+        users = SnapshotService.user_rows(day, company_id)
+
+        company = dict.fromkeys(METRICS, 0)
+        for row in projects.values():
+            for metric in METRICS:
+                company[metric] += row[metric]
+        company['active_users'] = len(users)
+        company['capacity_hours'] = sum(row['capacity_hours'] for row in users.values())
+        company['utilization'] = utilization_rate(company['assigned_hours'], company['capacity_hours'])
+
+        now = datetime.utcnow()
+        stamp = {'snapshot_date': day, 'company_id': company_id, 'created_at': now, 'updated_at': now}
+
+        for model in (CompanySnapshot, ProjectSnapshot, UserSnapshot):
+            model.query.filter(
+                model.company_id == company_id,
+                model.snapshot_date == day
+            ).delete(synchronize_session=False)
+
+        db.session.execute(CompanySnapshot.__table__.insert(), [dict(company, **stamp)])
+        for table, rows, key in (
+            (ProjectSnapshot.__table__, projects, 'project_id'),
+            (UserSnapshot.__table__, users, 'user_id')
+        ):
+            values = [dict(row, **stamp, **{key: row_id}) for row_id, row in rows.items()]
+            for chunk in chunked(values):
+                db.session.execute(table.insert(), chunk)
+
+        return {'projects': len(projects), 'users': len(users)}
+
+    @staticmethod
+    def rollup(start_date, end_date=None, company_ids=None):
+        """
+        Snapshot every day in [start_date, end_date] for the given companies
+        (all companies by default). Each day is committed on its own.
+        """
+        end_date = end_date or start_date
+        if company_ids is None:
+            company_ids = [company_id for (company_id,) in db.session.query(Company.id)]
+
+        summary = {'days': 0, 'companies': len(company_ids), 'project_rows': 0, 'user_rows': 0}
+        day = start_date
+        while day <= end_date:
+            for company_id in company_ids:
+                counts = SnapshotService.rollup_company(day, company_id)
+                summary['project_rows'] += counts['projects']
+                summary['user_rows'] += counts['users']
+            # Cached trend responses read these rows
+            mark_changed(companies=company_ids)
+            db.session.commit()
+            summary['days'] += 1
+            day += timedelta(days=1)
+        return summary
+
+    @staticmethod
+    def completions(company_id, start_date, end_date):
+        """
+        Tasks completed per day in [start_date, end_date] as {day: count}
+        Days with a company snapshot are read from it; days not rolled up
+        yet (today, typically) are counted from tasks with one grouped query.
+        """
+        counts = dict(
+            db.session.query(CompanySnapshot.snapshot_date, CompanySnapshot.tasks_completed).filter(
+                CompanySnapshot.company_id == company_id,
+                CompanySnapshot.snapshot_date >= start_date,
+                CompanySnapshot.snapshot_date <= end_date
+            ).all()
+        )
+        missing = [
+            start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)
+            if start_date + timedelta(days=offset) not in counts
+        ]
+        if missing:
+            live = dict(
+                db.session.query(Task.completed_date, func.count(Task.id)).filter(
+                    Task.company_id == company_id,
+                    Task.status == TaskStatus.COMPLETED,
+                    Task.completed_date >= missing[0],
+                    Task.completed_date <= missing[-1]
+                ).group_by(Task.completed_date).all()
+            )
+            for day in missing:
+                counts[day] = live.get(day, 0)
+        return counts
+
+    @staticmethod
+    def series(model, filters, start_date, end_date):
+        """Stored snapshot rows for one entity, oldest first"""
+        return model.query.filter(
+            *filters,
+            model.snapshot_date >= start_date,
+            model.snapshot_date <= end_date
+        ).order_by(model.snapshot_date.asc()).all()
@@ -0,0 +1,302 @@
+from datetime import datetime
+from app import db
+from app.models.project import Project
+from app.models.task import Task, TaskStatus, TaskPriority
+from app.models.user import UserRole
+from app.services.bulk_service import CHUNK_SIZE, chunked
+from app.utils.change_events import mark_changed
+
+# Columns understood by the JSON bulk endpoint and the CSV import
+IMPORT_FIELDS = (
+    'ref', 'project_id', 'project_code', 'title', 'description', 'status', 'priority',
+    'start_date', 'due_date', 'estimated_hours', 'depends_on', 'depends_on_ref'
+)
+
+
+def _text(value):
+    """Strip strings; treat empty CSV cells as missing"""
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def _int(value, field, errors):
+    if value is None:
+        return None
+    try:
+        number = int(value)
+    except (ValueError, TypeError):
+        errors.append(f'{field} must be an integer')
+        return None
+    return number
+
+
+def _date(value, field, errors):
+    if value is None:
+        return None
+    try:
+        return datetime.strptime(str(value), '%Y-%m-%d').date()
+    except ValueError:
+        errors.append(f'Invalid {field} format. Use YYYY-MM-DD')
+        return None
+
+
+class TaskImporter:
+    """
+    Bulk task creation pipeline shared by /api/tasks/bulk and the CSV import
+    Rows are fed in batches with add_batch(): each batch is validated with
+    one project lookup and one parent-task lookup. run() then resolves
+    references between imported rows in memory, allocates task numbers in
+    one block per project and inserts with executemany in chunks.
+    Rows may point at an existing task (depends_on) or at another row of the
+    same import via its `ref` (depends_on_ref).
+    """
+
+    def __init__(self, current_user):
+        self.current_user = current_user
+        self.rows = []        # Validated rows, in input order
+        self.errors = {}      # row number -> [messages]
+        self.refs = {}        # ref -> row number
+        self._projects = {}   # project id -> (id, code, manager_id)
+        self._codes = {}      # project code -> project id
+        self.total = 0
+
+    def _fail(self, row_number, message):
+        self.errors.setdefault(row_number, []).append(message)
+
+    def _load_projects(self, ids, codes):
+        ids = {pid for pid in ids if pid not in self._projects}
+        codes = {code for code in codes if code not in self._codes}
+        if not ids and not codes:
+            return
+        query = db.session.query(Project.id, Project.code, Project.manager_id).filter(
+            Project.company_id == self.current_user.company_id
+        )
+        conditions = []
+        if ids:
+            conditions.append(Project.id.in_(ids))
+        if codes:
+            conditions.append(Project.code.in_(codes))
+        for project_id, code, manager_id in query.filter(db.or_(*conditions)):
+            self._projects[project_id] = (project_id, code, manager_id)
+            self._codes[code] = project_id
+
+    def add_batch(self, batch):
+        """Validate a batch of (row_number, raw_dict) pairs, at most CHUNK_SIZE long"""
+        parsed = []
+        for row_number, raw in batch:
+            self.total += 1
+            errors = []
+            if not isinstance(raw, dict):
+                self._fail(row_number, 'Row must be an object')
+                continue
+            raw = {field: _text(raw.get(field)) for field in IMPORT_FIELDS}
+
+            row = {
+                'row': row_number,
+                'ref': str(raw['ref']) if raw['ref'] is not None else None,
+                'depends_on_ref': str(raw['depends_on_ref']) if raw['depends_on_ref'] is not None else None,
+                'project_id': _int(raw['project_id'], 'project_id', errors),
+                'project_code': raw['project_code'],
+                'title': raw['title'],
+                'description': raw['description'] or '',
+                'start_date': _date(raw['start_date'], 'start_date', errors),
+                'due_date': _date(raw['due_date'], 'due_date', errors),
+                'estimated_hours': _int(raw['estimated_hours'], 'estimated_hours', errors),
+                'depends_on': _int(raw['depends_on'], 'depends_on', errors),
+                'status': TaskStatus.TODO,
+                'priority': TaskPriority.MEDIUM
+            }
+
+            if not row['title']:
+                errors.append('title is required')
+            elif len(row['title']) > 200:
+                errors.append('title must be at most 200 characters')
+            if row['project_id'] is None and not row['project_code']:
+                errors.append('project_id or project_code is required')
+            if raw['status'] is not None:
+                try:
+                    row['status'] = TaskStatus[str(raw['status']).upper()]
+                except KeyError:
+                    errors.append('Invalid status')
+            if raw['priority'] is not None:
+                try:
+                    row['priority'] = TaskPriority[str(raw['priority']).upper()]
+                except KeyError:
+                    errors.append('Invalid priority')
+            if row['start_date'] and row['due_date'] and row['start_date'] > row['due_date']:
+                errors.append('Start date cannot be after due date')
+            if row['estimated_hours'] is not None and row['estimated_hours'] < 0:
+                errors.append('estimated_hours cannot be negative')
+            if row['depends_on'] is not None and row['depends_on_ref'] is not None:
+                errors.append('Use either depends_on or depends_on_ref, not both')
+            if row['ref'] is not None:
+                if row['ref'] in self.refs:
+                    errors.append(f"Duplicate ref '{row['ref']}'")
+                else:
+                    self.refs[row['ref']] = row_number
+
+            if errors:
+                self.errors[row_number] = errors
+            else:
+                parsed.append(row)
+
+        # One project lookup and one parent lookup for the whole batch
+        self._load_projects(
+            [row['project_id'] for row in parsed if row['project_id'] is not None],
+            [row['project_code'] for row in parsed if row['project_id'] is None]
+        )
+        parent_ids = {row['depends_on'] for row in parsed if row['depends_on'] is not None}
+        parents = dict(
+            db.session.query(Task.id, Task.project_id).filter(Task.id.in_(parent_ids)).all()
+        ) if parent_ids else {}
+
+        is_admin = self.current_user.role == UserRole.ADMIN
+        for row in parsed:
+            project_id = row['project_id'] if row['project_id'] is not None else self._codes.get(row['project_code'])
+            project = self._projects.get(project_id)
+            if not project:
+                self._fail(row['row'], 'Project not found')
+                continue
+            if not is_admin and project[2] != self.current_user.id:
+                self._fail(row['row'], 'You do not have permission to create tasks in this project')
+                continue
+            row['project_id'] = project_id
+            if row['depends_on'] is not None:
+                if row['depends_on'] not in parents:
+                    self._fail(row['row'], 'Parent task not found')
+                    continue
+                if parents[row['depends_on']] != project_id:
+                    self._fail(row['row'], 'Parent task must be in the same project')
+                    continue
+            self.rows.append(row)
+
+    def add_rows(self, rows, max_rows=None):
+        """
+        Validate an iterable of raw rows (e.g. a csv.DictReader) batch by batch
+        Returns False as soon as more than `max_rows` rows were seen.
+        """
+        batch = []
+        for row_number, raw in enumerate(rows, start=1):
+            if max_rows is not None and row_number > max_rows:
+                return False
+            batch.append((row_number, raw))
+            if len(batch) == CHUNK_SIZE:
+                self.add_batch(batch)
+                batch = []
+        if batch:
+            self.add_batch(batch)
+        return True
+
+    def _resolve_refs(self):
+        """Check depends_on_ref targets; rows whose parent row failed fail too"""
+        by_ref = {row['ref']: row for row in self.rows if row['ref'] is not None}
+        changed = True
+        while changed:
+            changed = False
+            for row in self.rows:
+                if row['row'] in self.errors or row['depends_on_ref'] is None:
+                    continue
+                parent = by_ref.get(row['depends_on_ref'])
+                if parent is None:
+                    if row['depends_on_ref'] in self.refs:
+                        message = f"Parent row {self.refs[row['depends_on_ref']]} is invalid"
+                    else:
+                        message = f"Unknown depends_on_ref '{row['depends_on_ref']}'"
+                    self._fail(row['row'], message)
+                    changed = True
+                elif parent['row'] in self.errors:
+                    self._fail(row['row'], f"Parent row {parent['row']} is invalid")
+                    changed = True
+                elif parent['project_id'] != row['project_id']:
+                    self._fail(row['row'], 'Parent task must be in the same project')
+                    changed = True
+
+        # Each row has at most one parent, so following refs finds any cycle
+        for row in self.rows:
+            if row['row'] in self.errors:
+                continue
+            seen = set()
+            node = row
+            while node is not None and node['depends_on_ref'] is not None:
+                if node['row'] in seen:
+                    self._fail(row['row'], 'depends_on_ref forms a cycle')
+                    break
+                seen.add(node['row'])
+                node = by_ref.get(node['depends_on_ref'])
+
+        self.rows = [row for row in self.rows if row['row'] not in self.errors]
+
+    def report(self, created=()):
+        return {
+            'total': self.total,
+            'created': len(created),
+            'failed': len(self.errors),
+            'tasks': list(created),
+            'errors': [{'row': row, 'errors': messages} for row, messages in sorted(self.errors.items())]
+        }
+
+    def run(self, atomic=False):
+        """
+        Insert every valid row; with atomic=True nothing is inserted if any
+        row failed. The caller commits. Returns the per-row report.
+        """
+        self._resolve_refs()
+        if (atomic and self.errors) or not self.rows:
+            return self.report()
+
+        # One counter increment per project for the whole import
+        per_project = {}
+        for row in self.rows:
+            per_project.setdefault(row['project_id'], []).append(row)
+        for project_id, rows in per_project.items():
+            numbers = Task.allocate_task_numbers(self._projects[project_id][1], len(rows))
+            for row, number in zip(rows, numbers):
+                row['task_number'] = number
+
+        today = datetime.utcnow().date()
+        values = [{
+            'title': row['title'],
+            'description': row['description'],
+            'task_number': row['task_number'],
+            'status': row['status'],
+            'priority': row['priority'],
+            'start_date': row['start_date'],
+            'due_date': row['due_date'],
+            'completed_date': today if row['status'] == TaskStatus.COMPLETED else None,
+            'estimated_hours': row['estimated_hours'],
+            'depends_on': row['depends_on'],
+            'project_id': row['project_id'],
+            'company_id': self.current_user.company_id,
+            'created_by': self.current_user.id
+        } for row in self.rows]
+
+        ids = []
+        for chunk in chunked(values, CHUNK_SIZE):
+            ids.extend(db.session.scalars(
+                db.insert(Task).returning(Task.id, sort_by_parameter_order=True),
+                chunk
+            ).all())
+        for row, task_id in zip(self.rows, ids):
+            row['id'] = task_id
+
+        # Second pass: point rows at parents created in this import
+        id_by_ref = {row['ref']: row['id'] for row in self.rows if row['ref'] is not None}
+        links = [
+            {'id': row['id'], 'depends_on': id_by_ref[row['depends_on_ref']]}
+            for row in self.rows if row['depends_on_ref'] is not None
+        ]
+        for chunk in chunked(links, CHUNK_SIZE):
+            db.session.execute(db.update(Task), chunk)
+
+        mark_changed(
+            projects=per_project.keys(),
+            tasks=ids,
+            companies=[self.current_user.company_id]
+        )
+
+        return self.report([
+            {'row': row['row'], 'ref': row['ref'], 'id': row['id'], 'task_number': row['task_number']}
+            for row in self.rows
+        ])
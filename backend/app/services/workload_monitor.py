@@ -0,0 +1,179 @@
+"""
+Incremental over-allocation detector
+Before each commit the users touched by the transaction (directly, or via
+an assignment or a task they work on) have their active workload
+recomputed in one aggregate query. Users who cross their weekly capacity
+get a WORKLOAD_WARNING, together with the managers of the projects they
+work on, in the same transaction.
+"""
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+from app.models.assignment import Assignment
+from app.models.notification import Notification, NotificationType
+from app.models.project import Project
+from app.models.task import Task
+from app.models.user import User
+from app.services.bulk_service import ACTIVE_TASK_STATUSES, CHUNK_SIZE, chunked
+from app.utils.cache import TTLCache
+from app.utils.change_events import before_commit
+from app.utils.notifications import create_notifications_bulk
+
+# user_id -> {'hours', 'capacity', 'overloaded'} as of the last committed check
+workload_cache = TTLCache(maxsize=10000, ttl=3600)
+
+# Default hours before the same warning may be sent again
+WARNING_INTERVAL_HOURS = 24
+
+
+def warning_title(first_name, last_name):
+    return f'Workload warning: {first_name} {last_name}'
+
+
+class WorkloadMonitor:
+    """Recomputes the workload of a handful of users and emits deduplicated warnings"""
+
+    @staticmethod
+    def affected_users(execute, changes):
+        """Users touched directly plus everyone assigned to a touched task"""
+        user_ids = set(changes.users)
+        for chunk in chunked(list(changes.tasks), CHUNK_SIZE):
+            rows = execute(
+                db.select(Assignment.user_id).where(Assignment.task_id.in_(chunk)).distinct()
+            ).all()
+            user_ids.update(row[0] for row in rows)
+        user_ids.discard(None)
+        return user_ids
+
+    @staticmethod
+    def workloads(execute, user_ids):
+        """(id, first_name, last_name, weekly_capacity, active_hours) for active human users"""
+        rows = []
+        for chunk in chunked(list(user_ids), CHUNK_SIZE):
+            rows.extend(execute(
+                db.select(
+                    User.id,
+                    User.first_name,
+                    User.last_name,
+                    User.weekly_capacity,
+                    db.func.coalesce(db.func.sum(
+                        db.case((Task.id.isnot(None), Assignment.assigned_hours), else_=0)
+                    ), 0)
+                ).outerjoin(
+                    Assignment, Assignment.user_id == User.id
+                ).outerjoin(
+                    Task, db.and_(Task.id == Assignment.task_id, Task.status.in_(ACTIVE_TASK_STATUSES))
+                ).where(
+                    User.id.in_(chunk),
+                    User.is_active == True,
+                    User.is_bot == False
+                ).group_by(User.id)
+            ).all())
+        return rows
+
+    @staticmethod
+    def managers(execute, user_ids):
+        """user_id -> managers of the projects where the user has active work"""
+        managers = {}
+        for chunk in chunked(list(user_ids), CHUNK_SIZE):
+            rows = execute(
+                db.select(Assignment.user_id, Project.manager_id).join(
+                    Task, Task.id == Assignment.task_id
+                ).join(
+                    Project, Project.id == Task.project_id
+                ).where(
+                    Assignment.user_id.in_(chunk),
+                    Task.status.in_(ACTIVE_TASK_STATUSES),
+                    Project.manager_id.isnot(None),
+                    Project.manager_id != Assignment.user_id
+                ).distinct()
+            ).all()
+            for user_id, manager_id in rows:
+                managers.setdefault(user_id, set()).add(manager_id)
+        return managers
+
+    @staticmethod
+    def check(session, changes, interval_hours=WARNING_INTERVAL_HOURS):
+        """
+        Recompute the affected users' load and queue warnings for new overloads
+        Returns the new cache states, applied once the transaction commits.
+        """
+        execute = session.execute
+        user_ids = WorkloadMonitor.affected_users(execute, changes)
+        if not user_ids:
+            return {}
+
+        states = {}
+        overloaded = []
+        for user_id, first_name, last_name, capacity, hours in WorkloadMonitor.workloads(execute, user_ids):
+            capacity = capacity or 0
+            hours = int(hours or 0)
+            state = {'hours': hours, 'capacity': capacity, 'overloaded': hours > capacity}
+            states[user_id] = state
+            previous = workload_cache.get(user_id)
+            # Still over capacity since the last check: already warned
+            if state['overloaded'] and not (previous and previous['overloaded']):
+                overloaded.append((user_id, first_name, last_name, capacity, hours))
+
+        if not overloaded:
+            return states
+
+        managers = WorkloadMonitor.managers(execute, [row[0] for row in overloaded])
+        entries = []
+        for user_id, first_name, last_name, capacity, hours in overloaded:
+            title = warning_title(first_name, last_name)
+            entries.append({
+                'user_id': user_id,
+                'notif_type': NotificationType.WORKLOAD_WARNING,
+                'title': title,
+                'message': f'You have {hours}h of active work assigned, above your weekly capacity of {capacity}h.'
+            })
+            for manager_id in sorted(managers.get(user_id, ())):
+                entries.append({
+                    'user_id': manager_id,
+                    'notif_type': NotificationType.WORKLOAD_WARNING,
+                    'title': title,
+                    'message': f'{first_name} {last_name} has {hours}h of active work assigned, above a weekly capacity of {capacity}h.'
+                })
+
+        # Skip warnings whose recipient has an unread or recent copy
+        since = datetime.utcnow() - timedelta(hours=interval_hours)
+        sent = set()
+        recipients = {entry['user_id'] for entry in entries}
+        titles = {entry['title'] for entry in entries}
+        for chunk in chunked(list(recipients), CHUNK_SIZE):
+            sent.update(tuple(row) for row in execute(
+                db.select(Notification.user_id, Notification.title).where(
+                    Notification.user_id.in_(chunk),
+                    Notification.type == NotificationType.WORKLOAD_WARNING,
+                    Notification.title.in_(titles),
+                    db.or_(Notification.is_read == False, Notification.created_at >= since)
+                )
+            ).all())
+        entries = [entry for entry in entries if (entry['user_id'], entry['title']) not in sent]
+        create_notifications_bulk(entries)
+        return states
+
+
+@before_commit
+def _detect_overallocation(session, changes):
+    if not (changes.users or changes.tasks):
+        return
+    interval = current_app.config.get('WORKLOAD_WARNING_INTERVAL_HOURS', WARNING_INTERVAL_HOURS)
+    session.info['workload_states'] = WorkloadMonitor.check(session, changes, interval)
+
+
+@event.listens_for(Session, 'after_commit')
+def _store_workloads(session):
+    if session.in_nested_transaction():
+        return
+    for user_id, state in session.info.pop('workload_states', {}).items():
+        workload_cache.set(user_id, state)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_workloads(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop('workload_states', None)
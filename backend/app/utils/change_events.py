@@ -0,0 +1,170 @@
+"""
+Write tracking for cache invalidation
+Collects the companies, projects and tasks touched by a transaction (from
+ORM flushes, or reported explicitly by set-based statements) and hands them
+to the registered listeners: before_commit listeners write derived rows in
+the committing transaction, on_commit listeners run once it has committed.
+"""
+import logging
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app import db
+from app.models.assignment import Assignment
+from app.models.comment import Comment
+from app.models.project import Project
+from app.models.task import Task
+from app.models.user import User
+
+_listeners = []
+_before_commit_listeners = []
+
+
+class ChangeSet:
+    """Ids touched by one transaction"""
+
+    def __init__(self):
+        self.companies = set()
+        self.projects = set()
+        self.tasks = set()
+        self.users = set()
+
+    def __bool__(self):
+        return bool(self.companies or self.projects or self.tasks or self.users)
+
+
+def on_commit(fn):
+    """Register `fn(changes)` to run after every commit that touched tracked rows"""
+    _listeners.append(fn)
+    return fn
+
+
+def before_commit(fn):
+    """
+    Register `fn(session, changes)` to run inside every committing
+    transaction that touched tracked rows, after the one shared flush
+    """
+    _before_commit_listeners.append(fn)
+    return fn
+
+
+def _logger():
+    return current_app.logger if has_app_context() else logging.getLogger(__name__)
+
+
+def _pending(session):
+    return session.info.setdefault('pending_changes', ChangeSet())
+
+
+def _project_companies(execute, project_ids):
+    if not project_ids:
+        return set()
+    rows = execute(db.select(Project.company_id).where(Project.id.in_(project_ids)).distinct()).all()
+    return {row[0] for row in rows if row[0] is not None}
+
+
+def mark_changed(projects=(), tasks=(), companies=(), users=()):
+    """Report writes done with Query.update/delete or Core statements, which skip ORM events"""
+    session = db.session()
+    pending = _pending(session)
+    projects = {pid for pid in projects if pid is not None}
+    pending.projects.update(projects)
+    pending.tasks.update(tid for tid in tasks if tid is not None)
+    pending.users.update(uid for uid in users if uid is not None)
+    pending.companies.update(cid for cid in companies if cid is not None)
+    if projects and not companies:
+        pending.companies.update(_project_companies(session.execute, projects))
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changes(session, flush_context):
+    pending = _pending(session)
+    assignment_tasks = set()
+    comment_tasks = set()
+    flushed_projects = set()
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Task):
+            pending.tasks.add(obj.id)
+            flushed_projects.add(obj.project_id)
+            # A task moved between projects changes both
+            history = inspect(obj).attrs.project_id.history
+            flushed_projects.update(history.deleted or ())
+        elif isinstance(obj, Assignment):
+            assignment_tasks.add(obj.task_id)
+            pending.users.add(obj.user_id)
+        elif isinstance(obj, Comment):
+            comment_tasks.add(obj.task_id)
+        elif isinstance(obj, Project):
+            flushed_projects.add(obj.id)
+            pending.companies.add(obj.company_id)
+        elif isinstance(obj, User):
+            pending.users.add(obj.id)
+            pending.companies.add(obj.company_id)
+
+    execute = session.connection().execute
+    assignment_tasks -= pending.tasks
+    if assignment_tasks:
+        pending.tasks.update(assignment_tasks)
+    lookup_tasks = (assignment_tasks | comment_tasks) - {None}
+    if lookup_tasks:
+        rows = execute(db.select(Task.project_id).where(Task.id.in_(lookup_tasks))).all()
+        flushed_projects.update(row[0] for row in rows)
+
+    flushed_projects.discard(None)
+    pending.projects.update(flushed_projects)
+    pending.companies.update(_project_companies(execute, flushed_projects))
+
+    pending.projects.discard(None)
+    pending.tasks.discard(None)
+    pending.users.discard(None)
+    pending.companies.discard(None)
+
+
+@event.listens_for(Session, 'before_commit')
+def _dispatch_before_commit(session):
+    # Releasing a savepoint fires before_commit too; only the real commit counts
+    if not has_app_context() or session.in_nested_transaction() or not _before_commit_listeners:
+        return
+    # One flush so pending ORM changes are part of the change set
+    session.flush()
+    changes = session.info.get('pending_changes')
+    if not changes:
+        return
+    try:
+        # Common case: every listener succeeds inside a single savepoint
+        with session.begin_nested():
+            for listener in _before_commit_listeners:
+                listener(session, changes)
+        return
+    except Exception:
+        pass
+    # Something failed: redo each listener in its own savepoint so one failure keeps the others' writes
+    for listener in _before_commit_listeners:
+        try:
+            with session.begin_nested():
+                listener(session, changes)
+        except Exception:
+            _logger().exception('Before-commit listener %s failed', listener.__name__)
+
+
+@event.listens_for(Session, 'after_commit')
+def _dispatch_changes(session):
+    # Releasing a savepoint fires after_commit too; wait for the real commit
+    if session.in_nested_transaction():
+        return
+    changes = session.info.pop('pending_changes', None)
+    if not changes:
+        return
+    for listener in _listeners:
+        try:
+            listener(changes)
+        except Exception:
+            _logger().exception('Change listener %s failed', listener.__name__)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_changes(session, previous_transaction):
+    # Rolling back a savepoint keeps the rest of the transaction's changes
+    if previous_transaction.parent is None:
+        session.info.pop('pending_changes', None)
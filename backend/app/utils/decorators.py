@@ -1,33 +1,36 @@
 from functools import wraps
 from flask import jsonify
-from flask_jwt_extended import get_jwt_identity
-from app.models.user import User, UserRole
+from flask_jwt_extended import verify_jwt_in_request
+from app.utils.tokens import get_current_principal
 
 
 def role_required(*roles):
-    """Decorator to check if user has required role"""
+    """
+    Decorator to check if user has required role
+    Role and company come from the token claims, so no query is needed.
+    The caller is passed to the view as `current_user`.
+    """
+    allowed = {role.value if hasattr(role, 'value') else str(role) for role in roles}
+
     def decorator(fn):
         @wraps(fn)
         def wrapper(*args, **kwargs):
-            current_user_id = get_jwt_identity()
-            # Convert to int since JWT identity is stored as string but user ID is integer
-            user = User.query.get(int(current_user_id)) if current_user_id else None
-            
+            verify_jwt_in_request()
+            user = get_current_principal()
+
             if not user:
                 return jsonify({
                     'status': 'error',
                     'message': 'User not found'
                 }), 404
-            
-            # Convert role to string for comparison
-            user_role = user.role.value if hasattr(user.role, 'value') else str(user.role)
-            
-            if user_role not in roles:
+
+            if user.role not in allowed:
                 return jsonify({
                     'status': 'error',
                     'message': 'Insufficient permissions'
                 }), 403
-            
+
+            kwargs['current_user'] = user
             return fn(*args, **kwargs)
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
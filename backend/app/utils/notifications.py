@@ -1,3 +1,4 @@
+from datetime import datetime
 from app import db
 from app.models import Notification, User
 from app.models.notification import NotificationType
@@ -46,3 +47,46 @@ def create_notification(user_id, notif_type, message, data=None, title=None):
     except Exception as e:
         print(f"Error creating notification: {e}")
         return None
+
+
+def create_notifications_bulk(entries):
+    """
+    Create many notifications in one batch, considering user preferences.
+    entries: list of dicts with user_id, notif_type, message and optional title/data
+    Uses one preference query and one executemany insert. Returns rows inserted.
+    """
+    if not entries:
+        return 0
+
+    user_ids = {entry['user_id'] for entry in entries}
+    enabled = {
+        uid for (uid,) in db.session.query(User.id).filter(
+            User.id.in_(user_ids),
+            User.push_notifications == True
+        ).all()
+    }
+
+    now = datetime.utcnow()
+    rows = []
+    for entry in entries:
+        if entry['user_id'] not in enabled:
+            continue
+        notif_type = entry['notif_type']
+        data = entry.get('data') or {}
+        title = entry.get('title') or (notif_type.replace('_', ' ').title() if isinstance(notif_type, str) else notif_type.value.replace('_', ' ').title())
+        rows.append({
+            'user_id': entry['user_id'],
+            'type': notif_type,
+            'title': title,
+            'message': entry['message'],
+            'task_id': data.get('task_id'),
+            'project_id': data.get('project_id'),
+            'comment_id': data.get('comment_id'),
+            'is_read': False,
+            'created_at': now,
+            'updated_at': now
+        })
+
+    if rows:
+        db.session.execute(Notification.__table__.insert(), rows)
+    return len(rows)
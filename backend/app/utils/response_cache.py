@@ -0,0 +1,109 @@
+"""
+Per-tenant response cache
+Successful JSON responses are cached under (company, endpoint, params,
+generation). Every committed write touching a company bumps that company's
+data generation, so its old entries are never served again and age out of
+the LRU; the TTL bounds staleness for writes made by other processes.
+"""
+import threading
+from datetime import datetime
+from functools import wraps
+from flask import current_app, request
+from app.utils.cache import TTLCache
+from app.utils.change_events import on_commit
+from app.utils.tokens import get_current_principal
+
+
+class TenantResponseCache:
+    """Response bodies keyed by company and data generation, with hit/miss metrics per endpoint"""
+
+    def __init__(self):
+        self._cache = None
+        self._generations = {}
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        if self._cache is None:
+            config = current_app.config
+            with self._lock:
+                if self._cache is None:
+                    self._cache = TTLCache(
+                        maxsize=config.get('ANALYTICS_CACHE_MAX_ENTRIES', 4096),
+                        ttl=config.get('ANALYTICS_CACHE_TTL', 300),
+                        max_bytes=config.get('ANALYTICS_CACHE_MAX_BYTES', 32 * 1024 * 1024)
+                    )
+        return self._cache
+
+    def generation(self, company_id):
+        return self._generations.get(company_id, 0)
+
+    def bump(self, company_ids):
+        with self._lock:
+            for company_id in company_ids:
+                self._generations[company_id] = self._generations.get(company_id, 0) + 1
+
+    def _record(self, endpoint, outcome):
+        with self._lock:
+            counters = self._metrics.setdefault(endpoint, {'hits': 0, 'misses': 0})
+            counters[outcome] += 1
+
+    def make_key(self, company_id, endpoint):
+        params = tuple(sorted(request.args.items(multi=True)))
+        # Day-relative answers (overdue, last N days) roll over at midnight
+        today = datetime.utcnow().date().isoformat()
+        return (company_id, endpoint, params, today, self.generation(company_id))
+
+    def cached(self, endpoint):
+        """Decorator for views scoped to the caller's company; place it below @jwt_required()"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                principal = get_current_principal()
+                if not principal or not principal.company_id:
+                    return view(*args, **kwargs)
+
+                key = self.make_key(principal.company_id, endpoint)
+                entry = self.cache.get(key)
+                if entry is not None:
+                    self._record(endpoint, 'hits')
+                    body, status = entry
+                    return current_app.response_class(body, status=status, mimetype='application/json')
+
+                self._record(endpoint, 'misses')
+                result = view(*args, **kwargs)
+                response, status = result if isinstance(result, tuple) else (result, None)
+                response = current_app.make_response(response)
+                if status is not None:
+                    response.status_code = status
+                if response.status_code == 200:
+                    body = response.get_data()
+                    self.cache.set(key, (body, response.status_code), size=len(body))
+                return response
+            return wrapper
+        return decorator
+
+    def stats(self):
+        with self._lock:
+            endpoints = {}
+            for endpoint, counters in self._metrics.items():
+                total = counters['hits'] + counters['misses']
+                endpoints[endpoint] = dict(
+                    counters,
+                    hit_rate=round(counters['hits'] / total * 100, 2) if total else 0
+                )
+        return {
+            'cache': self.cache.stats(),
+            'endpoints': endpoints,
+            'tracked_companies': len(self._generations)
+        }
+
+
+analytics_cache = TenantResponseCache()
+
+
+@on_commit
+def _bump_company_generations(changes):
+    if changes.companies:
+        analytics_cache.bump(changes.companies)
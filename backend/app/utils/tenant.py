@@ -0,0 +1,137 @@
+"""
+Tenant scoping for ORM queries
+Every ORM SELECT issued while a tenant is active gets the company predicate
+of Project, Task, Assignment, Comment, User, Message and Notification added
+to it, wherever those entities appear (FROM, joins, relationship loads).
+
+The tenant is the company of the request's verified JWT, or the one set
+explicitly with tenant_scope() (scripts, background jobs). Callers without
+a company are not scoped; routes keep rejecting them as before.
+
+The only escape hatch for deliberate cross-tenant reads is a
+`with unscoped():` block.
+"""
+from contextlib import contextmanager
+from flask import g, has_app_context, has_request_context
+from flask_jwt_extended import get_jwt
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, with_loader_criteria
+from app import db
+from app.models.assignment import Assignment
+from app.models.chat import Message
+from app.models.comment import Comment
+from app.models.notification import Notification
+from app.models.project import Project
+from app.models.task import Task
+from app.models.user import User
+
+_users = User.__table__
+
+
+def _company_users(company_id):
+    return select(_users.c.id).where(_users.c.company_id == company_id)
+
+
+def tenant_criteria(company_id):
+    """model -> WHERE criterion limiting it to the company"""
+    return {
+        Project: Project.company_id == company_id,
+        User: User.company_id == company_id,
+        Task: Task.company_id == company_id,
+        Assignment: Assignment.company_id == company_id,
+        Comment: Comment.company_id == company_id,
+        Message: Message.sender_id.in_(_company_users(company_id)),
+        Notification: Notification.user_id.in_(_company_users(company_id))
+    }
+
+
+def _token_company():
+    """Company claim of the request's JWT, once a route has verified it"""
+    if not has_request_context():
+        return None
+    try:
+        claims = get_jwt()
+    except RuntimeError:
+        # Not verified yet (or a public route)
+        return None
+    if not claims or claims.get('sub') is None or claims is g.get('tenant_stale_claims'):
+        return None
+    if 'role' in claims:
+        return claims.get('company_id')
+
+    # Tokens issued before company claims existed
+    if 'tenant_token_company' not in g:
+        try:
+            user_id = int(claims['sub'])
+        except (ValueError, TypeError):
+            return None
+        # Unscoped while the lookup itself runs
+        g.tenant_token_company = None
+        g.tenant_token_company = db.session.execute(
+            select(_users.c.company_id).where(_users.c.id == user_id)
+        ).scalar()
+    return g.tenant_token_company
+
+
+def _forget_previous_request():
+    """
+    Requests sharing an app context (test clients, CLI) also share the
+    previous request's verified claims; they must not scope this one
+    """
+    g.pop('tenant_token_company', None)
+    try:
+        g.tenant_stale_claims = get_jwt()
+    except RuntimeError:
+        g.tenant_stale_claims = None
+
+
+def init_tenant_scope(app):
+    app.before_request(_forget_previous_request)
+
+
+def current_tenant():
+    """Company id queries are currently scoped to, or None"""
+    if not has_app_context() or g.get('tenant_unscoped'):
+        return None
+    if g.get('tenant_company_id') is not None:
+        return g.tenant_company_id
+    return _token_company()
+
+
+@contextmanager
+def tenant_scope(company_id):
+    """Scope ORM queries in the block to `company_id`"""
+    previous = g.get('tenant_company_id')
+    g.tenant_company_id = company_id
+    try:
+        yield
+    finally:
+        g.tenant_company_id = previous
+
+
+@contextmanager
+def unscoped():
+    """Run the block's queries across every tenant"""
+    previous = g.get('tenant_unscoped', False)
+    g.tenant_unscoped = True
+    try:
+        yield
+    finally:
+        g.tenant_unscoped = previous
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _scope_to_tenant(execute_state):
+    if (
+        not execute_state.is_select
+        or execute_state.is_column_load
+        or execute_state.is_relationship_load
+    ):
+        return
+    company_id = current_tenant()
+    if company_id is None:
+        return
+    execute_state.statement = execute_state.statement.options(*(
+        with_loader_criteria(model, criterion, include_aliases=True)
+        for model, criterion in tenant_criteria(company_id).items()
+    ))
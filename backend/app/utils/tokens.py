@@ -0,0 +1,160 @@
+import time
+import threading
+from collections import namedtuple
+from flask import current_app, jsonify
+from flask_jwt_extended import create_access_token, get_jwt, get_jwt_identity
+from sqlalchemy import event, inspect
+from app import db
+from app.models.user import User
+from app.utils.change_events import on_commit
+
+# Lightweight stand-in for the User row, built from token claims only
+TokenUser = namedtuple('TokenUser', ['id', 'role', 'company_id'])
+
+# Fields that invalidate already-issued tokens when they change
+TOKEN_VERSION_FIELDS = ('role', 'company_id', 'is_active')
+
+
+class TokenVersionCache:
+    """
+    Small TTL cache of user_id -> (token_version, is_active)
+    Lets the revocation check skip the database on the hot path. Entries
+    are dropped after the commit that changes a user, but only in this
+    process: other workers keep trusting their copy for up to
+    JWT_VERSION_CACHE_TTL seconds, which bounds cross-process revocation.
+    """
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id, ttl):
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        version, is_active, cached_at = entry
+        if time.monotonic() - cached_at > ttl:
+            self._entries.pop(user_id, None)
+            return None
+        return version, is_active
+
+    def set(self, user_id, version, is_active):
+        with self._lock:
+            if len(self._entries) >= self.max_size:
+                # Evict the oldest entry (dicts keep insertion order)
+                self._entries.pop(next(iter(self._entries)), None)
+            self._entries[user_id] = (version, is_active, time.monotonic())
+
+    def invalidate(self, user_id=None):
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+
+token_version_cache = TokenVersionCache()
+
+
+def _role_value(role):
+    return role.value if hasattr(role, 'value') else str(role)
+
+
+def build_user_claims(user):
+    """Claims embedded in every access token so authorization needs no queries"""
+    return {
+        'role': _role_value(user.role),
+        'company_id': user.company_id,
+        'ver': user.token_version or 0
+    }
+
+
+def create_user_token(user):
+    """Create an access token for a user with role/company claims"""
+    return create_access_token(
+        identity=str(user.id),
+        additional_claims=build_user_claims(user)
+    )
+
+
+def get_current_principal():
+    """
+    Get (id, role, company_id) for the current request from the JWT claims
+    Falls back to loading the User row for tokens issued without claims
+    """
+    uid = get_jwt_identity()
+    if not uid:
+        return None
+    try:
+        user_id = int(uid)
+    except (ValueError, TypeError):
+        return None
+
+    claims = get_jwt()
+    if 'role' in claims:
+        return TokenUser(id=user_id, role=claims['role'], company_id=claims.get('company_id'))
+
+    user = User.query.get(user_id)
+    if not user:
+        return None
+    return TokenUser(id=user.id, role=_role_value(user.role), company_id=user.company_id)
+
+
+def _load_token_version(user_id):
+    """Get (token_version, is_active) for a user, cached"""
+    ttl = current_app.config.get('JWT_VERSION_CACHE_TTL', 60)
+    cached = token_version_cache.get(user_id, ttl)
+    if cached is not None:
+        return cached
+
+    row = db.session.query(User.token_version, User.is_active).filter(User.id == user_id).first()
+    if row is None:
+        return None
+    version, is_active = row[0] or 0, bool(row[1])
+    token_version_cache.set(user_id, version, is_active)
+    return version, is_active
+
+
+def is_token_revoked(jwt_header, jwt_payload):
+    """Token is revoked when the user's version moved on or the user is inactive"""
+    if 'ver' not in jwt_payload:
+        # Issued before claims were added - role_required reloads the user
+        return False
+    try:
+        user_id = int(jwt_payload.get('sub'))
+    except (ValueError, TypeError):
+        return True
+
+    state = _load_token_version(user_id)
+    if state is None:
+        return True
+    version, is_active = state
+    return not is_active or version != jwt_payload['ver']
+
+
+def register_jwt_callbacks(jwt):
+    """Hook the version check into flask_jwt_extended"""
+    jwt.token_in_blocklist_loader(is_token_revoked)
+
+    @jwt.revoked_token_loader
+    def revoked_token_response(jwt_header, jwt_payload):
+        return jsonify({
+            'status': 'error',
+            'message': 'Token has been revoked, please login again'
+        }), 401
+
+
+@event.listens_for(User, 'before_update')
+def bump_token_version(mapper, connection, target):
+    """Invalidate issued tokens when role, company or active status change"""
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in TOKEN_VERSION_FIELDS):
+        target.token_version = (target.token_version or 0) + 1
+
+
+@on_commit
+def _forget_token_versions(changes):
+    # Only once committed: invalidating earlier lets a concurrent check re-cache the old version
+    for user_id in changes.users:
+        token_version_cache.invalidate(user_id)
@@ -0,0 +1,117 @@
+"""
+Company Id Backfill Migration
+Adds the denormalized company_id column to tasks, assignments and comments
+on databases created before it existed, fills it from the owning project
+(tasks) or task (assignments, comments) in batches, then creates the
+company-leading indexes. Only rows whose company_id is still NULL are
+touched, so re-running is safe and picks up where an interrupted run
+stopped:
+
+    python backfill_company_ids.py
+    python backfill_company_ids.py --batch-size 20000
+"""
+import argparse
+import os
+import sys
+
+# Ensure backend imports work
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from sqlalchemy import func, inspect, select, text
+from app import create_app, db
+from app.models import Project, Task, Assignment, Comment
+from migrate_tenant_indexes import migrate as migrate_indexes
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Backfill company_id on tasks, assignments and comments')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'Rows updated per transaction (default: {DEFAULT_BATCH_SIZE})')
+    return parser.parse_args()
+
+
+def add_column(engine, model):
+    """ALTER TABLE ... ADD COLUMN company_id when it is missing; returns True if added"""
+    table = model.__table__
+    columns = {column['name'] for column in inspect(engine).get_columns(table.name)}
+    if 'company_id' in columns:
+        return False
+    column_type = table.c.company_id.type.compile(dialect=engine.dialect)
+    with engine.begin() as connection:
+        connection.execute(text(
+            f'ALTER TABLE {table.name} ADD COLUMN company_id {column_type} REFERENCES companies(id)'
+        ))
+    return True
+
+
+def backfill(model, source, batch_size):
+    """Copy company_id from `source` (a correlated scalar subquery) in id-ordered batches"""
+    table = model.__table__
+    last_id = db.session.execute(select(func.max(table.c.id))).scalar() or 0
+    updated = 0
+    for first in range(0, last_id + 1, batch_size):
+        result = db.session.execute(
+            table.update().where(
+                table.c.company_id.is_(None),
+                table.c.id >= first,
+                table.c.id < first + batch_size
+            ).values(company_id=source)
+        )
+        db.session.commit()
+        updated += result.rowcount or 0
+    return updated
+
+
+def main():
+    args = parse_args()
+    batch_size = max(args.batch_size, 1)
+
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+    with app.app_context():
+        # Tables that do not exist yet are created with the column and indexes
+        db.create_all()
+
+        projects = Project.__table__
+        tasks = Task.__table__
+        steps = (
+            # Tasks first: assignments and comments copy from them
+            (Task, select(projects.c.company_id).where(projects.c.id == tasks.c.project_id).scalar_subquery()),
+            (Assignment, select(tasks.c.company_id).where(tasks.c.id == Assignment.__table__.c.task_id).scalar_subquery()),
+            (Comment, select(tasks.c.company_id).where(tasks.c.id == Comment.__table__.c.task_id).scalar_subquery()),
+        )
+
+        print("Backfilling company_id...")
+        for model, source in steps:
+            name = model.__table__.name
+            try:
+                if add_column(db.engine, model):
+                    print(f"   ✓ Added {name}.company_id")
+                count = backfill(model, source, batch_size)
+            except Exception as e:
+                db.session.rollback()
+                print(f"   ✗ {name} failed: {e}")
+                sys.exit(1)
+            print(f"   ✓ {count} {name} row(s) backfilled")
+
+        try:
+            created, _ = migrate_indexes(db.engine)
+        except Exception as e:
+            print(f"   ✗ Index creation failed: {e}")
+            sys.exit(1)
+        for name in created:
+            print(f"   ✓ {name}")
+
+        # Rows whose project (or task) has no company stay NULL
+        for model in (Task, Assignment, Comment):
+            table = model.__table__
+            missing = db.session.execute(
+                select(func.count()).select_from(table).where(table.c.company_id.is_(None))
+            ).scalar()
+            if missing:
+                print(f"   ! {missing} {table.name} row(s) still without a company")
+
+
+if __name__ == '__main__':
+    main()
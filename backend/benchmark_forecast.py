@@ -0,0 +1,146 @@
+"""
+Completion Forecast Benchmark
+Compares the per-project forecast loop the endpoint used to run with the
+vectorized ForecastService, on an in-memory database.
+
+    python benchmark_forecast.py --projects 2000 --tasks 20
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Ensure backend imports work
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import numpy as np
+from app import create_app, db
+from app.models import Company, User, Project, Task
+from app.models.project import ProjectStatus
+from app.models.task import TaskStatus
+from app.models.user import UserRole
+from app.services.forecast_service import ForecastService, fit_velocity
+
+
+def seed(projects, tasks_per_project):
+    """Insert one company with `projects` active projects and random completion history"""
+    company = Company(name='Benchmark Co')
+    db.session.add(company)
+    db.session.flush()
+    user = User(email='bench@example.com', first_name='Bench', last_name='Mark',
+                role=UserRole.ADMIN, company_id=company.id)
+    user.set_password('benchmark')
+    db.session.add(user)
+    db.session.flush()
+
+    today = datetime.utcnow().date()
+    now = datetime.utcnow()
+    project_rows = [{
+        'title': f'Project {i}', 'code': f'PROJ-{i:05d}', 'status': ProjectStatus.IN_PROGRESS.name,
+        'priority': 'MEDIUM', 'start_date': today - timedelta(days=random.randint(10, 120)),
+        'end_date': today + timedelta(days=random.randint(-10, 90)), 'created_by': user.id,
+        'company_id': company.id, 'created_at': now, 'updated_at': now
+    } for i in range(projects)]
+    db.session.execute(Project.__table__.insert(), project_rows)
+
+    project_ids = [pid for (pid,) in db.session.query(Project.id)]
+    task_rows = []
+    for pid in project_ids:
+        for j in range(tasks_per_project):
+            done = random.random() < 0.4
+            task_rows.append({
+                'title': 'Task', 'task_number': f'{pid}-T{j}',
+                'status': (TaskStatus.COMPLETED if done else TaskStatus.TODO).name,
+                'priority': 'MEDIUM', 'project_id': pid, 'created_by': user.id,
+                'completed_date': today - timedelta(days=random.randint(0, 59)) if done else None,
+                'created_at': now, 'updated_at': now
+            })
+    db.session.execute(Task.__table__.insert(), task_rows)
+    db.session.commit()
+    return company.id
+
+
+def legacy_forecast(company_id):
+    """The loop the endpoint ran before: 4 queries per project, linear extrapolation"""
+    today = datetime.utcnow().date()
+    forecasts = []
+    for project in Project.query.filter(
+        Project.company_id == company_id,
+        Project.status.in_([ProjectStatus.PLANNING, ProjectStatus.IN_PROGRESS])
+    ).all():
+        completion_rate = project.completion_percentage
+        if completion_rate > 0 and project.start_date:
+            days_elapsed = (today - project.start_date).days
+            if days_elapsed > 0:
+                remaining_days = (days_elapsed / completion_rate) * 100 - days_elapsed
+                forecasts.append({'project': project.to_dict(), 'days_remaining': int(remaining_days)})
+    return forecasts
+
+
+def sparse_history(company_id, open_tasks=100):
+    """
+    A project whose only completion is at the far edge of the window: its
+    EWMA velocity is tiny but non-zero, so the raw estimate is decades out
+    """
+    today = datetime.utcnow().date()
+    user_id = db.session.query(User.id).filter(User.company_id == company_id).scalar()
+    project = Project(title='Sparse', code='SPARSE-1', status=ProjectStatus.IN_PROGRESS,
+                      start_date=today - timedelta(days=80), end_date=today + timedelta(days=30),
+                      created_by=user_id, company_id=company_id)
+    db.session.add(project)
+    db.session.flush()
+    tasks = [Task(title='Done', task_number='SPARSE-T0', status=TaskStatus.COMPLETED,
+                  completed_date=today - timedelta(days=59), project_id=project.id, created_by=user_id)]
+    tasks += [Task(title='Open', task_number=f'SPARSE-T{i + 1}', status=TaskStatus.TODO,
+                   project_id=project.id, created_by=user_id) for i in range(open_tasks)]
+    db.session.add_all(tasks)
+    db.session.commit()
+    return ForecastService.forecast([project])[0]['forecast']
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the completion forecast engine')
+    parser.add_argument('--projects', type=int, default=2000)
+    parser.add_argument('--tasks', type=int, default=20, help='Tasks per project')
+    parser.add_argument('--fit-rows', type=int, default=100000, help='Projects for the NumPy-only fit')
+    args = parser.parse_args()
+    random.seed(42)
+
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        company_id = seed(args.projects, args.tasks)
+        print(f"Seeded {args.projects} projects x {args.tasks} tasks")
+
+        db.session.expire_all()
+        legacy, legacy_time = timed(legacy_forecast, company_id)
+        db.session.expire_all()
+        vectorized, vector_time = timed(ForecastService.forecast_company, company_id)
+
+        print(f"   legacy loop:      {legacy_time * 1000:9.1f} ms ({len(legacy)} forecasts)")
+        print(f"   ForecastService:  {vector_time * 1000:9.1f} ms ({len(vectorized)} forecasts)")
+        if vector_time > 0:
+            print(f"   speedup:          {legacy_time / vector_time:9.1f}x")
+
+        forecast = sparse_history(company_id)
+        print(f"   sparse history:   velocity {forecast['velocity_per_day']}/day, "
+              f"completion {forecast['completion_date']}, on track {forecast['on_track']}")
+
+    # Numeric core alone, without the database
+    window = 60
+    daily = np.random.poisson(0.3, size=(args.fit_rows, window)).astype(float)
+    first_day = np.random.randint(0, window, size=args.fit_rows)
+    _, fit_time = timed(fit_velocity, daily, first_day)
+    print(f"   EWMA fit, {args.fit_rows} projects x {window} days: {fit_time * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
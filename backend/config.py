@@ -15,6 +15,24 @@ class Config:
     # JWT Configuration
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key-change-in-production'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
+    JWT_VERSION_CACHE_TTL = 60  # Seconds a cached token version is trusted; bounds revocation across processes
+    
+    # Bulk operations
+    BULK_CHUNK_SIZE = 500          # Items per committed chunk
+    BULK_ASYNC_THRESHOLD = 5000    # Larger jobs run in the background
+    BULK_JOB_WORKERS = 2
+    TASK_IMPORT_MAX_ROWS = 100000  # Rows per bulk create / CSV import request
+    
+    # Analytics response cache
+    ANALYTICS_CACHE_TTL = 300                       # Seconds; bounds staleness across processes
+    ANALYTICS_CACHE_MAX_ENTRIES = 4096
+    ANALYTICS_CACHE_MAX_BYTES = 32 * 1024 * 1024    # Total size of cached response bodies
+    
+    # Schedule risk simulation
+    SIMULATION_WORKERS = 2                          # Processes for large Monte Carlo runs
+    
+    # Over-allocation warnings
+    WORKLOAD_WARNING_INTERVAL_HOURS = 24            # Minimum gap between identical warnings
     
     # CORS Configuration
     CORS_ORIGINS = ['http://localhost:5173', 'http://127.0.0.1:5173']
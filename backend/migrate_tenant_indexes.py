@@ -0,0 +1,82 @@
+"""
+Tenant Index Migration
+Adds the composite indexes tenant-scoped queries rely on to databases
+created before the models declared them (new databases get them from
+db.create_all()). Indexes that already exist are skipped, so re-running
+is safe:
+
+    python migrate_tenant_indexes.py
+
+Indexes on tasks/assignments/comments.company_id need that column; run
+backfill_company_ids.py, which adds and fills it, then creates them.
+"""
+import os
+import sys
+
+# Ensure backend imports work
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from sqlalchemy import inspect
+from app import create_app, db
+from app.models import Project, User, Task, Assignment, Comment, Message, Notification
+
+TENANT_INDEXES = (
+    (Project, 'ix_projects_company_status'),
+    (Project, 'ix_projects_company_end_date'),
+    (User, 'ix_users_company_active_role'),
+    (Task, 'ix_tasks_company_status'),
+    (Task, 'ix_tasks_company_due_date'),
+    (Task, 'ix_tasks_project_status'),
+    (Task, 'ix_tasks_project_due_date'),
+    (Assignment, 'ix_assignments_task'),
+    (Assignment, 'ix_assignments_company_user'),
+    (Comment, 'ix_comments_company_created'),
+    (Message, 'ix_messages_sender_created'),
+    (Message, 'ix_messages_recipient_created'),
+    (Message, 'ix_messages_group_created'),
+    (Notification, 'ix_notifications_user_read'),
+)
+
+
+def migrate(engine):
+    """Create the missing indexes; returns (created, skipped) names"""
+    inspector = inspect(engine)
+    created, skipped = [], []
+    for model, name in TENANT_INDEXES:
+        table = model.__table__
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        if name in existing:
+            continue
+        index = next(index for index in table.indexes if index.name == name)
+        columns = {column['name'] for column in inspector.get_columns(table.name)}
+        if any(column.name not in columns for column in index.columns):
+            # Column added by a later migration
+            skipped.append(name)
+            continue
+        index.create(bind=engine)
+        created.append(name)
+    return created, skipped
+
+
+def main():
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+    with app.app_context():
+        # Tables that do not exist yet are created with their indexes
+        db.create_all()
+
+        print("Adding tenant indexes...")
+        try:
+            created, skipped = migrate(db.engine)
+        except Exception as e:
+            print(f"   ✗ Migration failed: {e}")
+            sys.exit(1)
+        for name in created:
+            print(f"   ✓ {name}")
+        for name in skipped:
+            print(f"   - {name} skipped: column missing, run backfill_company_ids.py")
+        present = len(TENANT_INDEXES) - len(created) - len(skipped)
+        print(f"   {len(created)} index(es) created, {present} already present")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Token Version Migration
+Adds users.token_version, which access tokens are checked against, to
+databases created before it existed. Existing users start at version 0,
+so tokens they already hold stay valid. Does nothing when the column is
+already there, so re-running is safe:
+
+    python migrate_token_version.py
+"""
+import os
+import sys
+
+# Ensure backend imports work
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from sqlalchemy import inspect, text
+from app import create_app, db
+
+
+def migrate(engine):
+    """ALTER TABLE users ADD COLUMN token_version when it is missing; returns True if added"""
+    columns = {column['name'] for column in inspect(engine).get_columns('users')}
+    if 'token_version' in columns:
+        return False
+    with engine.begin() as connection:
+        connection.execute(text('ALTER TABLE users ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0'))
+    return True
+
+
+def main():
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+    with app.app_context():
+        # Tables that do not exist yet are created with the column
+        db.create_all()
+
+        print("Adding users.token_version...")
+        try:
+            added = migrate(db.engine)
+        except Exception as e:
+            print(f"   ✗ Migration failed: {e}")
+            sys.exit(1)
+        if added:
+            print("   ✓ Added users.token_version")
+        else:
+            print("   ✓ users.token_version already present")
+
+
+if __name__ == '__main__':
+    main()
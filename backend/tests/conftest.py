@@ -0,0 +1,83 @@
+import os
+import sys
+
+import pytest
+
+# Ensure backend imports work
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+from app.models import Company, User, Project, Task, Assignment, Comment
+from app.models.user import UserRole
+from app.services.dependency_graph import dependency_graph_cache
+from app.services.project_stats import project_stats_cache
+from app.services.schedule_simulation import simulation_cache
+from app.services.workload_monitor import workload_cache
+from app.utils.response_cache import analytics_cache
+from app.utils.tokens import token_version_cache
+
+PASSWORD = 'secret1'
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        # Module-level caches outlive the in-memory database of the previous test
+        analytics_cache.cache.clear()
+    for cache in (project_stats_cache, dependency_graph_cache, simulation_cache, workload_cache):
+        cache.clear()
+    token_version_cache.invalidate()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def make_tenant(name):
+    """Company with an admin, one project, one task, an assignment and a comment; returns their ids"""
+    company = Company(name=name)
+    db.session.add(company)
+    db.session.flush()
+    admin = User(email=f'admin@{name}.com', first_name='Admin', last_name=name, role=UserRole.ADMIN,
+                 is_active=True, company_id=company.id)
+    admin.set_password(PASSWORD)
+    employee = User(email=f'employee@{name}.com', first_name='Employee', last_name=name, role=UserRole.EMPLOYEE,
+                    is_active=True, company_id=company.id)
+    employee.set_password(PASSWORD)
+    db.session.add_all([admin, employee])
+    db.session.flush()
+    project = Project(title=f'{name} project', code=f'PROJ-{company.id:04d}', created_by=admin.id,
+                      company_id=company.id)
+    db.session.add(project)
+    db.session.flush()
+    task = Task(title=f'{name} task', task_number=f'{name.upper()}-1', project_id=project.id, created_by=admin.id)
+    db.session.add(task)
+    db.session.flush()
+    assignment = Assignment(user_id=employee.id, task_id=task.id, assigned_by=admin.id, assigned_hours=4)
+    comment = Comment(task_id=task.id, user_id=admin.id, content=f'{name} comment')
+    db.session.add_all([assignment, comment])
+    db.session.commit()
+    return {
+        'company': company.id, 'admin': admin.id, 'admin_email': admin.email, 'employee': employee.id,
+        'project': project.id, 'task': task.id, 'assignment': assignment.id, 'comment': comment.id
+    }
+
+
+@pytest.fixture
+def tenants(app):
+    """Two companies with the same shape of data"""
+    with app.app_context():
+        return make_tenant('acme'), make_tenant('globex')
+
+
+def login(client, email):
+    response = client.post('/api/auth/login', json={'email': email, 'password': PASSWORD})
+    assert response.status_code == 200, response.json
+    return {'Authorization': f"Bearer {response.json['data']['access_token']}"}
@@ -0,0 +1,36 @@
+from app import db
+from app.models import Project
+from app.models.project import ProjectStatus
+from app.services.project_stats import project_stats_cache
+from app.utils.response_cache import analytics_cache
+from tests.conftest import login
+
+
+def _status_counts(client, headers):
+    response = client.get('/api/analytics/projects-by-status', headers=headers)
+    assert response.status_code == 200
+    return {row['status']: row['count'] for row in response.json['data']['data']}
+
+
+def test_bulk_project_status_update_invalidates_caches(app, client, tenants):
+    acme, globex = tenants
+    with app.app_context():
+        project = db.session.get(Project, acme['project'])
+        project.status = ProjectStatus.IN_PROGRESS
+        db.session.commit()
+    headers = login(client, acme['admin_email'])
+
+    assert _status_counts(client, headers) == {'in_progress': 1}
+    assert client.get(f"/api/projects/{acme['project']}/stats", headers=headers).status_code == 200
+    assert project_stats_cache.get(acme['project']) is not None
+    generation = analytics_cache.generation(acme['company'])
+    other_generation = analytics_cache.generation(globex['company'])
+
+    response = client.put('/api/bulk/projects/update-status', headers=headers,
+                          json={'project_ids': [acme['project']], 'status': 'completed'})
+    assert response.status_code == 200
+
+    assert analytics_cache.generation(acme['company']) > generation
+    assert analytics_cache.generation(globex['company']) == other_generation
+    assert project_stats_cache.get(acme['project']) is None
+    assert _status_counts(client, headers) == {'completed': 1}
@@ -0,0 +1,51 @@
+from app import db
+from app.models import Project
+from app.models.analytics_snapshot import CompanyKpi
+from app.models.project import ProjectStatus
+from tests.conftest import login
+
+
+def _project_statuses(client, headers):
+    response = client.get('/api/analytics/kpis', headers=headers)
+    assert response.status_code == 200
+    return response.json['data']['projects']['by_status']
+
+
+def test_bulk_project_status_update_marks_kpis_stale(app, client, tenants):
+    acme, globex = tenants
+    with app.app_context():
+        project = db.session.get(Project, acme['project'])
+        project.status = ProjectStatus.IN_PROGRESS
+        db.session.commit()
+    headers = login(client, acme['admin_email'])
+
+    before = _project_statuses(client, headers)
+    assert (before['in_progress'], before['completed']) == (1, 0)
+    with app.app_context():
+        version = CompanyKpi.query.filter_by(company_id=acme['company']).one().version
+
+    response = client.put('/api/bulk/projects/update-status', headers=headers,
+                          json={'project_ids': [acme['project']], 'status': 'completed'})
+    assert response.status_code == 200
+
+    with app.app_context():
+        assert CompanyKpi.query.filter_by(company_id=acme['company']).one().version > version
+    after = _project_statuses(client, headers)
+    assert (after['in_progress'], after['completed']) == (0, 1)
+
+
+def test_task_write_refreshes_only_its_company(app, client, tenants):
+    acme, globex = tenants
+    acme_headers = login(client, acme['admin_email'])
+    globex_headers = login(client, globex['admin_email'])
+    assert client.get('/api/analytics/kpis', headers=acme_headers).json['data']['tasks']['total'] == 1
+    assert client.get('/api/analytics/kpis', headers=globex_headers).status_code == 200
+    with app.app_context():
+        globex_version = CompanyKpi.query.filter_by(company_id=globex['company']).one().version
+
+    response = client.post('/api/tasks/', headers=acme_headers, json={'title': 'New', 'project_id': acme['project']})
+    assert response.status_code == 201
+
+    assert client.get('/api/analytics/kpis', headers=acme_headers).json['data']['tasks']['total'] == 2
+    with app.app_context():
+        assert CompanyKpi.query.filter_by(company_id=globex['company']).one().version == globex_version
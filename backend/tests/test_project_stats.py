@@ -0,0 +1,37 @@
+from app.services.project_stats import project_stats_cache
+from tests.conftest import login
+
+
+def _team(client, headers, project_id):
+    response = client.get(f'/api/projects/{project_id}/stats', headers=headers)
+    assert response.status_code == 200
+    return {member['id']: member for member in response.json['data']['team']['members']}
+
+
+def test_member_edits_show_up_in_cached_stats(client, tenants):
+    acme, _ = tenants
+    headers = login(client, acme['admin_email'])
+    assert _team(client, headers, acme['project'])[acme['employee']]['first_name'] == 'Employee'
+    assert project_stats_cache.get(acme['project']) is not None
+
+    response = client.put(f"/api/users/{acme['employee']}", headers=headers,
+                          json={'first_name': 'Renamed', 'weekly_capacity': 20})
+    assert response.status_code == 200
+
+    # The member edit does not touch the project, so the task figures stay cached
+    assert project_stats_cache.get(acme['project']) is not None
+    member = _team(client, headers, acme['project'])[acme['employee']]
+    assert (member['first_name'], member['weekly_capacity']) == ('Renamed', 20)
+
+
+def test_task_changes_refresh_cached_counts(client, tenants):
+    acme, _ = tenants
+    headers = login(client, acme['admin_email'])
+    stats = client.get(f"/api/projects/{acme['project']}/stats", headers=headers).json['data']
+    assert stats['tasks']['total'] == 1
+
+    response = client.post('/api/tasks/', headers=headers, json={'title': 'New', 'project_id': acme['project']})
+    assert response.status_code == 201
+
+    stats = client.get(f"/api/projects/{acme['project']}/stats", headers=headers).json['data']
+    assert stats['tasks']['total'] == 2
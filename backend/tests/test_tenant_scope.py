@@ -0,0 +1,123 @@
+import pytest
+
+from app import db
+from app.models import User, Project, Task, Assignment, Comment
+from app.utils.tenant import tenant_scope, unscoped
+from tests.conftest import login
+
+
+# API: another company's rows are not found
+
+def test_cross_tenant_task_is_not_found(client, tenants):
+    acme, globex = tenants
+    headers = login(client, acme['admin_email'])
+
+    assert client.get(f"/api/tasks/{globex['task']}", headers=headers).status_code == 404
+    assert client.get(f"/api/tasks/{acme['task']}", headers=headers).status_code == 200
+
+
+def test_cross_tenant_project_is_not_found(client, tenants):
+    acme, globex = tenants
+    headers = login(client, acme['admin_email'])
+
+    assert client.get(f"/api/projects/{globex['project']}", headers=headers).status_code == 404
+    assert client.get(f"/api/projects/{acme['project']}", headers=headers).status_code == 200
+
+
+def test_cross_tenant_comment_is_not_found(client, tenants):
+    acme, globex = tenants
+    headers = login(client, acme['admin_email'])
+
+    response = client.put(f"/api/tasks/comments/{globex['comment']}", headers=headers, json={'content': 'hijack'})
+    assert response.status_code == 404
+
+
+def test_cross_tenant_assignments_are_not_listed(client, tenants):
+    acme, globex = tenants
+    headers = login(client, acme['admin_email'])
+
+    response = client.get(f"/api/tasks/?assigned_to={globex['employee']}", headers=headers)
+    assert response.status_code == 200
+    assert response.json['data'] == []
+
+    response = client.get('/api/tasks/?per_page=100', headers=headers)
+    assert [task['id'] for task in response.json['data']] == [acme['task']]
+
+
+def test_task_details_only_carry_own_rows(client, tenants):
+    acme, _ = tenants
+    headers = login(client, acme['admin_email'])
+
+    task = client.get(f"/api/tasks/{acme['task']}", headers=headers).json['data']['task']
+    assert [assignment['id'] for assignment in task['assignments']] == [acme['assignment']]
+    assert [comment['id'] for comment in task['comments']] == [acme['comment']]
+
+
+def test_previous_request_claims_do_not_scope_the_next(app, client, tenants):
+    acme, globex = tenants
+    # Requests sharing one app context also share flask.g
+    with app.app_context():
+        acme_headers = login(client, acme['admin_email'])
+        assert client.get('/api/tasks/', headers=acme_headers).status_code == 200
+
+        globex_headers = login(client, globex['admin_email'])
+        assert client.get(f"/api/tasks/{globex['task']}", headers=globex_headers).status_code == 200
+        assert client.get(f"/api/tasks/{acme['task']}", headers=globex_headers).status_code == 404
+
+
+# ORM: the hook itself
+
+@pytest.mark.parametrize('model, key', [
+    (Project, 'project'),
+    (Task, 'task'),
+    (Assignment, 'assignment'),
+    (Comment, 'comment')
+])
+def test_tenant_scope_filters_every_model(app, tenants, model, key):
+    acme, globex = tenants
+    with app.app_context():
+        with tenant_scope(acme['company']):
+            assert [row.id for row in model.query.all()] == [acme[key]]
+            assert db.session.get(model, globex[key]) is None
+        with tenant_scope(globex['company']):
+            assert [row.id for row in model.query.all()] == [globex[key]]
+
+
+def test_joined_entities_are_scoped(app, tenants):
+    acme, _ = tenants
+    with app.app_context(), tenant_scope(acme['company']):
+        rows = db.session.query(Assignment.id, Task.id, Project.id).join(
+            Task, Assignment.task_id == Task.id
+        ).join(Project, Task.project_id == Project.id).all()
+        assert rows == [(acme['assignment'], acme['task'], acme['project'])]
+
+        # Both sides of a join are filtered
+        comments = db.session.query(Comment.id).join(User, Comment.user_id == User.id).all()
+        assert comments == [(acme['comment'],)]
+
+
+def test_unscoped_is_the_only_bypass(app, tenants):
+    acme, globex = tenants
+    with app.app_context(), tenant_scope(acme['company']):
+        # Execution options no longer switch scoping off
+        assert Task.query.execution_options(skip_tenant_scope=True).count() == 1
+
+        with unscoped():
+            assert {task.id for task in Task.query.all()} == {acme['task'], globex['task']}
+            assert Comment.query.count() == 2
+
+        # Scoping resumes once the block exits
+        assert Task.query.count() == 1
+
+
+def test_find_by_email_reads_across_tenants(app, tenants):
+    acme, globex = tenants
+    with app.app_context(), tenant_scope(acme['company']):
+        assert User.find_by_email(globex['admin_email']).id == globex['admin']
+        assert User.query.filter_by(email=globex['admin_email']).first() is None
+
+
+def test_queries_without_a_tenant_are_not_scoped(app, tenants):
+    with app.app_context():
+        assert Task.query.count() == 2
+        assert Project.query.count() == 2
@@ -0,0 +1,59 @@
+import pytest
+
+from app import db
+from app.models import User
+from app.models.user import UserRole
+from app.utils.tokens import token_version_cache
+from tests.conftest import login
+
+
+@pytest.mark.parametrize('changes', [{'role': 'teamleader'}, {'is_active': False}])
+def test_user_update_revokes_issued_tokens(client, tenants, changes):
+    acme, _ = tenants
+    admin_headers = login(client, acme['admin_email'])
+    employee_headers = login(client, "employee@acme.com")
+    assert client.get('/api/tasks/', headers=employee_headers).status_code == 200
+
+    response = client.put(f"/api/users/{acme['employee']}", headers=admin_headers, json=changes)
+    assert response.status_code == 200
+
+    assert client.get('/api/tasks/', headers=employee_headers).status_code == 401
+
+
+def test_bulk_deactivation_revokes_issued_tokens(client, tenants):
+    acme, _ = tenants
+    admin_headers = login(client, acme['admin_email'])
+    employee_headers = login(client, 'employee@acme.com')
+    assert client.get('/api/tasks/', headers=employee_headers).status_code == 200
+
+    response = client.put('/api/bulk/users/deactivate', headers=admin_headers, json={'user_ids': [acme['employee']]})
+    assert response.status_code == 200
+
+    assert client.get('/api/tasks/', headers=employee_headers).status_code == 401
+
+
+def test_version_cached_before_commit_is_dropped_after_it(app, tenants):
+    acme, _ = tenants
+    with app.app_context():
+        user = db.session.get(User, acme['employee'])
+        old_version = user.token_version
+        user.role = UserRole.TEAM_LEADER
+        db.session.flush()
+
+        # A concurrent request checks the token before this transaction commits
+        token_version_cache.set(user.id, old_version, True)
+        db.session.commit()
+
+        assert token_version_cache.get(acme['employee'], ttl=60) is None
+
+
+def test_rolled_back_change_keeps_cached_version(app, tenants):
+    acme, _ = tenants
+    with app.app_context():
+        user = db.session.get(User, acme['employee'])
+        token_version_cache.set(user.id, user.token_version, True)
+        user.is_active = False
+        db.session.flush()
+        db.session.rollback()
+
+        assert token_version_cache.get(acme['employee'], ttl=60) is not None